@@ -0,0 +1,249 @@
+"""Latency and throughput of every GET route against data seeded at scale.
+
+Against a local postgres (the MEALPREPDB_* environment, migrated to head):
+
+    python -m benchmarks.routes seed --inventory 1000000
+    python -m benchmarks.routes run --requests 200 --concurrency 8
+    python -m benchmarks.routes run --route ingredient_meal_list_view
+
+`seed` truncates the tables and loads synthetic rows with COPY, see
+benchmarks/seeds. `run` starts the app in process and drives it with an ASGI client,
+so the numbers are the app and the database without a network or server in front.
+Each route gets a warmup, then `--requests` requests `--concurrency` at a time, and
+reports p50/p95/p99 latency and requests per second.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import asyncio
+import dataclasses
+import random
+import statistics
+import time
+
+import httpx
+import sqlalchemy as sa
+from aiodal import dal
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from mealprepdb import config
+from mealprepdb.api import main
+from mealprepdb.api.deps import db
+
+from .seeds import (
+    Scale,
+    fixture_load,
+    fixture_unload,
+    ingredient,
+    ingredient_in_inventory,
+    dish,
+    dish_ingredient,
+    meal,
+    meal_dish,
+    meal_ingredient,
+)
+
+MODULES = (
+    ingredient,
+    ingredient_in_inventory,
+    dish,
+    dish_ingredient,
+    meal,
+    meal_dish,
+    meal_ingredient,
+)
+# tables to ANALYZE after a load so the planner sees the new sizes
+TABLES = [m.__name__.rsplit(".", 1)[-1] for m in MODULES]
+MATERIALIZED_VIEWS = (
+    "mv_spend_monthly",
+    "mv_inventory_consumption",
+    "mv_inventory_usage",
+)
+
+# routes left out unless asked for by name. export streams whole tables.
+SKIP_PREFIXES = ("/metrics", "/debug", "/export", "/health")
+
+# query parameters for routes that require some
+QUERY_PARAMS: Dict[str, Dict[str, str]] = {
+    "search_view": {"q": "onion"},
+    "meal_calendar_view": {"from": "2018-01-01", "to": "2018-12-31"},
+}
+
+
+@dataclasses.dataclass
+class Result:
+    route: str
+    requests: int
+    errors: int
+    seconds: float
+    latencies: List[float]
+
+    def percentile(self, p: int) -> float:
+        if not self.latencies:
+            return float("nan")
+        if len(self.latencies) == 1:
+            return self.latencies[0]
+        return statistics.quantiles(self.latencies, n=100, method="inclusive")[p - 1]
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.seconds if self.seconds else 0.0
+
+    def row(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "requests": self.requests,
+            "errors": self.errors,
+            "p50_ms": self.percentile(50) * 1e3,
+            "p95_ms": self.percentile(95) * 1e3,
+            "p99_ms": self.percentile(99) * 1e3,
+            "rps": self.throughput,
+        }
+
+
+async def seed(scale: Scale) -> None:
+    engine = create_async_engine(config.POSTGRES_URI)
+    try:
+        await db.reflect(engine, sa.MetaData())
+        async with engine.connect() as conn:
+            transaction = dal.TransactionManager(conn, db)
+            await fixture_unload(transaction, *MODULES)
+            for m in MODULES:
+                start = time.perf_counter()
+                await fixture_load(transaction, scale, m)
+                print(f"{m.__name__:>45} {time.perf_counter() - start:>8.1f}s")
+            await transaction.commit()
+
+        # VACUUM, REFRESH and ANALYZE can't run inside the transaction above
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for view in MATERIALIZED_VIEWS:
+                await conn.execute(sa.text(f"REFRESH MATERIALIZED VIEW {view}"))
+            await conn.execute(sa.text(f"VACUUM ANALYZE {', '.join(TABLES)}"))
+    finally:
+        await engine.dispose()
+
+
+def routes(names: Sequence[str]) -> List[APIRoute]:
+    found = [
+        r for r in main.app.routes if isinstance(r, APIRoute) and "GET" in r.methods
+    ]
+    if names:
+        return [r for r in found if r.name in names]
+    return [r for r in found if not r.path.startswith(SKIP_PREFIXES)]
+
+
+def url_for(
+    route: APIRoute, rng: random.Random, max_id: int
+) -> Tuple[str, Dict[str, str]]:
+    # ids 1..max_id exist in every table; see Scale.min_rows
+    path_params = {
+        name: str(rng.randint(1, max_id)) if name == "id" else "ingredient"
+        for name in route.param_convertors
+    }
+    path = main.app.url_path_for(route.name, **path_params)
+    return path, QUERY_PARAMS.get(route.name, {})
+
+
+async def bench(
+    client: httpx.AsyncClient,
+    route: APIRoute,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    max_id: int,
+    seed: int,
+) -> Result:
+    rng = random.Random(f"{seed}:{route.name}")
+    urls = [url_for(route, rng, max_id) for _ in range(warmup + requests)]
+    for path, params in urls[:warmup]:
+        await client.get(path, params=params)
+
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(urls[warmup:])
+
+    async def worker() -> None:
+        nonlocal errors
+        for path, params in pending:
+            start = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400 and response.status_code != 404:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return Result(route.name, requests, errors, time.perf_counter() - start, latencies)
+
+
+async def run(
+    names: Sequence[str],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    max_id: int,
+    seed: int,
+) -> List[Result]:
+    await main.startup()
+    results = []
+    try:
+        async with httpx.AsyncClient(
+            app=main.app, base_url="http://bench", timeout=None
+        ) as client:
+            print(
+                f"{'route':<40} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} "
+                f"{'p99 ms':>9} {'req/s':>8}"
+            )
+            for route in routes(names):
+                result = await bench(
+                    client, route, requests, concurrency, warmup, max_id, seed
+                )
+                results.append(result)
+                r = result.row()
+                print(
+                    f"{r['route']:<40} {r['requests']:>6} {r['errors']:>4} "
+                    f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                    f"{r['rps']:>8.1f}"
+                )
+    finally:
+        await main.shutdown()
+        await db.engine.dispose()
+    return results
+
+
+def cli(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.routes")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("seed", help="truncate and load synthetic data")
+    s.add_argument("--inventory", type=int, default=1_000_000)
+    s.add_argument("--seed", type=int, default=42)
+
+    r = sub.add_parser("run", help="benchmark the GET routes")
+    r.add_argument("--route", action="append", default=[], help="route name")
+    r.add_argument("--requests", type=int, default=200)
+    r.add_argument("--concurrency", type=int, default=8)
+    r.add_argument("--warmup", type=int, default=10)
+    r.add_argument("--inventory", type=int, default=1_000_000, help="seeded scale")
+    r.add_argument("--seed", type=int, default=42)
+
+    args = parser.parse_args(argv)
+    scale = Scale.of(args.inventory, seed=args.seed)
+    if args.command == "seed":
+        asyncio.run(seed(scale))
+    else:
+        asyncio.run(
+            run(
+                args.route,
+                args.requests,
+                args.concurrency,
+                args.warmup,
+                scale.min_rows,
+                args.seed,
+            )
+        )
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,83 @@
+"""Synthetic data at benchmark scale, laid out like tests/seeds: one module per table
+with `load` and `unload`, loaded in FK order by `fixture_load`.
+
+Rows go in with COPY (asyncpg's `copy_records_to_table`) from generators, so loading
+millions of rows is bound by postgres rather than by building INSERTs. Everything is
+drawn from a seeded `random.Random` so two loads at the same scale are identical.
+"""
+from typing import Any, Iterable, Sequence, Tuple
+import dataclasses
+import random
+
+import sqlalchemy as sa
+from aiodal import dal
+
+
+@dataclasses.dataclass(frozen=True)
+class Scale:
+    ingredients: int = 5_000
+    inventory: int = 1_000_000
+    dishes: int = 100_000
+    ingredients_per_dish: int = 5
+    meals: int = 300_000
+    dishes_per_meal: int = 2
+    ingredients_per_meal: int = 3
+    seed: int = 42
+
+    @classmethod
+    def of(cls, inventory: int, seed: int = 42) -> "Scale":
+        """Every table sized relative to the number of inventory rows."""
+        return cls(
+            ingredients=max(10, inventory // 200),
+            inventory=inventory,
+            dishes=max(10, inventory // 10),
+            meals=max(10, inventory * 3 // 10),
+            seed=seed,
+        )
+
+    def rng(self, table: str) -> random.Random:
+        # one stream per table so resizing one table doesn't reshuffle the others
+        return random.Random(f"{self.seed}:{table}")
+
+    @property
+    def min_rows(self) -> int:
+        """ids 1..min_rows exist in every table."""
+        return min(self.ingredients, self.inventory, self.dishes, self.meals)
+
+
+async def copy(
+    trans: dal.TransactionManager,
+    tablename: str,
+    columns: Sequence[str],
+    records: Iterable[Tuple[Any, ...]],
+) -> None:
+    """COPY `records` into `tablename` on the transaction's connection and move the
+    id sequence past them.
+    """
+    raw = await trans.conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        tablename, records=records, columns=list(columns)
+    )
+    await trans.execute(
+        sa.text(
+            f"select setval('{tablename}_id_seq', "
+            f"(select coalesce(max(id), 0) + 1 from {tablename}), false)"
+        )
+    )
+
+
+async def truncate(trans: dal.TransactionManager, tablename: str) -> None:
+    await trans.execute(sa.text(f"TRUNCATE {tablename} RESTART IDENTITY CASCADE"))
+
+
+async def fixture_load(
+    trans: dal.TransactionManager, scale: Scale, *modules: Any
+) -> None:
+    """Load the given modules in order. Order matters, see tests/seeds."""
+    for m in modules:
+        await m.load(trans, scale)
+
+
+async def fixture_unload(trans: dal.TransactionManager, *modules: Any) -> None:
+    for m in reversed(modules):
+        await m.unload(trans)
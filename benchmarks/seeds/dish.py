@@ -0,0 +1,29 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+import datetime
+
+from . import Scale, copy, truncate
+
+START = datetime.date(2017, 1, 1)
+DAYS = 365 * 5
+WORDS = ["mong bean", "plain rice", "curry", "stew", "salad", "soup", "stir fry"]
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("dish")
+    for i in range(1, scale.dishes + 1):
+        # a third of dishes are variations of an earlier one which builds lineage
+        # chains for the recursive views
+        parent = rng.randrange(1, i) if i > 1 and rng.random() < 0.33 else None
+        created_on = START + datetime.timedelta(days=rng.randrange(DAYS))
+        yield (i, f"{rng.choice(WORDS)} {i}", parent, created_on)
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(
+        trans, "dish", ("id", "name", "parent_dish_id", "created_on"), records(scale)
+    )
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "dish")
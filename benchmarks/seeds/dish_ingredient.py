@@ -0,0 +1,36 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+
+from . import Scale, copy, truncate
+
+UNITS = ["cups", "g", "tbsp", "each", "pound"]
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("dish_ingredient")
+    k = min(scale.ingredients_per_dish, scale.inventory)
+    i = 0
+    for dish_id in range(1, scale.dishes + 1):
+        # distinct per dish, see uq__dish_ingredient
+        for ingredient_id in rng.sample(range(1, scale.inventory + 1), k):
+            i += 1
+            yield (
+                i,
+                dish_id,
+                ingredient_id,
+                round(rng.uniform(0.1, 2), 2),
+                rng.choice(UNITS),
+            )
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(
+        trans,
+        "dish_ingredient",
+        ("id", "dish_id", "ingredient_id", "quantity", "unit"),
+        records(scale),
+    )
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "dish_ingredient")
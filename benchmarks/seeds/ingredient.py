@@ -0,0 +1,36 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+
+from . import Scale, copy, truncate
+
+TYPES = [
+    "meat",
+    "vegetable",
+    "starch",
+    "herb",
+    "spice",
+    "seeds",
+    "nuts",
+    "legumes",
+    "fruit",
+    "base_vegetable",
+    "sauce_broth",
+    "seasonings",
+    "dairy",
+]
+WORDS = ["onion", "rice", "cumin", "bean", "ham", "chickpea", "garlic", "flour"]
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("ingredient")
+    for i in range(1, scale.ingredients + 1):
+        # names are unique; the word up front gives search and __contains a spread
+        yield (i, f"{rng.choice(WORDS)} {i}", rng.choice(TYPES))
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(trans, "ingredient", ("id", "name", "type"), records(scale))
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "ingredient")
@@ -0,0 +1,57 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+import datetime
+
+from . import Scale, copy, truncate
+
+START = datetime.date(2017, 1, 1)
+DAYS = 365 * 5
+PLACES = ["onion ville", "leek ville", "corner store", "farmers market", "online"]
+BRANDS = ["", "good beans", "house brand", "fancy foods"]
+UNITS = ["pound", "oz", "g", "cups", "each", "can"]
+
+COLUMNS = (
+    "id",
+    "ingredient_id",
+    "from_where",
+    "brand",
+    "price",
+    "quantity",
+    "remaining_quantity",
+    "unit",
+    "purchased_on",
+    "finished_on",
+)
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("ingredient_in_inventory")
+    for i in range(1, scale.inventory + 1):
+        purchased_on = START + datetime.timedelta(days=rng.randrange(DAYS))
+        finished_on = (
+            purchased_on + datetime.timedelta(days=rng.randrange(60))
+            if rng.random() < 0.7
+            else None
+        )
+        quantity = round(rng.uniform(0.5, 10), 2)
+        yield (
+            i,
+            rng.randint(1, scale.ingredients),
+            rng.choice(PLACES),
+            rng.choice(BRANDS),
+            round(rng.uniform(0.5, 30), 2),
+            quantity,
+            # NOTE not netted against meals and dishes; good enough to read back
+            quantity,
+            rng.choice(UNITS),
+            purchased_on,
+            finished_on,
+        )
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(trans, "ingredient_in_inventory", COLUMNS, records(scale))
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "ingredient_in_inventory")
@@ -0,0 +1,28 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+import datetime
+
+from . import Scale, copy, truncate
+
+START = datetime.date(2017, 1, 1)
+DAYS = 365 * 5
+# see the mealtype_cc check constraint
+TYPES = ["lunch", "breakfast", "dinner", "dessert", "snack"]
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("meal")
+    for i in range(1, scale.meals + 1):
+        type_ = rng.choice(TYPES)
+        consumed_on = START + datetime.timedelta(days=rng.randrange(DAYS))
+        yield (i, type_, f"{type_} number {i}", consumed_on)
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(
+        trans, "meal", ("id", "type", "description", "consumed_on"), records(scale)
+    )
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "meal")
@@ -0,0 +1,28 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+
+from . import Scale, copy, truncate
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("meal_dish")
+    k = min(scale.dishes_per_meal, scale.dishes)
+    i = 0
+    for meal_id in range(1, scale.meals + 1):
+        # distinct per meal, see uq__meal_dish
+        for dish_id in rng.sample(range(1, scale.dishes + 1), k):
+            i += 1
+            yield (i, meal_id, dish_id, round(rng.uniform(0.1, 1), 2), "percent")
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(
+        trans,
+        "meal_dish",
+        ("id", "meal_id", "dish_id", "quantity", "unit"),
+        records(scale),
+    )
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "meal_dish")
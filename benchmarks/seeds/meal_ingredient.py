@@ -0,0 +1,36 @@
+from typing import Any, Iterator, Tuple
+from aiodal import dal
+
+from . import Scale, copy, truncate
+
+UNITS = ["cups", "g", "tbsp", "each", "pound"]
+
+
+def records(scale: Scale) -> Iterator[Tuple[Any, ...]]:
+    rng = scale.rng("meal_ingredient")
+    k = min(scale.ingredients_per_meal, scale.inventory)
+    i = 0
+    for meal_id in range(1, scale.meals + 1):
+        # distinct per meal, see uq__meal_ingredient
+        for ingredient_id in rng.sample(range(1, scale.inventory + 1), k):
+            i += 1
+            yield (
+                i,
+                meal_id,
+                ingredient_id,
+                round(rng.uniform(0.1, 2), 2),
+                rng.choice(UNITS),
+            )
+
+
+async def load(trans: dal.TransactionManager, scale: Scale) -> None:
+    await copy(
+        trans,
+        "meal_ingredient",
+        ("id", "meal_id", "ingredient_id", "quantity", "unit"),
+        records(scale),
+    )
+
+
+async def unload(trans: dal.TransactionManager) -> None:
+    await truncate(trans, "meal_ingredient")
@@ -0,0 +1,234 @@
+"""Time the response path of list views without a database.
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --record            # append to the history
+    python -m benchmarks.serialization --record --check    # and fail on regressions
+
+Synthetic rows are built as real `RowMapping`s, the way `paginator.fetch` gets them,
+and every stage is timed on its own at each `limit`:
+
+    rows_to_dict     RowMapping -> dict, as the paginator does
+    model_validate   ListViewModel.model_validate over the rows
+    model_dump       model_dump(mode="json"), which evaluates every `links`
+    orjson           base.orjson_serializer over the plain rows
+    validated        validate + dump + ORJSONResponse, the pydantic path end to end
+    rendered         ListViewModel.render, the fast path end to end
+
+Each stage reports the best of `--repeat` runs (the least noisy estimate). With
+`--record` the run is appended as one json line to `--history` together with the
+versions of pydantic, fastapi and orjson. `--check` compares it with the median of
+the previous runs and exits non zero when a stage got slower than `--tolerance`.
+"""
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+import argparse
+import datetime
+import importlib.metadata
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+
+import sqlalchemy as sa
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+from fastapi.responses import ORJSONResponse
+
+from mealprepdb.api import main  # noqa: F401 initializes HyperModel links
+from mealprepdb.api.base import orjson_serializer
+from mealprepdb.api.ingredient.ingredient_in_inventory import (
+    IngredientInInventoryListView,
+)
+
+LIMITS = (10, 100, 1000, 2000)
+NUMBER = 20
+REPEAT = 5
+START = datetime.date(2017, 6, 1)
+HISTORY = pathlib.Path(__file__).parent / "results" / "serialization.jsonl"
+# how many previous runs make the baseline
+BASELINE_RUNS = 5
+TOLERANCE = 1.25
+PACKAGES = ("pydantic", "pydantic-core", "fastapi", "orjson", "sqlalchemy")
+
+
+def inventory_rows(n: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "name": f"ingredient {i % 50}",
+            "ingredient_id": i % 50,
+            "from_where": "onion ville",
+            "brand": "good beans",
+            "price": 2.99,
+            "quantity": 1.0,
+            "remaining_quantity": 0.5,
+            "unit": "pound",
+            "purchased_on": START + datetime.timedelta(days=i % 365),
+            "finished_on": None,
+            "total_count": n,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def row_mappings(rows: list[dict]) -> List[sa.RowMapping]:
+    """The rows as `RowMapping`s, like `result.mappings()` on a real query."""
+    keys = list(rows[0])
+    result = IteratorResult(
+        SimpleResultMetaData(keys), iter([tuple(r[k] for k in keys) for r in rows])
+    )
+    return list(result.mappings())
+
+
+def validated(rows: Sequence[Mapping[str, Any]]) -> bytes:
+    view = IngredientInInventoryListView.model_validate(
+        {"next_url": None, "total_count": len(rows), "results": rows}
+    )
+    return ORJSONResponse(view.model_dump(mode="json")).body
+
+
+def rendered(rows: list[dict]) -> bytes:
+    return IngredientInInventoryListView.render(
+        rows, next_url=None, total_count=len(rows)
+    ).body
+
+
+def stages(limit: int) -> Dict[str, Callable[[], Any]]:
+    rows = inventory_rows(limit)
+    mappings = row_mappings(rows)
+    assert validated(rows) == rendered(rows), "fast path output differs"
+    view = IngredientInInventoryListView.model_validate(
+        {"next_url": None, "total_count": limit, "results": rows}
+    )
+    return {
+        "rows_to_dict": lambda: [dict(r) for r in mappings],
+        "model_validate": lambda: IngredientInInventoryListView.model_validate(
+            {"next_url": None, "total_count": limit, "results": rows}
+        ),
+        "model_dump": lambda: view.model_dump(mode="json"),
+        "orjson": lambda: orjson_serializer(rows),
+        "validated": lambda: validated(rows),
+        "rendered": lambda: rendered(rows),
+    }
+
+
+def measure(number: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    """stage -> limit -> best ms per call"""
+    results: Dict[str, Dict[str, float]] = {}
+    for limit in LIMITS:
+        for name, fn in stages(limit).items():
+            best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+            results.setdefault(name, {})[str(limit)] = best * 1e3
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    versions = {}
+    for package in PACKAGES:
+        try:
+            versions[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            versions[package] = None
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "versions": versions,
+    }
+
+
+def load_history(path: pathlib.Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with path.open() as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regressions(
+    current: Dict[str, Dict[str, float]],
+    history: List[Dict[str, Any]],
+    tolerance: float,
+) -> List[str]:
+    """Stages slower than `tolerance` x the median of the last BASELINE_RUNS runs.
+    Only runs on the same machine and python are compared.
+    """
+    env = environment()
+    previous = [
+        h
+        for h in history
+        if h.get("machine") == env["machine"] and h.get("python") == env["python"]
+    ][-BASELINE_RUNS:]
+    found = []
+    for stage, by_limit in current.items():
+        for limit, ms in by_limit.items():
+            past = [
+                h["results"][stage][limit]
+                for h in previous
+                if limit in h.get("results", {}).get(stage, {})
+            ]
+            if not past:
+                continue
+            baseline = statistics.median(past)
+            if ms > baseline * tolerance:
+                found.append(
+                    f"{stage} limit={limit}: {ms:.3f} ms vs {baseline:.3f} ms "
+                    f"baseline ({ms / baseline:.2f}x)"
+                )
+    return found
+
+
+def report(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'stage':<16}" + "".join(f"{'ms @' + str(n):>12}" for n in LIMITS))
+    for stage, by_limit in results.items():
+        print(f"{stage:<16}" + "".join(f"{by_limit[str(n)]:>12.3f}" for n in LIMITS))
+    speedup = [
+        results["validated"][str(n)] / results["rendered"][str(n)] for n in LIMITS
+    ]
+    print(f"{'render speedup':<16}" + "".join(f"{s:>11.1f}x" for s in speedup))
+
+
+def run(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization")
+    parser.add_argument("--number", type=int, default=NUMBER)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--record", action="store_true", help="append to history")
+    parser.add_argument("--check", action="store_true", help="fail on regressions")
+    parser.add_argument("--history", type=pathlib.Path, default=HISTORY)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = measure(args.number, args.repeat)
+    report(results)
+
+    history = load_history(args.history)
+    slower = regressions(results, history, args.tolerance)
+    for line in slower:
+        print(f"REGRESSION {line}")
+
+    if args.record:
+        entry = {
+            "at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **environment(),
+            "number": args.number,
+            "repeat": args.repeat,
+            "results": results,
+        }
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with args.history.open("a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    return 1 if args.check and slower else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
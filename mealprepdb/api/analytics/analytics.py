@@ -0,0 +1,253 @@
+from typing import Any, Dict, List
+import logging
+from .. import base
+from aiodal import dal
+import sqlalchemy as sa
+from fastapi import Query
+from fastapi.responses import ORJSONResponse
+import datetime
+from .. import paginator
+from .. import units
+
+logger = logging.getLogger(__name__)
+
+# the materialized views are not reflected so we describe the columns we read here.
+# see migrations a7c3e5d91b24 and d5a8e3c7b902
+mv_spend_monthly = sa.table(
+    "mv_spend_monthly",
+    sa.column("month", sa.Date),
+    sa.column("ingredient_type", sa.String),
+    sa.column("total_spend", sa.Float),
+    sa.column("purchases", sa.BigInteger),
+)
+
+mv_inventory_consumption = sa.table(
+    "mv_inventory_consumption",
+    sa.column("ingredient_in_inventory_id", sa.BigInteger),
+    sa.column("ingredient_id", sa.Integer),
+    sa.column("ingredient_name", sa.String),
+    sa.column("ingredient_type", sa.String),
+    sa.column("purchased_quantity", sa.Float),
+    sa.column("unit", sa.String),
+    sa.column("purchased_on", sa.Date),
+    sa.column("finished_on", sa.Date),
+    sa.column("last_used_on", sa.Date),
+)
+
+# see migration e91b7d3c5a06
+mv_inventory_usage = sa.table(
+    "mv_inventory_usage",
+    sa.column("ingredient_in_inventory_id", sa.BigInteger),
+    sa.column("unit", sa.String),
+    sa.column("quantity", sa.Float),
+)
+
+
+class SpendQueryParams(base.BaseListViewQueryParamsModel):
+    def __init__(
+        self,
+        type: base.IngredientTypeEnum = Query(None),
+        month__ge: datetime.date = Query(None),
+        month__le: datetime.date = Query(None),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
+    ):
+        self.type = type
+        self.month__ge = month__ge
+        self.month__le = month__le
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+        self.count = count
+
+
+class SpendResource(base.ResourceModel):
+    month: datetime.date
+    ingredient_type: str
+    total_spend: float
+    purchases: int
+
+
+class SpendListView(base.ListViewModel[SpendResource]):
+    results: List[SpendResource]
+
+    @classmethod
+    async def get(
+        cls,
+        transaction: dal.TransactionManager,
+        request_url: str,
+        params: SpendQueryParams,
+    ) -> ORJSONResponse:
+        t = mv_spend_monthly
+        order_by = (t.c.month, t.c.ingredient_type)
+        stmt = sa.select(
+            t.c.month,
+            t.c.ingredient_type,
+            t.c.total_spend,
+            t.c.purchases,
+        ).order_by(*order_by)
+
+        if params.type:
+            stmt = stmt.where(t.c.ingredient_type == params.type)
+        if params.month__ge:
+            # months are stored as their first day
+            stmt = stmt.where(t.c.month >= params.month__ge.replace(day=1))
+        if params.month__le:
+            stmt = stmt.where(t.c.month <= params.month__le)
+
+        results, page = await paginator.fetch(
+            transaction, stmt, request_url, params, order_by, count_on=t.c.month
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+        )
+
+
+class ConsumptionQueryParams(base.BaseListViewQueryParamsModel):
+    def __init__(
+        self,
+        type: base.IngredientTypeEnum = Query(None),
+        ingredient_id: int = Query(None),
+        ingredient_name__contains: str = Query(None),
+        finished: bool = Query(None),
+        offset: int = Query(0, ge=0),
+        limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
+    ):
+        self.type = type
+        self.ingredient_id = ingredient_id
+        self.ingredient_name__contains = ingredient_name__contains
+        self.finished = finished
+        self.offset = offset
+        self.limit = limit
+        self.cursor = cursor
+        self.count = count
+
+
+class ConsumptionResource(base.ResourceModel):
+    ingredient_in_inventory_id: int
+    ingredient_id: int
+    ingredient_name: str
+    ingredient_type: str
+    purchased_quantity: float | None = None
+    unit: str | None = None
+    purchased_on: datetime.date | None = None
+    finished_on: datetime.date | None = None
+    consumed_quantity: float = 0
+    last_used_on: datetime.date | None = None
+
+
+class ConsumptionListView(base.ListViewModel[ConsumptionResource]):
+    results: List[ConsumptionResource]
+
+    @classmethod
+    async def get(
+        cls,
+        transaction: dal.TransactionManager,
+        request_url: str,
+        params: ConsumptionQueryParams,
+    ) -> ORJSONResponse:
+        """consumed_quantity is in the unit the item was bought in. It is not part of
+        the view; it is summed here from the per unit totals in mv_inventory_usage,
+        see `_consumed`.
+        """
+        t = mv_inventory_consumption
+        order_by = (t.c.ingredient_in_inventory_id,)
+        stmt = sa.select(
+            t.c.ingredient_in_inventory_id,
+            t.c.ingredient_id,
+            t.c.ingredient_name,
+            t.c.ingredient_type,
+            t.c.purchased_quantity,
+            t.c.unit,
+            t.c.purchased_on,
+            t.c.finished_on,
+            t.c.last_used_on,
+        ).order_by(*order_by)
+
+        if params.type:
+            stmt = stmt.where(t.c.ingredient_type == params.type)
+        if params.ingredient_id:
+            stmt = stmt.where(t.c.ingredient_id == params.ingredient_id)
+        if params.ingredient_name__contains:
+            stmt = stmt.where(
+                base.icontains(t.c.ingredient_name, params.ingredient_name__contains)
+            )
+        if params.finished is not None:
+            stmt = stmt.where(
+                t.c.finished_on.is_not(None)
+                if params.finished
+                else t.c.finished_on.is_(None)
+            )
+
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.ingredient_in_inventory_id,
+        )
+        await _consumed(transaction, results)
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+        )
+
+
+async def _consumed(
+    transaction: dal.TransactionManager, results: List[Dict[str, Any]]
+) -> None:
+    """Set consumed_quantity of a page of consumption rows. The usage rows of the page
+    are converted into each item's unit as one column and summed with `np.bincount`.
+    Usage that can't be converted is left out.
+    """
+    import numpy as np
+
+    if not results:
+        return
+    u = mv_inventory_usage
+    ids = np.array([r["ingredient_in_inventory_id"] for r in results], dtype=np.int64)
+    order = np.argsort(ids)
+    res = await transaction.execute(
+        sa.select(u.c.ingredient_in_inventory_id, u.c.unit, u.c.quantity).where(
+            u.c.ingredient_in_inventory_id.in_(ids.tolist())
+        )
+    )
+    uses = res.all()
+
+    if uses:
+        found = np.searchsorted(
+            ids, [r.ingredient_in_inventory_id for r in uses], sorter=order
+        )
+        pos = order[found]
+        to = [results[i]["unit"] for i in pos]
+        converted = units.registry.convert(
+            [r.quantity for r in uses],
+            [r.unit or unit for r, unit in zip(uses, to)],
+            to,
+            ingredients=[results[i]["ingredient_name"] for i in pos],
+        )
+        consumed, skipped = units.sum_by(pos, converted, len(results))
+        if skipped.any():
+            logger.warning(
+                "usage left out of consumed_quantity, units can't be converted: %s",
+                {
+                    r["ingredient_in_inventory_id"]: int(n)
+                    for r, n in zip(results, skipped)
+                    if n
+                },
+            )
+    else:
+        consumed = np.zeros(len(results), dtype=np.float64)
+
+    for r, c in zip(results, consumed.tolist()):
+        r["consumed_quantity"] = c
@@ -0,0 +1,85 @@
+"""Keeps the analytics materialized views fresh.
+
+Writes that go through the `base` helpers mark the views dirty once their transaction
+commits; a write that rolls back doesn't. A background task refreshes them
+CONCURRENTLY (readers are never blocked) `interval` seconds after the first such
+write, and on a schedule every `max_age` seconds regardless.
+"""
+from typing import Optional
+import asyncio
+import logging
+import time
+
+import sqlalchemy as sa
+from aiodal import dal
+
+from ... import config
+from .. import base
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZED_VIEWS = (
+    "mv_spend_monthly",
+    "mv_inventory_consumption",
+    "mv_inventory_usage",
+)
+
+# tables the views are built from
+SOURCE_TABLES = frozenset(
+    {
+        "ingredient",
+        "ingredient_in_inventory",
+        "meal",
+        "meal_ingredient",
+        "dish",
+        "dish_ingredient",
+    }
+)
+
+
+class Refresher:
+    def __init__(self, interval: float, max_age: float):
+        self.interval = interval
+        self.max_age = max_age
+        self.dirty_since: Optional[float] = None
+        self.refreshed_at = time.monotonic()
+
+    def mark_dirty(self, tablename: str) -> None:
+        if tablename in SOURCE_TABLES and self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if self.dirty_since is not None and now - self.dirty_since >= self.interval:
+            return True
+        return now - self.refreshed_at >= self.max_age
+
+    async def refresh(self, transaction: dal.TransactionManager) -> None:
+        """Refresh every view. The caller owns the transaction."""
+        # NOTE clear first so a write that lands while we refresh marks it dirty again
+        self.dirty_since = None
+        for view in MATERIALIZED_VIEWS:
+            await transaction.execute(
+                sa.text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+            )
+        self.refreshed_at = time.monotonic()
+
+    async def run(self, db: dal.DataAccessLayer) -> None:
+        """Background loop started by the app. Runs until cancelled."""
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.due():
+                continue
+            try:
+                async with db.engine.connect() as conn:
+                    transaction = dal.TransactionManager(conn, db)
+                    await self.refresh(transaction)
+                    await transaction.commit()
+            except Exception as err:  # keep the loop alive; try again next tick
+                logger.exception(err)
+
+
+refresher = Refresher(
+    interval=config.ANALYTICS_REFRESH_INTERVAL, max_age=config.ANALYTICS_MAX_AGE
+)
+base.on_write(refresher.mark_dirty)
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Request, Response
+
+# from ..auth import auth0
+from ..deps import get_transaction
+from . import analytics as model
+from .refresh import refresher
+from aiodal import dal
+from typing import List, Any
+
+deps: List[Any] = [
+    # Depends(auth0.implicit_scheme),
+]
+router = APIRouter(prefix="/analytics", tags=["analytics"], dependencies=deps)
+
+
+@router.get("/spend/", response_model=model.SpendListView)
+async def spend_list_view(
+    request: Request,
+    params: model.SpendQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> Response:
+    """Return spend per ingredient type per month."""
+
+    return await model.SpendListView.get(
+        transaction=transaction, request_url=str(request.url), params=params
+    )
+
+
+@router.get("/consumption/", response_model=model.ConsumptionListView)
+async def consumption_list_view(
+    request: Request,
+    params: model.ConsumptionQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> Response:
+    """Return how much of each item in inventory has been used."""
+
+    return await model.ConsumptionListView.get(
+        transaction=transaction, request_url=str(request.url), params=params
+    )
+
+
+@router.post("/refresh/", status_code=204)
+async def analytics_refresh_view(
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> None:
+    """Refresh the analytics views now instead of waiting for the background task."""
+
+    await refresher.refresh(transaction)
@@ -1,6 +1,9 @@
+import functools
 import logging
-import fastapi_auth0
-from typing import Dict, Any
+from typing import TYPE_CHECKING, Dict, Any
+
+if TYPE_CHECKING:
+    import fastapi_auth0
 
 logger = logging.getLogger("fastapi_auth0")
 
@@ -9,6 +12,22 @@ from ..config import AUTH0_AUDIENCE, AUTH0_DOMAIN, AUTH0_ORG_ID
 
 
 SCOPES: Dict[str, Any] = {}
-auth0 = fastapi_auth0.Auth0(
-    domain=AUTH0_DOMAIN, api_audience=AUTH0_AUDIENCE, org_id=None, scopes=SCOPES
-)
+
+
+@functools.lru_cache(maxsize=None)
+def get_auth0() -> "fastapi_auth0.Auth0":
+    """Built on first use; fastapi_auth0 pulls in jose and its crypto backends which
+    the api doesn't need to start.
+    """
+    import fastapi_auth0
+
+    return fastapi_auth0.Auth0(
+        domain=AUTH0_DOMAIN, api_audience=AUTH0_AUDIENCE, org_id=None, scopes=SCOPES
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # keeps `from ..auth import auth0` working
+    if name == "auth0":
+        return get_auth0()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,9 +1,28 @@
-from typing import Generic, Optional, TypeVar, Annotated, Dict, Any
+from typing import (
+    Generic,
+    Optional,
+    TypeVar,
+    Annotated,
+    Callable,
+    Dict,
+    Any,
+    ClassVar,
+    List,
+    Mapping,
+    Sequence,
+    Tuple,
+    Type,
+    get_args,
+)
 import abc
+import datetime
+import functools
+import time
 
 import pydantic
 import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import ORJSONResponse
 import dataclasses
 from starlette.datastructures import URLPath
 
@@ -13,6 +32,9 @@ from aiodal import dal
 from sqlalchemy.exc import IntegrityError
 import sqlalchemy as sa
 
+from . import conditional
+from . import telemetry
+
 
 def orjson_serializer(obj: object) -> str:
     """Override internal serializer to handle numpy
@@ -26,9 +48,19 @@ def orjson_serializer(obj: object) -> str:
     return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
 
 
+class CountModeEnum(str, enum.Enum):
+    exact = "exact"  # COUNT(*) OVER () on the filtered set
+    estimate = "estimate"  # planner row estimate
+    none = "none"  # skip counting entirely
+
+
 # NOTE this is an abstract namespace
 class BaseListViewQueryParamsModel:
-    ...
+    # every list view takes these so the paginator can work generically
+    offset: int
+    limit: int
+    cursor: str | None
+    count: CountModeEnum
 
 
 ListViewQueryParamsT = TypeVar(
@@ -48,12 +80,34 @@ class Paginateable(_AiodalPaginateable):  # type: ignore [type-arg]
     total_count: int = 0
 
 
+# route name -> path format string, eg. "dish_detail_view" -> "/dish/{id}"
+_link_templates: Dict[str, str] = {}
+
+
 class HyperModel(pydantic.BaseModel):
     _fastapi: Optional[FastAPI] = pydantic.PrivateAttr()
 
     @classmethod
     def init_app(cls, app: FastAPI) -> None:
+        """Set the app and resolve every named route into a format string once so links
+        are plain string interpolation instead of a walk of the route table per call.
+        """
         cls._fastapi = app
+        _link_templates.clear()
+        for route in app.routes:
+            path_format = getattr(route, "path_format", None)
+            name = getattr(route, "name", None)
+            if path_format and name:
+                _link_templates.setdefault(name, path_format)
+
+    @classmethod
+    def url_for(cls, route_name: str, **path_params: Any) -> str:
+        try:
+            template = _link_templates[route_name]
+        except KeyError:  # route was added after init_app
+            assert cls._fastapi is not None
+            return str(cls._fastapi.url_path_for(route_name, **path_params))
+        return template.format(**path_params)
 
 
 class BaseFormModel(pydantic.BaseModel, abc.ABC):
@@ -73,9 +127,35 @@ ResourceUri = Annotated[str, URLPath]
 class ParentResourceModel(ResourceModel):
     """Base class for all outgoing parent resources."""
 
+    # link name -> (route name, attribute holding the route `id`). override in child
+    link_routes: ClassVar[Dict[str, Tuple[str, str]]] = {}
+
+    # select this in detail queries to get an ETag / Last-Modified. never serialized
+    updated_on: Optional[datetime.datetime] = pydantic.Field(default=None, exclude=True)
+
+    def etag(self) -> str:
+        return conditional.make_etag(
+            type(self).__name__, getattr(self, "id", None), self.updated_on
+        )
+
     @pydantic.computed_field  # type: ignore[misc]
     @property
-    def links(self) -> Optional[Dict[str, ResourceUri]]:  # override in child class
+    def links(self) -> Optional[Dict[str, ResourceUri]]:
+        if self._fastapi and self.link_routes:
+            return {
+                name: self.url_for(route, id=getattr(self, attr))
+                for name, (route, attr) in self.link_routes.items()
+            }
+        return None
+
+    @classmethod
+    def row_links(cls, row: Mapping[str, Any]) -> Optional[Dict[str, str]]:
+        """Same as `links` but straight from a row mapping without building a model."""
+        if cls._fastapi and cls.link_routes:
+            return {
+                name: cls.url_for(route, id=row[attr])
+                for name, (route, attr) in cls.link_routes.items()
+            }
         return None
 
 
@@ -83,8 +163,77 @@ class ListViewModel(pydantic.BaseModel, abc.ABC, Generic[ResourceModelT]):
     """Base class for all outgoing list views"""
 
     next_url: Optional[str] = None
-    total_count: int = 0
+    total_count: Optional[int] = 0
+    total_count_approximate: bool = False
+    results: list[ResourceModelT]
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    @classmethod
+    def _result_fields(cls) -> Tuple[Type[ResourceModel], List[Tuple[str, Any]]]:
+        try:
+            return _result_fields_cache[cls]
+        except KeyError:
+            (model,) = get_args(cls.model_fields["results"].annotation)
+            fields = [
+                (name, f.get_default(call_default_factory=True))
+                for name, f in model.model_fields.items()
+                if not f.exclude
+            ]
+            _result_fields_cache[cls] = (model, fields)
+            return model, fields
+
+    @classmethod
+    def render(
+        cls,
+        results: List[Dict[str, Any]],
+        next_url: Optional[str],
+        total_count: Optional[int],
+        total_count_approximate: bool = False,
+        etag: Optional[str] = None,
+    ) -> ORJSONResponse:
+        """Fast path for list views. Rows from the db are trusted so instead of
+        validating a model per row we pick out the resource fields, attach links from
+        the precompiled templates and hand the result straight to orjson.
+
+        The output is byte for byte the same as validating the list view and letting
+        fastapi serialize it. If an `etag` is given it is sent along as a header.
+        """
+        start = time.perf_counter()
+        model, fields = cls._result_fields()
+        row_links = getattr(model, "row_links", None)
+        rows = []
+        for r in results:
+            row = {name: r.get(name, default) for name, default in fields}
+            if row_links is not None:
+                row["links"] = row_links(r)
+            rows.append(row)
+
+        response = ORJSONResponse(
+            {
+                "next_url": next_url,
+                "total_count": total_count,
+                "total_count_approximate": total_count_approximate,
+                "results": rows,
+            },
+            headers=conditional.headers(etag) if etag else None,
+        )
+        telemetry.serialization_duration.observe(
+            time.perf_counter() - start, cls.__name__
+        )
+        return response
+
+
+_result_fields_cache: Dict[
+    Type[ListViewModel[Any]], Tuple[Type[ResourceModel], List[Tuple[str, Any]]]
+] = {}
+
+
+class BulkUpdateViewModel(pydantic.BaseModel, abc.ABC, Generic[ResourceModelT]):
+    """Base class for all outgoing bulk update results"""
+
     results: list[ResourceModelT]
+    missing_ids: list[int] = []
 
     model_config = pydantic.ConfigDict(from_attributes=True)
 
@@ -119,6 +268,81 @@ class MealTypeEnum(str, enum.Enum):
     _default = ""
 
 
+# query helpers
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so `value` is matched literally (with `escape="\\"`)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def icontains(column: sa.ColumnElement[str], value: str) -> sa.ColumnElement[bool]:
+    """Case insensitive substring match. Compiles to ILIKE '%value%' which the pg_trgm
+    GIN indexes can serve. LIKE wildcards in `value` are matched literally.
+    """
+    return column.ilike(f"%{escape_like(value)}%", escape="\\")
+
+
+def similar(column: sa.ColumnElement[str], value: str) -> sa.ColumnElement[bool]:
+    """pg_trgm fuzzy match, `column % value`. Also served by the trigram indexes."""
+    return column.bool_op("%")(value)
+
+
+def similarity(column: sa.ColumnElement[str], value: str) -> sa.ColumnElement[float]:
+    return sa.func.similarity(column, value, type_=sa.Float)
+
+
+def order_by_similarity(
+    column: sa.ColumnElement[str],
+    value: str,
+    *tiebreak: sa.ColumnElement[Any],
+    cursor: Optional[str] = None,
+) -> Tuple[sa.ColumnElement[Any], ...]:
+    """Best fuzzy match first, then `tiebreak`.
+
+    Raises:
+        HTTPException: 400 if combined with a cursor; a computed sort key can't be one.
+    """
+    if cursor is not None:
+        raise HTTPException(
+            status_code=400, detail="Cursor pagination is not supported with __similar."
+        )
+    return (similarity(column, value).desc(), *tiebreak)
+
+
+# post commit hooks. deps.get_transaction runs them once the request transaction has
+# committed and drops them if it rolls back, eg. to invalidate a cache only once other
+# connections can see the new rows. kept on the connection for the one transaction.
+_AFTER_COMMIT = "mealprepdb_after_commit"
+
+
+def after_commit(transaction: dal.TransactionManager, fn: Callable[[], None]) -> None:
+    transaction.conn.info.setdefault(_AFTER_COMMIT, []).append(fn)
+
+
+def run_after_commit(transaction: dal.TransactionManager, committed: bool) -> None:
+    hooks: List[Callable[[], None]] = transaction.conn.info.pop(_AFTER_COMMIT, [])
+    if committed:
+        for fn in hooks:
+            fn()
+
+
+# write hooks. every create/update helper below registers these with the table name
+# once the statement went through, eg. to mark derived data (materialized views) as
+# stale. they run after the transaction commits and not at all if it rolls back.
+_write_hooks: List[Callable[[str], None]] = []
+
+
+def on_write(hook: Callable[[str], None]) -> Callable[[str], None]:
+    _write_hooks.append(hook)
+    return hook
+
+
+def _wrote(transaction: dal.TransactionManager, tablename: str) -> None:
+    for hook in _write_hooks:
+        after_commit(transaction, functools.partial(hook, tablename))
+
+
 # here for now
 async def create(
     transaction: dal.TransactionManager, tablename: str, form_data: Dict[str, Any]
@@ -136,9 +360,77 @@ async def create(
     except IntegrityError:
         raise HTTPException(status_code=409, detail="Conflict.")
 
+    _wrote(transaction, tablename)
     return res.one()
 
 
+# keeps a bulk insert well below the 32767 bind params postgres allows per statement
+MAX_BULK_SIZE = 1000
+
+
+async def _find_failed_rows(
+    transaction: dal.TransactionManager, t: sa.Table, form_data: List[Dict[str, Any]]
+) -> List[int]:
+    """Replay the rows one at a time to find the ones that fail. The rows that went in
+    are kept until the end so a row conflicting with an earlier row of the same batch
+    (eg. a repeated unique key) is reported too. Nothing is left behind.
+    """
+    failed = []
+    outer = await transaction.conn.begin_nested()
+    try:
+        for i, data in enumerate(form_data):
+            savepoint = await transaction.conn.begin_nested()
+            try:
+                await transaction.execute(sa.insert(t).values(data))
+            except IntegrityError:
+                failed.append(i)
+                await savepoint.rollback()
+            else:
+                await savepoint.commit()
+    finally:
+        await outer.rollback()
+    return failed
+
+
+async def create_many(
+    transaction: dal.TransactionManager,
+    tablename: str,
+    form_data: List[Dict[str, Any]],
+) -> Sequence[sa.Row[Any]]:
+    """bulk create method. All rows go in with a single multi row INSERT ... RETURNING.
+
+    If that conflicts nothing is inserted and the 409 lists the indices of the rows that
+    failed.
+    """
+    if not form_data:
+        return []
+
+    t = transaction.get_table(tablename)
+    stmt = sa.insert(t).values(form_data).returning(t)
+
+    savepoint = await transaction.conn.begin_nested()
+    try:
+        res = await transaction.execute(stmt)
+    except IntegrityError:
+        await savepoint.rollback()
+        failed = await _find_failed_rows(transaction, t, form_data)
+        raise HTTPException(
+            status_code=409, detail={"message": "Conflict.", "failed": failed}
+        )
+    await savepoint.commit()
+
+    _wrote(transaction, tablename)
+    return res.all()
+
+
+def _touch(t: sa.Table) -> Dict[str, Any]:
+    """`server_onupdate` is only a hint to sqlalchemy; postgres has no trigger for it.
+    Bump `updated_on` ourselves so etags change on every write. NOTE clock_timestamp
+    and not now() which is frozen at the start of the transaction.
+    """
+    return {"updated_on": sa.func.clock_timestamp()} if "updated_on" in t.c else {}
+
+
 async def update(
     transaction: dal.TransactionManager,
     tablename: str,
@@ -150,6 +442,7 @@ async def update(
         sa.update(t)
         .values(
             {
+                **_touch(t),
                 **form_data,
             }
         )
@@ -166,4 +459,54 @@ async def update(
     if not result:
         raise HTTPException(status_code=409, detail="Stale Data.")
 
+    _wrote(transaction, tablename)
     return result
+
+
+async def update_many(
+    transaction: dal.TransactionManager,
+    tablename: str,
+    form_data: List[Dict[str, Any]],
+) -> Tuple[List[sa.Row[Any]], List[int]]:
+    """bulk update method. Rows are grouped by the set of fields they change and each
+    group is applied with a single UPDATE ... FROM (VALUES ...) statement.
+
+    Returns the updated rows and the ids that were not found.
+    """
+    ids = [data["id"] for data in form_data]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(status_code=422, detail="Duplicate ids.")
+
+    t = transaction.get_table(tablename)
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+    for data in form_data:
+        fields = tuple(sorted(k for k in data if k != "id"))
+        groups.setdefault(fields, []).append(data)
+
+    results: List[sa.Row[Any]] = []
+    for fields, rows in groups.items():
+        stmt: sa.Executable
+        if not fields:  # nothing to set but still report back whether they exist
+            stmt = sa.select(t).where(t.c.id.in_([r["id"] for r in rows]))
+        else:
+            v = sa.values(
+                sa.column("id", t.c.id.type),
+                *[sa.column(f, t.c[f].type) for f in fields],
+                name="v",
+            ).data([(r["id"], *[r[f] for f in fields]) for r in rows])
+            stmt = (
+                sa.update(t)
+                .values({**_touch(t), **{f: v.c[f] for f in fields}})
+                .where(t.c.id == v.c.id)
+                .returning(t)
+            )
+
+        try:
+            res = await transaction.execute(stmt)
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="Conflict.")
+        results.extend(res.all())
+
+    _wrote(transaction, tablename)
+    found = {r.id for r in results}
+    return results, [i for i in ids if i not in found]
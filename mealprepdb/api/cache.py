@@ -0,0 +1,107 @@
+"""Small in-process TTL + LRU cache for reference table reads.
+
+Each uvicorn worker keeps its own cache so writes only invalidate entries in the
+worker that handled them. The ttl bounds how stale the other workers can get.
+"""
+from typing import Any, Dict, Generic, Hashable, Tuple, TypeVar
+import collections
+import dataclasses
+import time
+
+from .. import config
+
+V = TypeVar("V")
+
+_MISSING: Any = object()
+
+
+@dataclasses.dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0  # pushed out by the lru policy
+    expirations: int = 0  # dropped because the ttl ran out
+    invalidations: int = 0
+
+
+class TTLCache(Generic[V]):
+    """A bounded mapping where every entry expires `ttl` seconds after it was set and
+    the least recently used entry is evicted once `maxsize` is reached.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._data: collections.OrderedDict[
+            Hashable, Tuple[float, V]
+        ] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.stats.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        if self._data.pop(key, _MISSING) is not _MISSING:
+            self.stats.invalidations += 1
+
+    def invalidate_prefix(self, prefix: Hashable) -> None:
+        """Drop every tuple key whose first element is `prefix`."""
+        for key in [k for k in self._data if isinstance(k, tuple) and k[0] == prefix]:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            **dataclasses.asdict(self.stats),
+        }
+
+
+_caches: Dict[str, TTLCache[Any]] = {}
+
+
+def get_cache(
+    name: str, maxsize: int = config.CACHE_MAXSIZE, ttl: float = config.CACHE_TTL
+) -> TTLCache[Any]:
+    """Return the named cache, creating it on first use."""
+    if name not in _caches:
+        _caches[name] = TTLCache(name, maxsize=maxsize, ttl=ttl)
+    return _caches[name]
+
+
+def info() -> Dict[str, Dict[str, Any]]:
+    return {name: c.info() for name, c in _caches.items()}
+
+
+def clear_all() -> None:
+    for c in _caches.values():
+        c.clear()
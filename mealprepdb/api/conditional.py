@@ -0,0 +1,90 @@
+"""HTTP conditional request helpers (ETag / If-None-Match / Last-Modified).
+
+Every table carries an `updated_on` timestamp so a resource's validator is just a hash
+of what identifies it plus that timestamp. A client that sends back a matching
+`If-None-Match` gets a 304 before the payload is ever serialized.
+"""
+from typing import Any, Dict, Optional
+import datetime
+import email.utils
+import hashlib
+
+import orjson
+from fastapi import HTTPException, Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong etag from anything orjson can serialize."""
+    return '"' + hashlib.sha1(orjson.dumps(parts)).hexdigest() + '"'
+
+
+def http_date(dt: datetime.datetime) -> str:
+    return email.utils.format_datetime(
+        dt.astimezone(datetime.timezone.utc), usegmt=True
+    )
+
+
+def headers(
+    etag: str, last_modified: Optional[datetime.datetime] = None
+) -> Dict[str, str]:
+    h = {"ETag": etag}
+    if last_modified is not None:
+        h["Last-Modified"] = http_date(last_modified)
+    return h
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison as RFC 9110 asks for with If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def _not_modified_since(
+    last_modified: Optional[datetime.datetime], if_modified_since: Optional[str]
+) -> bool:
+    if last_modified is None or not if_modified_since:
+        return False
+    try:
+        since = email.utils.parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=datetime.timezone.utc)
+    # http dates only have second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def not_modified(
+    etag: str, last_modified: Optional[datetime.datetime] = None
+) -> HTTPException:
+    return HTTPException(status_code=304, headers=headers(etag, last_modified))
+
+
+def check(
+    request: Request,
+    response: Response,
+    etag: str,
+    last_modified: Optional[datetime.datetime] = None,
+) -> None:
+    """Attach validators to `response` and raise a 304 if the client's copy is current.
+
+    If-None-Match takes precedence; If-Modified-Since is only looked at without it.
+
+    Raises:
+        HTTPException: 304 Not Modified
+    """
+    response.headers.update(headers(etag, last_modified))
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(etag, if_none_match):
+            raise not_modified(etag, last_modified)
+        return
+
+    if _not_modified_since(last_modified, request.headers.get("if-modified-since")):
+        raise not_modified(etag, last_modified)
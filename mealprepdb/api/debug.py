@@ -0,0 +1,19 @@
+"""Debugging endpoints. main only includes this router outside production."""
+from typing import Any, Dict, List
+from fastapi import APIRouter
+
+from . import slow_query
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+
+@router.get("/slow-queries/")
+async def slow_query_list_view() -> List[Dict[str, Any]]:
+    """the most recent slow queries, newest first, with a plan if one was sampled"""
+    return slow_query.log.info()
+
+
+@router.delete("/slow-queries/", status_code=204)
+async def slow_query_clear_view() -> None:
+    """empty the slow query log"""
+    slow_query.log.clear()
@@ -1,8 +1,11 @@
 from fastapi import HTTPException
 from aiodal import dal
 from typing import AsyncIterator
+from sqlalchemy.ext.asyncio import AsyncEngine
 import logging
 from aiodal.oqm.views import AiodalHTTPException
+from . import base
+from . import pool
 
 logging.basicConfig(
     level=logging.ERROR, format="%(asctime)s, %(levelname)s - %(message)s"
@@ -30,11 +33,13 @@ async def get_transaction() -> AsyncIterator[dal.TransactionManager]:
     Yields:
         Iterator[AsyncIterator[AsyncConnection]]: _description_
     """
-    async with db.engine.connect() as conn:
+    async with pool.connect(db.engine) as conn:
         transaction = dal.TransactionManager(conn, db)
+        committed = False
         try:
             yield transaction
             await transaction.commit()
+            committed = True
         except CUSTOM_EXCEPTIONS:
             await transaction.rollback()
             raise
@@ -42,3 +47,10 @@ async def get_transaction() -> AsyncIterator[dal.TransactionManager]:
             logging.exception(err)
             await transaction.rollback()
             raise HTTPException(status_code=500, detail="An unexpected error occurred.")
+        finally:
+            base.run_after_commit(transaction, committed)
+
+
+def get_engine() -> AsyncEngine:
+    """Dependency Injector for routes that look at the engine itself."""
+    return db.engine
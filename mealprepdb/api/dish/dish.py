@@ -1,32 +1,42 @@
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, List, Tuple
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query, HTTPException
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
+from .. import cache
+
+# dish details get looked up again and again while walking parent dishes. keys are
+# ("detail", id)
+dish_cache = cache.get_cache("dish")
 
 
 class DishQueryParams(base.BaseListViewQueryParamsModel):
     def __init__(
         self,
         name__contains: str = Query(None),
+        name__similar: str = Query(None),
         name: str = Query(None),
         created_on: datetime.date = Query(None),
         created_on__le: datetime.date = Query(None),
         created_on__ge: datetime.date = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.name__contains = name__contains
+        self.name__similar = name__similar
         self.name = name
         self.created_on = created_on
         self.created_on__ge = created_on__ge
         self.created_on__le = created_on__le
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 class DishBaseForm(base.BaseFormModel):
@@ -50,20 +60,11 @@ class DishResource(base.ParentResourceModel):
     parent_dish_id: Optional[int] = None
     created_on: Optional[datetime.date] = None
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "self": self._fastapi.url_path_for("dish_detail_view", id=self.id),
-                "dish_ingredient": self._fastapi.url_path_for(
-                    "dish_ingredient_list_view", id=self.id
-                ),
-                "dish_meal": self._fastapi.url_path_for(
-                    "dish_meal_list_view", id=self.id
-                ),
-            }
-        return None
+    link_routes = {
+        "self": ("dish_detail_view", "id"),
+        "dish_ingredient": ("dish_ingredient_list_view", "id"),
+        "dish_meal": ("dish_meal_list_view", "id"),
+    }
 
     @classmethod
     async def detail(
@@ -71,9 +72,15 @@ class DishResource(base.ParentResourceModel):
         transaction: dal.TransactionManager,
         obj_id: int,
     ) -> "DishResource":
+        cached: Optional[DishResource] = dish_cache.get(("detail", obj_id))
+        if cached is not None:
+            return cached
+
         t = transaction.get_table("dish")
         stmt = (
-            sa.select(t.c.id, t.c.name, t.c.parent_dish_id, t.c.created_on)
+            sa.select(
+                t.c.id, t.c.name, t.c.parent_dish_id, t.c.created_on, t.c.updated_on
+            )
             .order_by(t.c.id)
             .where(t.c.id == obj_id)
         )
@@ -82,7 +89,9 @@ class DishResource(base.ParentResourceModel):
         if not result:
             raise HTTPException(status_code=404, detail="Not Found.")
 
-        return cls.model_validate(result)
+        obj = cls.model_validate(result)
+        dish_cache.set(("detail", obj_id), obj)
+        return obj
 
     @classmethod
     async def create(
@@ -103,6 +112,9 @@ class DishResource(base.ParentResourceModel):
             obj_id=obj_id,
             form_data=form.model_dump(exclude_unset=True),
         )
+        base.after_commit(
+            transaction, lambda: dish_cache.invalidate(("detail", obj_id))
+        )
         return cls.model_validate(result)
 
 
@@ -115,25 +127,27 @@ class DishListView(base.ListViewModel[DishResource]):
         transaction: dal.TransactionManager,
         request_url: str,
         params: DishQueryParams,
-    ) -> "DishListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         t = transaction.get_table("dish")
-        stmt = (
-            sa.select(
-                t.c.id,
-                t.c.name,
-                t.c.parent_dish_id,
-                t.c.created_on,
-                sa_total_count(t.c.id),
+        order_by: Tuple[sa.ColumnElement[Any], ...] = (t.c.id,)
+        if params.name__similar:
+            order_by = base.order_by_similarity(
+                t.c.name, params.name__similar, t.c.id, cursor=params.cursor
             )
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
-        )
+        stmt = sa.select(
+            t.c.id,
+            t.c.name,
+            t.c.parent_dish_id,
+            t.c.created_on,
+        ).order_by(*order_by)
 
         if params.name:
             stmt = stmt.where(t.c.name == params.name)
         if params.name__contains:
-            stmt = stmt.where(t.c.name.contains(params.name__contains))
+            stmt = stmt.where(base.icontains(t.c.name, params.name__contains))
+        if params.name__similar:
+            stmt = stmt.where(base.similar(t.c.name, params.name__similar))
         if params.created_on:
             stmt = stmt.where(t.c.created_on == params.created_on)
         if params.created_on__le:
@@ -141,13 +155,20 @@ class DishListView(base.ListViewModel[DishResource]):
         if params.created_on__ge:
             stmt = stmt.where(t.c.created_on >= params.created_on__ge)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(t.c.updated_on,),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
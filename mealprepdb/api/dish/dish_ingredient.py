@@ -1,12 +1,16 @@
 from typing import Dict, Optional, List
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
+from ..ingredient.ingredient_in_inventory import (
+    LEDGER_FIELDS,
+    refresh_remaining,
+    referenced_inventory,
+)
 
 
 class DishIngredientQueryParams(base.BaseListViewQueryParamsModel):
@@ -16,11 +20,15 @@ class DishIngredientQueryParams(base.BaseListViewQueryParamsModel):
         ingredient_name: str = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.ingredient_name__contains = ingredient_name__contains
         self.ingredient_name = ingredient_name
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 class DishIngredientBaseForm(base.BaseFormModel):
@@ -39,6 +47,10 @@ class DishIngredientUpdateForm(DishIngredientBaseForm):
     ...
 
 
+class DishIngredientBulkUpdateForm(DishIngredientUpdateForm):
+    id: int
+
+
 class DishIngredientResource(base.ParentResourceModel):
     id: int
     dish_id: int
@@ -46,17 +58,13 @@ class DishIngredientResource(base.ParentResourceModel):
     quantity: float | None = None
     unit: str | None = None
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "dish": self._fastapi.url_path_for("dish_detail_view", id=self.dish_id),
-                "ingredient_in_inventory": self._fastapi.url_path_for(
-                    "ingredient_in_inventory_detail_view", id=self.ingredient_id
-                ),
-            }
-        return None
+    link_routes = {
+        "dish": ("dish_detail_view", "dish_id"),
+        "ingredient_in_inventory": (
+            "ingredient_in_inventory_detail_view",
+            "ingredient_id",
+        ),
+    }
 
     @classmethod
     async def create(
@@ -65,8 +73,21 @@ class DishIngredientResource(base.ParentResourceModel):
         result = await base.create(
             transaction, tablename="dish_ingredient", form_data=form.model_dump()
         )
+        await refresh_remaining(transaction, [result.ingredient_id])
         return cls.model_validate(result)
 
+    @classmethod
+    async def create_many(
+        cls, transaction: dal.TransactionManager, forms: List[DishIngredientCreateForm]
+    ) -> List["DishIngredientResource"]:
+        results = await base.create_many(
+            transaction,
+            tablename="dish_ingredient",
+            form_data=[form.model_dump() for form in forms],
+        )
+        await refresh_remaining(transaction, [r.ingredient_id for r in results])
+        return [cls.model_validate(r) for r in results]
+
     @classmethod
     async def update(
         cls,
@@ -74,15 +95,49 @@ class DishIngredientResource(base.ParentResourceModel):
         obj_id: int,
         form: DishIngredientUpdateForm,
     ) -> "DishIngredientResource":
+        form_data = form.model_dump(exclude_unset=True)
+        # moving to another inventory item gives quantity back to the old one
+        before = (
+            await referenced_inventory(transaction, "dish_ingredient", [obj_id])
+            if "ingredient_id" in form_data
+            else set()
+        )
         result = await base.update(
             transaction,
             tablename="dish_ingredient",
             obj_id=obj_id,
-            form_data=form.model_dump(exclude_unset=True),
+            form_data=form_data,
         )
+        if form_data.keys() & LEDGER_FIELDS:
+            await refresh_remaining(transaction, before | {result.ingredient_id})
         return cls.model_validate(result)
 
 
+class DishIngredientBulkUpdateView(base.BulkUpdateViewModel[DishIngredientResource]):
+    results: List[DishIngredientResource]
+
+    @classmethod
+    async def update(
+        cls,
+        transaction: dal.TransactionManager,
+        forms: List[DishIngredientBulkUpdateForm],
+    ) -> "DishIngredientBulkUpdateView":
+        form_data = [form.model_dump(exclude_unset=True) for form in forms]
+        before = await referenced_inventory(
+            transaction,
+            "dish_ingredient",
+            [data["id"] for data in form_data if "ingredient_id" in data],
+        )
+        results, missing_ids = await base.update_many(
+            transaction, tablename="dish_ingredient", form_data=form_data
+        )
+        moved = {data["id"] for data in form_data if data.keys() & LEDGER_FIELDS}
+        await refresh_remaining(
+            transaction, before | {r.ingredient_id for r in results if r.id in moved}
+        )
+        return cls.model_validate({"results": results, "missing_ids": missing_ids})
+
+
 class DishIngredientDetailResource(DishIngredientResource):
     dish_name: str
     ingredient_name: str
@@ -99,11 +154,13 @@ class DishIngredientListView(base.ListViewModel[DishIngredientDetailResource]):
         dish_id: int,
         request_url: str,
         params: DishIngredientQueryParams,
-    ) -> "DishIngredientListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         t = transaction.get_table("dish_ingredient")
         dish = transaction.get_table("dish")
         ingredient = transaction.get_table("ingredient")
         ingredient_in_inventory = transaction.get_table("ingredient_in_inventory")
+        order_by = (t.c.id,)
         stmt = (
             sa.select(
                 t.c.id,
@@ -114,7 +171,6 @@ class DishIngredientListView(base.ListViewModel[DishIngredientDetailResource]):
                 t.c.quantity,
                 t.c.unit,
                 dish.c.created_on.label("used_on"),
-                sa_total_count(t.c.id),
             )
             .select_from(
                 t.join(dish, t.c.dish_id == dish.c.id)
@@ -128,25 +184,35 @@ class DishIngredientListView(base.ListViewModel[DishIngredientDetailResource]):
                 )
             )
             .where(t.c.dish_id == dish_id)
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
+            .order_by(*order_by)
         )
 
         if params.ingredient_name:
             stmt = stmt.where(ingredient.c.name == params.ingredient_name)
         if params.ingredient_name__contains:
             stmt = stmt.where(
-                ingredient.c.name.contains(params.ingredient_name__contains)
+                base.icontains(ingredient.c.name, params.ingredient_name__contains)
             )
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(
+                t.c.updated_on,
+                dish.c.updated_on,
+                ingredient.c.updated_on,
+                ingredient_in_inventory.c.updated_on,
+            ),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
@@ -0,0 +1,166 @@
+from typing import Any, List, Optional
+from .. import base
+from aiodal import dal
+import pydantic
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from fastapi import Query, HTTPException
+import datetime
+import enum
+
+# hard cap so a bad tree can never make the recursion run away
+MAX_LINEAGE_DEPTH = 100
+
+
+class LineageDirectionEnum(str, enum.Enum):
+    ancestors = "ancestors"  # follow parent_dish_id up to the root
+    descendants = "descendants"  # every dish derived from this one
+
+
+class DishLineageQueryParams:
+    def __init__(
+        self,
+        max_depth: int = Query(25, ge=0, le=MAX_LINEAGE_DEPTH),
+        ingredients: bool = Query(False),
+    ):
+        self.max_depth = max_depth
+        self.ingredients = ingredients
+
+
+class DishLineageIngredient(pydantic.BaseModel):
+    id: int
+    ingredient_id: int
+    ingredient_name: str
+    quantity: float | None = None
+    unit: str | None = None
+
+
+class DishLineageResource(base.ParentResourceModel):
+    id: int
+    name: str
+    parent_dish_id: Optional[int] = None
+    created_on: Optional[datetime.date] = None
+    depth: int
+    ingredients: Optional[List[DishLineageIngredient]] = None
+
+    link_routes = {
+        "self": ("dish_detail_view", "id"),
+        "dish_ingredient": ("dish_ingredient_list_view", "id"),
+    }
+
+
+def _ingredients_stmt(
+    transaction: dal.TransactionManager, dish_id: sa.ColumnElement[Any]
+) -> sa.ScalarSelect[Any]:
+    """json_agg of the dish_ingredient rows of `dish_id`, correlated to the outer
+    query. Dishes without ingredients get an empty list rather than null.
+    """
+    t = transaction.get_table("dish_ingredient")
+    ingredient = transaction.get_table("ingredient")
+    ingredient_in_inventory = transaction.get_table("ingredient_in_inventory")
+    row = sa.func.json_build_object(
+        "id",
+        t.c.id,
+        "ingredient_id",
+        t.c.ingredient_id,
+        "ingredient_name",
+        ingredient.c.name,
+        "quantity",
+        t.c.quantity,
+        "unit",
+        t.c.unit,
+    )
+    return (
+        sa.select(
+            sa.func.coalesce(
+                sa.func.json_agg(postgresql.aggregate_order_by(row, t.c.id)),
+                sa.literal_column("'[]'::json"),
+                type_=postgresql.JSON,
+            )
+        )
+        .select_from(
+            t.join(
+                ingredient_in_inventory,
+                t.c.ingredient_id == ingredient_in_inventory.c.id,
+            ).join(
+                ingredient,
+                ingredient.c.id == ingredient_in_inventory.c.ingredient_id,
+            )
+        )
+        .where(t.c.dish_id == dish_id)
+        .scalar_subquery()
+    )
+
+
+class DishLineageView(pydantic.BaseModel):
+    results: List[DishLineageResource]
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    @classmethod
+    async def get(
+        cls,
+        transaction: dal.TransactionManager,
+        dish_id: int,
+        direction: LineageDirectionEnum,
+        params: DishLineageQueryParams,
+    ) -> "DishLineageView":
+        """Walk the dish tree from `dish_id` in a single WITH RECURSIVE query.
+
+        Each row carries the path of ids that led to it so a cycle in parent_dish_id
+        stops the walk instead of looping until `max_depth`. Results are ordered by
+        depth, the starting dish being depth 0.
+        """
+        t = transaction.get_table("dish")
+        path_type = postgresql.ARRAY(t.c.id.type)
+
+        anchor = sa.select(
+            t.c.id,
+            t.c.name,
+            t.c.parent_dish_id,
+            t.c.created_on,
+            sa.literal(0).label("depth"),
+            postgresql.array([t.c.id], type_=t.c.id.type).label("path"),
+        ).where(t.c.id == dish_id)
+        lineage = anchor.cte("lineage", recursive=True)
+
+        if direction == LineageDirectionEnum.ancestors:
+            step = t.c.id == lineage.c.parent_dish_id
+        else:
+            step = t.c.parent_dish_id == lineage.c.id
+
+        lineage = lineage.union_all(
+            sa.select(
+                t.c.id,
+                t.c.name,
+                t.c.parent_dish_id,
+                t.c.created_on,
+                (lineage.c.depth + 1).label("depth"),
+                sa.func.array_append(lineage.c.path, t.c.id, type_=path_type),
+            )
+            .select_from(t.join(lineage, step))
+            .where(
+                lineage.c.depth < params.max_depth,
+                sa.not_(t.c.id == sa.any_(lineage.c.path)),
+            )
+        )
+
+        columns: List[sa.ColumnElement[Any]] = [
+            lineage.c.id,
+            lineage.c.name,
+            lineage.c.parent_dish_id,
+            lineage.c.created_on,
+            lineage.c.depth,
+        ]
+        if params.ingredients:
+            columns.append(
+                _ingredients_stmt(transaction, lineage.c.id).label("ingredients")
+            )
+        stmt = sa.select(*columns).order_by(lineage.c.depth, lineage.c.id)
+
+        res = await transaction.execute(stmt)
+        results = res.all()
+        if not results:
+            raise HTTPException(status_code=404, detail="Not Found.")
+
+        return cls.model_validate({"results": results})
@@ -1,8 +1,14 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Request, Response
 
 # from ..auth import auth0
 from ..deps import get_transaction
-from . import dish as model, dish_ingredient as dish_ing_model
+from . import (
+    dish as model,
+    dish_ingredient as dish_ing_model,
+    dish_lineage as lineage_model,
+)
+from .. import base
+from .. import conditional
 from aiodal import dal
 from typing import List, Any
 
@@ -13,29 +19,36 @@ router = APIRouter()
 dish_router = APIRouter(prefix="/dish", tags=["dish"], dependencies=deps)
 
 
-@dish_router.get("/")
+@dish_router.get("/", response_model=model.DishListView)
 async def dish_list_view(
     request: Request,
     params: model.DishQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> model.DishListView:
+) -> Response:
     """Return a list of dishes"""
 
     return await model.DishListView.get(
-        transaction=transaction, request_url=str(request.url), params=params
+        transaction=transaction,
+        request_url=str(request.url),
+        params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
 @dish_router.get("/{id}")
 async def dish_detail_view(
     id: int,
+    request: Request,
+    response: Response,
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
 ) -> model.DishResource:
     """Return an dish detail."""
 
-    return await model.DishResource.detail(transaction, obj_id=id)
+    obj = await model.DishResource.detail(transaction, obj_id=id)
+    conditional.check(request, response, obj.etag(), obj.updated_on)
+    return obj
 
 
 @dish_router.post("/", status_code=201)
@@ -61,18 +74,58 @@ async def dish_update_view(
     return await model.DishResource.update(transaction, obj_id=id, form=form)
 
 
-@dish_router.get("/{id}/ingredient/")
+@dish_router.get("/{id}/lineage")
+async def dish_lineage_view(
+    id: int,
+    params: lineage_model.DishLineageQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> lineage_model.DishLineageView:
+    """Return a dish and all of its parent dishes, nearest first."""
+
+    return await lineage_model.DishLineageView.get(
+        transaction,
+        dish_id=id,
+        direction=lineage_model.LineageDirectionEnum.ancestors,
+        params=params,
+    )
+
+
+@dish_router.get("/{id}/descendants")
+async def dish_descendants_view(
+    id: int,
+    params: lineage_model.DishLineageQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> lineage_model.DishLineageView:
+    """Return a dish and every dish derived from it, breadth first."""
+
+    return await lineage_model.DishLineageView.get(
+        transaction,
+        dish_id=id,
+        direction=lineage_model.LineageDirectionEnum.descendants,
+        params=params,
+    )
+
+
+@dish_router.get(
+    "/{id}/ingredient/", response_model=dish_ing_model.DishIngredientListView
+)
 async def dish_ingredient_list_view(
     id: int,
     request: Request,
     params: dish_ing_model.DishIngredientQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> dish_ing_model.DishIngredientListView:
+) -> Response:
     """Return a list of ingredients used in a dish."""
 
     return await dish_ing_model.DishIngredientListView.from_dish(
-        transaction=transaction, dish_id=id, request_url=str(request.url), params=params
+        transaction=transaction,
+        dish_id=id,
+        request_url=str(request.url),
+        params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
@@ -87,6 +140,21 @@ async def dish_ingredient_create_view(
     return await dish_ing_model.DishIngredientResource.create(transaction, form=form)
 
 
+@router.post("/dish_ingredient/bulk", status_code=201, tags=["dish_ingredient"])
+async def dish_ingredient_bulk_create_view(
+    forms: List[dish_ing_model.DishIngredientCreateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> List[dish_ing_model.DishIngredientResource]:
+    """Return many dish ingredients created in one statement."""
+
+    return await dish_ing_model.DishIngredientResource.create_many(
+        transaction, forms=forms
+    )
+
+
 @router.put("/dish_ingredient/{id}/", tags=["dish_ingredient"])
 async def dish_ingredient_update_view(
     id: int,
@@ -101,4 +169,19 @@ async def dish_ingredient_update_view(
     )
 
 
+@router.patch("/dish_ingredient/bulk", tags=["dish_ingredient"])
+async def dish_ingredient_bulk_update_view(
+    forms: List[dish_ing_model.DishIngredientBulkUpdateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> dish_ing_model.DishIngredientBulkUpdateView:
+    """Return many dish ingredients updated at once."""
+
+    return await dish_ing_model.DishIngredientBulkUpdateView.update(
+        transaction, forms=forms
+    )
+
+
 router.include_router(dish_router)
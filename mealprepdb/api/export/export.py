@@ -0,0 +1,159 @@
+from typing import Any, AsyncIterator, Iterable, Sequence
+import csv
+import enum
+import io
+
+from aiodal import dal
+import orjson
+import sqlalchemy as sa
+
+
+class ExportTableEnum(str, enum.Enum):
+    ingredient_in_inventory = "ingredient_in_inventory"
+    meal_ingredient = "meal_ingredient"
+    dish_ingredient = "dish_ingredient"
+
+
+class ExportFormatEnum(str, enum.Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormatEnum.ndjson: "application/x-ndjson",
+    ExportFormatEnum.csv: "text/csv",
+}
+
+# rows fetched per round trip from the server side cursor
+YIELD_PER = 1000
+
+
+def _ingredient_in_inventory_stmt(
+    transaction: dal.TransactionManager,
+) -> sa.Select[Any]:
+    ing = transaction.get_table("ingredient")
+    t = transaction.get_table("ingredient_in_inventory")
+    return (
+        sa.select(
+            t.c.id,
+            t.c.ingredient_id,
+            ing.c.name.label("ingredient_name"),
+            ing.c.type.label("ingredient_type"),
+            t.c.from_where,
+            t.c.brand,
+            t.c.price,
+            t.c.quantity,
+            t.c.unit,
+            t.c.purchased_on,
+            t.c.finished_on,
+            t.c.updated_on,
+        )
+        .select_from(t.join(ing, t.c.ingredient_id == ing.c.id))
+        .order_by(t.c.id)
+    )
+
+
+def _meal_ingredient_stmt(transaction: dal.TransactionManager) -> sa.Select[Any]:
+    meal = transaction.get_table("meal")
+    ing = transaction.get_table("ingredient")
+    inv = transaction.get_table("ingredient_in_inventory")
+    t = transaction.get_table("meal_ingredient")
+    return (
+        sa.select(
+            t.c.id,
+            t.c.meal_id,
+            meal.c.type.label("meal_type"),
+            meal.c.consumed_on,
+            t.c.ingredient_id,
+            ing.c.name.label("ingredient_name"),
+            t.c.quantity,
+            t.c.unit,
+            t.c.updated_on,
+        )
+        .select_from(
+            t.join(inv, t.c.ingredient_id == inv.c.id)
+            .join(ing, inv.c.ingredient_id == ing.c.id)
+            .join(meal, t.c.meal_id == meal.c.id)
+        )
+        .order_by(t.c.id)
+    )
+
+
+def _dish_ingredient_stmt(transaction: dal.TransactionManager) -> sa.Select[Any]:
+    dish = transaction.get_table("dish")
+    ing = transaction.get_table("ingredient")
+    inv = transaction.get_table("ingredient_in_inventory")
+    t = transaction.get_table("dish_ingredient")
+    return (
+        sa.select(
+            t.c.id,
+            t.c.dish_id,
+            dish.c.name.label("dish_name"),
+            dish.c.created_on.label("used_on"),
+            t.c.ingredient_id,
+            ing.c.name.label("ingredient_name"),
+            t.c.quantity,
+            t.c.unit,
+            t.c.updated_on,
+        )
+        .select_from(
+            t.join(dish, t.c.dish_id == dish.c.id)
+            .join(inv, t.c.ingredient_id == inv.c.id)
+            .join(ing, inv.c.ingredient_id == ing.c.id)
+        )
+        .order_by(t.c.id)
+    )
+
+
+_STATEMENTS = {
+    ExportTableEnum.ingredient_in_inventory: _ingredient_in_inventory_stmt,
+    ExportTableEnum.meal_ingredient: _meal_ingredient_stmt,
+    ExportTableEnum.dish_ingredient: _dish_ingredient_stmt,
+}
+
+
+def export_stmt(
+    transaction: dal.TransactionManager, table: ExportTableEnum
+) -> sa.Select[Any]:
+    return _STATEMENTS[table](transaction)
+
+
+def _ndjson(rows: Sequence[sa.Row[Any]]) -> bytes:
+    return b"".join(
+        orjson.dumps(
+            dict(r._mapping),
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+        )
+        for r in rows
+    )
+
+
+def _csv(rows: Iterable[Sequence[Any]]) -> bytes:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue().encode()
+
+
+async def stream(
+    transaction: dal.TransactionManager,
+    stmt: sa.Select[Any],
+    format: ExportFormatEnum,
+    yield_per: int = YIELD_PER,
+) -> AsyncIterator[bytes]:
+    """Stream the result of `stmt` through a server side cursor.
+
+    At most `yield_per` rows are held in memory at a time and each partition is
+    encoded and sent as soon as it arrives so the first byte goes out right away.
+    """
+    stmt = stmt.execution_options(yield_per=yield_per)
+    result = await transaction.conn.stream(stmt)
+
+    if format == ExportFormatEnum.csv:
+        # always send the header, even for an empty table
+        yield _csv([list(result.keys())])
+
+    async for partition in result.partitions():
+        if format == ExportFormatEnum.ndjson:
+            yield _ndjson(partition)
+        else:
+            yield _csv(partition)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+# from ..auth import auth0
+from ..deps import get_transaction
+from . import export as model
+from aiodal import dal
+from typing import List, Any
+
+deps: List[Any] = [
+    # Depends(auth0.implicit_scheme),
+]
+router = APIRouter(prefix="/export", tags=["export"], dependencies=deps)
+
+
+@router.get("/{table}")
+async def export_view(
+    table: model.ExportTableEnum,
+    format: model.ExportFormatEnum = Query(model.ExportFormatEnum.ndjson),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> StreamingResponse:
+    """Stream every row of a table as NDJSON or CSV."""
+
+    # NOTE the transaction dependency is only torn down after the response has been sent
+    # so the server side cursor stays open for the lifetime of the stream.
+    stmt = model.export_stmt(transaction, table)
+    return StreamingResponse(
+        model.stream(transaction, stmt, format),
+        media_type=model.MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{table.value}.{format.value}"'
+        },
+    )
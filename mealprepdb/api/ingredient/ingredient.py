@@ -1,26 +1,42 @@
-from typing import Dict, Optional, List
+from typing import Any, Dict, Optional, List, Tuple
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query, HTTPException
-import pydantic
+from fastapi.responses import Response
 from .. import paginator
+from .. import cache
+from .. import conditional
+
+# ingredient is a small reference table that the frontend reads on every render.
+# keys are ("detail", id) and ("list", request_url) -> (body, etag)
+ingredient_cache = cache.get_cache("ingredient")
+
+
+def _invalidate(obj_id: int) -> None:
+    ingredient_cache.invalidate(("detail", obj_id))
+    ingredient_cache.invalidate_prefix("list")
 
 
 class IngredientQueryParams(base.BaseListViewQueryParamsModel):
     def __init__(
         self,
         name__contains: str = Query(None),
+        name__similar: str = Query(None),
         name: str = Query(None),
         type: base.IngredientTypeEnum = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.name__contains = name__contains
+        self.name__similar = name__similar
         self.name = name
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
         self.type = type
 
 
@@ -42,14 +58,9 @@ class IngredientResource(base.ParentResourceModel):
     name: str
     type: Optional[base.IngredientTypeEnum] = None
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "self": self._fastapi.url_path_for("ingredient_detail_view", id=self.id)
-            }
-        return None
+    link_routes = {
+        "self": ("ingredient_detail_view", "id"),
+    }
 
     @classmethod
     async def detail(
@@ -57,9 +68,13 @@ class IngredientResource(base.ParentResourceModel):
         transaction: dal.TransactionManager,
         obj_id: int,
     ) -> "IngredientResource":
+        cached: Optional[IngredientResource] = ingredient_cache.get(("detail", obj_id))
+        if cached is not None:
+            return cached
+
         t = transaction.get_table("ingredient")
         stmt = (
-            sa.select(t.c.id, t.c.name, t.c.type)
+            sa.select(t.c.id, t.c.name, t.c.type, t.c.updated_on)
             .order_by(t.c.id)
             .where(t.c.id == obj_id)
         )
@@ -69,7 +84,9 @@ class IngredientResource(base.ParentResourceModel):
         if not result:
             raise HTTPException(status_code=404, detail="Not Found.")
 
-        return cls.model_validate(result)
+        obj = cls.model_validate(result)
+        ingredient_cache.set(("detail", obj_id), obj)
+        return obj
 
     @classmethod
     async def create(
@@ -78,6 +95,9 @@ class IngredientResource(base.ParentResourceModel):
         result = await base.create(
             transaction, tablename="ingredient", form_data=form.model_dump()
         )
+        base.after_commit(
+            transaction, lambda: ingredient_cache.invalidate_prefix("list")
+        )
         return cls.model_validate(result)
 
     @classmethod
@@ -93,6 +113,7 @@ class IngredientResource(base.ParentResourceModel):
             obj_id=obj_id,
             form_data=form.model_dump(exclude_unset=True),
         )
+        base.after_commit(transaction, lambda: _invalidate(obj_id))
         return cls.model_validate(result)
 
 
@@ -105,34 +126,57 @@ class IngredientListView(base.ListViewModel[IngredientResource]):
         transaction: dal.TransactionManager,
         request_url: str,
         params: IngredientQueryParams,
-    ) -> "IngredientListView":
+        if_none_match: Optional[str] = None,
+    ) -> Response:
+        key = ("list", request_url)
+        cached: Optional[Tuple[bytes, Optional[str]]] = ingredient_cache.get(key)
+        if cached is not None:
+            body, etag = cached
+            if etag and conditional.etag_matches(etag, if_none_match):
+                raise conditional.not_modified(etag)
+            return Response(
+                content=body,
+                media_type="application/json",
+                headers=conditional.headers(etag) if etag else None,
+            )
+
         t = transaction.get_table("ingredient")
-        stmt = (
-            sa.select(
-                t.c.id,
-                t.c.name,
-                t.c.type,
-                sa_total_count(t.c.id),
+        order_by: Tuple[sa.ColumnElement[Any], ...] = (t.c.id,)
+        if params.name__similar:
+            order_by = base.order_by_similarity(
+                t.c.name, params.name__similar, t.c.id, cursor=params.cursor
             )
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
-        )
+        stmt = sa.select(
+            t.c.id,
+            t.c.name,
+            t.c.type,
+        ).order_by(*order_by)
 
         if params.name:
             stmt = stmt.where(t.c.name == params.name)
         if params.name__contains:
-            stmt = stmt.where(t.c.name.contains(params.name__contains))
+            stmt = stmt.where(base.icontains(t.c.name, params.name__contains))
+        if params.name__similar:
+            stmt = stmt.where(base.similar(t.c.name, params.name__similar))
         if params.type:
             stmt = stmt.where(t.c.type == params.type)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(t.c.updated_on,),
+            if_none_match=if_none_match,
+        )
+        response = cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
+        ingredient_cache.set(key, (response.body, page.etag))
+        return response
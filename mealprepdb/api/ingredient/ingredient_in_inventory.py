@@ -1,13 +1,18 @@
-from typing import Dict, Optional, Any, List
+from typing import Dict, Optional, Any, Iterable, List, Sequence, Set, Tuple
 import dataclasses
+import logging
 from .. import base
 from aiodal import dal
 from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query, HTTPException
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
+from .. import units
+
+
+logger = logging.getLogger(__name__)
 
 
 class IngredientInInventoryQueryParams(base.BaseListViewQueryParamsModel):
@@ -15,21 +20,28 @@ class IngredientInInventoryQueryParams(base.BaseListViewQueryParamsModel):
         self,
         name: str = Query(None),
         name__contains: str = Query(None),
+        name__similar: str = Query(None),
         from_where: str = Query(None),
         from_where__contains: str = Query(None),
+        brand__contains: str = Query(None),
         purchased_on: datetime.date = Query(None),
         purchased_on__le: datetime.date = Query(None),
         purchased_on__ge: datetime.date = Query(None),
         finished_on: datetime.date = Query(None),
         finished_on__le: datetime.date = Query(None),
         finished_on__ge: datetime.date = Query(None),
+        remaining__gt: float = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.name__contains = name__contains
+        self.name__similar = name__similar
         self.name = name
         self.from_where = from_where
         self.from_where__contains = from_where__contains
+        self.brand__contains = brand__contains
 
         self.purchased_on = purchased_on
         self.purchased_on__ge = purchased_on__ge
@@ -39,8 +51,12 @@ class IngredientInInventoryQueryParams(base.BaseListViewQueryParamsModel):
         self.finished_on__ge = finished_on__ge
         self.finished_on__le = finished_on__le
 
+        self.remaining__gt = remaining__gt
+
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 @dataclasses.dataclass
@@ -88,11 +104,13 @@ class IngredientInInventoryListViewEntity(IngredientInInventoryData, base.Pagina
         if where.name:
             stmt = stmt.where(ing.c.name == where.name)
         if where.name__contains:
-            stmt = stmt.where(ing.c.name.contains(where.name__contains))
+            stmt = stmt.where(base.icontains(ing.c.name, where.name__contains))
         if where.from_where:
             stmt = stmt.where(t.c.from_where == where.from_where)
         if where.from_where__contains:
-            stmt = stmt.where(t.c.from_where.contains(where.from_where__contains))
+            stmt = stmt.where(
+                base.icontains(t.c.from_where, where.from_where__contains)
+            )
 
         if where.purchased_on:
             stmt = stmt.where(t.c.purchased_on == where.purchased_on)
@@ -111,6 +129,125 @@ class IngredientInInventoryListViewEntity(IngredientInInventoryData, base.Pagina
         return stmt
 
 
+# remaining quantity ledger. quantities dishes and meals use are converted into the
+# unit the item was bought in (see units.py); a missing unit means that unit already.
+# uses that can't be converted (eg. "can" against "pound") are not counted.
+
+_LEDGER_TABLES = ("dish_ingredient", "meal_ingredient")
+
+# columns of an inventory, dish or meal row whose change moves remaining_quantity
+LEDGER_FIELDS = frozenset({"quantity", "unit", "ingredient_id"})
+
+
+async def refresh_remaining(
+    transaction: dal.TransactionManager, inventory_ids: Iterable[int]
+) -> Dict[int, Optional[float]]:
+    """Recompute `remaining_quantity` of just these inventory rows from the dish and
+    meal rows that reference them. Called after every write that can move it.
+
+    Usage rows are read in one go, converted as a column and summed per item with
+    `np.bincount`, then written back with a single UPDATE ... FROM (VALUES ...).
+
+    NOTE the inventory rows are locked (in id order) before the usage is read. A
+    concurrent write against the same rows waits for this transaction to commit and
+    then reads a ledger that includes its usage, instead of overwriting it.
+
+    Returns:
+        Dict[int, Optional[float]]: inventory id -> new remaining quantity
+    """
+    ids = sorted(set(inventory_ids))
+    if not ids:
+        return {}
+
+    t = transaction.get_table("ingredient_in_inventory")
+    ing = transaction.get_table("ingredient")
+    res = await transaction.execute(
+        sa.select(t.c.id, t.c.quantity, t.c.unit, ing.c.name)
+        .join(ing, ing.c.id == t.c.ingredient_id)
+        .where(t.c.id.in_(ids))
+        .order_by(t.c.id)
+        .with_for_update(of=t)
+    )
+    items = res.all()
+    if not items:
+        return {}
+
+    ledger = sa.union_all(
+        *[
+            sa.select(used.c.ingredient_id, used.c.quantity, used.c.unit).where(
+                used.c.ingredient_id.in_(ids)
+            )
+            for used in (transaction.get_table(n) for n in _LEDGER_TABLES)
+        ]
+    )
+    res = await transaction.execute(ledger)
+    remaining = compute_remaining(items, res.all())
+
+    v = sa.values(
+        sa.column("id", t.c.id.type),
+        sa.column("remaining_quantity", t.c.remaining_quantity.type),
+        name="v",
+    ).data(list(remaining.items()))
+    await transaction.execute(
+        sa.update(t)
+        .values(
+            remaining_quantity=v.c.remaining_quantity,
+            updated_on=sa.func.clock_timestamp(),
+        )
+        .where(t.c.id == v.c.id)
+    )
+    return remaining
+
+
+def compute_remaining(
+    items: Sequence[sa.Row[Any]], uses: Sequence[sa.Row[Any]]
+) -> Dict[int, Optional[float]]:
+    """Remaining quantity of `items` (id, quantity, unit and ingredient name, in id
+    order) after the `uses` (ingredient_id, quantity, unit) that point at them. Also
+    what the migration that backfills the column runs.
+    """
+    import numpy as np
+
+    item_ids = np.array([r.id for r in items], dtype=np.int64)
+    if uses:
+        pos = np.searchsorted(item_ids, [u.ingredient_id for u in uses])
+        to = [items[i].unit for i in pos]
+        converted = units.registry.convert(
+            [u.quantity for u in uses],
+            [u.unit or unit for u, unit in zip(uses, to)],
+            to,
+            ingredients=[items[i].name for i in pos],
+        )
+        used_total, skipped = units.sum_by(pos, converted, len(items))
+        if skipped.any():
+            logger.warning(
+                "usage left out of remaining_quantity, units can't be converted: %s",
+                {int(i): int(n) for i, n in zip(item_ids, skipped) if n},
+            )
+    else:
+        used_total = np.zeros(len(items), dtype=np.float64)
+
+    purchased = np.array([r.quantity for r in items], dtype=np.float64)
+    return {
+        int(i): (None if np.isnan(v) else float(v))
+        for i, v in zip(item_ids, purchased - used_total)
+    }
+
+
+async def referenced_inventory(
+    transaction: dal.TransactionManager, tablename: str, obj_ids: Iterable[int]
+) -> Set[int]:
+    """Inventory ids the given dish_ingredient or meal_ingredient rows point at. Read
+    these before an update that may move a row to another inventory item.
+    """
+    ids = list(obj_ids)
+    if not ids:
+        return set()
+    t = transaction.get_table(tablename)
+    res = await transaction.execute(sa.select(t.c.ingredient_id).where(t.c.id.in_(ids)))
+    return set(res.scalars())
+
+
 class IngredientInInventoryBaseForm(base.BaseFormModel):
     ingredient_id: int | None = None
     from_where: str | None = ""
@@ -130,6 +267,10 @@ class IngredientInInventoryUpdateForm(IngredientInInventoryBaseForm):
     ...
 
 
+class IngredientInInventoryBulkUpdateForm(IngredientInInventoryUpdateForm):
+    id: int
+
+
 class IngredientInInventoryResource(base.ParentResourceModel):
     id: int
     ingredient_id: int
@@ -140,23 +281,13 @@ class IngredientInInventoryResource(base.ParentResourceModel):
     unit: str | None = ""
     purchased_on: datetime.date | None = None
     finished_on: datetime.date | None = None
+    remaining_quantity: float | None = None
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "self": self._fastapi.url_path_for(
-                    "ingredient_in_inventory_detail_view", id=self.id
-                ),
-                "ingredient": self._fastapi.url_path_for(
-                    "ingredient_detail_view", id=self.ingredient_id
-                ),
-                "ingredient_meal": self._fastapi.url_path_for(
-                    "ingredient_meal_list_view", id=self.id
-                ),
-            }
-        return None
+    link_routes = {
+        "self": ("ingredient_in_inventory_detail_view", "id"),
+        "ingredient": ("ingredient_detail_view", "ingredient_id"),
+        "ingredient_meal": ("ingredient_meal_list_view", "id"),
+    }
 
     @classmethod
     async def create(
@@ -165,10 +296,26 @@ class IngredientInInventoryResource(base.ParentResourceModel):
         result = await base.create(
             transaction,
             tablename="ingredient_in_inventory",
-            form_data=form.model_dump(),
+            form_data={**form.model_dump(), "remaining_quantity": form.quantity},
         )
         return cls.model_validate(result)
 
+    @classmethod
+    async def create_many(
+        cls,
+        transaction: dal.TransactionManager,
+        forms: List[IngredientInInventoryCreateForm],
+    ) -> List["IngredientInInventoryResource"]:
+        results = await base.create_many(
+            transaction,
+            tablename="ingredient_in_inventory",
+            form_data=[
+                {**form.model_dump(), "remaining_quantity": form.quantity}
+                for form in forms
+            ],
+        )
+        return [cls.model_validate(r) for r in results]
+
     @classmethod
     async def update(
         cls,
@@ -176,13 +323,54 @@ class IngredientInInventoryResource(base.ParentResourceModel):
         obj_id: int,
         form: IngredientInInventoryUpdateForm,
     ) -> "IngredientInInventoryResource":
+        form_data = form.model_dump(exclude_unset=True)
         result = await base.update(
             transaction,
             tablename="ingredient_in_inventory",
             obj_id=obj_id,
-            form_data=form.model_dump(exclude_unset=True),
+            form_data=form_data,
+        )
+        if not form_data.keys() & LEDGER_FIELDS:
+            return cls.model_validate(result)
+
+        remaining = await refresh_remaining(transaction, [obj_id])
+        return cls.model_validate(
+            {**result._mapping, "remaining_quantity": remaining[obj_id]}
+        )
+
+
+class IngredientInInventoryBulkUpdateView(
+    base.BulkUpdateViewModel[IngredientInInventoryResource]
+):
+    results: List[IngredientInInventoryResource]
+
+    @classmethod
+    async def update(
+        cls,
+        transaction: dal.TransactionManager,
+        forms: List[IngredientInInventoryBulkUpdateForm],
+    ) -> "IngredientInInventoryBulkUpdateView":
+        form_data = [form.model_dump(exclude_unset=True) for form in forms]
+        results, missing_ids = await base.update_many(
+            transaction,
+            tablename="ingredient_in_inventory",
+            form_data=form_data,
+        )
+        remaining = await refresh_remaining(
+            transaction,
+            [data["id"] for data in form_data if data.keys() & LEDGER_FIELDS],
+        )
+        return cls.model_validate(
+            {
+                "results": [
+                    {**r._mapping, "remaining_quantity": remaining[r.id]}
+                    if r.id in remaining
+                    else r
+                    for r in results
+                ],
+                "missing_ids": missing_ids,
+            }
         )
-        return cls.model_validate(result)
 
 
 class IngredientInInventoryDetailResource(IngredientInInventoryResource):
@@ -208,6 +396,9 @@ class IngredientInInventoryDetailResource(IngredientInInventoryResource):
                 t.c.unit,
                 t.c.purchased_on,
                 t.c.finished_on,
+                t.c.remaining_quantity,
+                # the name comes from ingredient so a rename changes this resource too
+                sa.func.greatest(t.c.updated_on, ing.c.updated_on).label("updated_on"),
             )
             .select_from(t.join(ing, t.c.ingredient_id == ing.c.id))
             .where(t.c.id == obj_id)
@@ -233,9 +424,19 @@ class IngredientInInventoryListView(
         transaction: dal.TransactionManager,
         request_url: str,
         params: IngredientInInventoryQueryParams,
-    ) -> "IngredientInInventoryListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         ing = transaction.get_table("ingredient")
         t = transaction.get_table("ingredient_in_inventory")
+        order_by: Tuple[sa.ColumnElement[Any], ...] = (
+            ing.c.name,
+            t.c.purchased_on,
+            t.c.id,
+        )
+        if params.name__similar:
+            order_by = base.order_by_similarity(
+                ing.c.name, params.name__similar, *order_by, cursor=params.cursor
+            )
         stmt = (
             sa.select(
                 t.c.id,
@@ -248,22 +449,26 @@ class IngredientInInventoryListView(
                 t.c.unit,
                 t.c.purchased_on,
                 t.c.finished_on,
-                sa_total_count(t.c.id),
+                t.c.remaining_quantity,
             )
             .select_from(t.join(ing, t.c.ingredient_id == ing.c.id))
-            .order_by(ing.c.name, t.c.purchased_on)
-            .offset(params.offset)
-            .limit(params.limit)
+            .order_by(*order_by)
         )
 
         if params.name:
             stmt = stmt.where(ing.c.name == params.name)
         if params.name__contains:
-            stmt = stmt.where(ing.c.name.contains(params.name__contains))
+            stmt = stmt.where(base.icontains(ing.c.name, params.name__contains))
+        if params.name__similar:
+            stmt = stmt.where(base.similar(ing.c.name, params.name__similar))
         if params.from_where:
             stmt = stmt.where(t.c.from_where == params.from_where)
         if params.from_where__contains:
-            stmt = stmt.where(t.c.from_where.contains(params.from_where__contains))
+            stmt = stmt.where(
+                base.icontains(t.c.from_where, params.from_where__contains)
+            )
+        if params.brand__contains:
+            stmt = stmt.where(base.icontains(t.c.brand, params.brand__contains))
 
         if params.purchased_on:
             stmt = stmt.where(t.c.purchased_on == params.purchased_on)
@@ -279,13 +484,23 @@ class IngredientInInventoryListView(
         if params.finished_on__ge:
             stmt = stmt.where(t.c.finished_on >= params.finished_on__ge)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        if params.remaining__gt is not None:
+            stmt = stmt.where(t.c.remaining_quantity > params.remaining__gt)
+
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(t.c.updated_on, ing.c.updated_on),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Request, Response
 
 # from ..auth import auth0
 from ..deps import get_transaction
 from . import ingredient as model, ingredient_in_inventory as inventory_model
+from .. import base
+from .. import conditional
 from aiodal import dal
 from typing import List, Any
 
@@ -12,29 +14,36 @@ deps: List[Any] = [
 router = APIRouter(prefix="/ingredient", tags=["ingredient"], dependencies=deps)
 
 
-@router.get("/")
+@router.get("/", response_model=model.IngredientListView)
 async def ingredient_list_view(
     request: Request,
     params: model.IngredientQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> model.IngredientListView:
+) -> Response:
     """Return a list of ingredients"""
 
     return await model.IngredientListView.get(
-        transaction=transaction, request_url=str(request.url), params=params
+        transaction=transaction,
+        request_url=str(request.url),
+        params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
 @router.get("/{id}")
 async def ingredient_detail_view(
     id: int,
+    request: Request,
+    response: Response,
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
 ) -> model.IngredientResource:
     """Return an ingredient detail."""
 
-    return await model.IngredientResource.detail(transaction=transaction, obj_id=id)
+    obj = await model.IngredientResource.detail(transaction=transaction, obj_id=id)
+    conditional.check(request, response, obj.etag(), obj.updated_on)
+    return obj
 
 
 @router.post("/", status_code=201)
@@ -60,30 +69,37 @@ async def ingredient_update_view(
     return await model.IngredientResource.update(transaction, obj_id=id, form=form)
 
 
-@router.get("/inventory/")
+@router.get("/inventory/", response_model=inventory_model.IngredientInInventoryListView)
 async def ingredient_in_inventory_list_view(
     request: Request,
     params: inventory_model.IngredientInInventoryQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> inventory_model.IngredientInInventoryListView:
+) -> Response:
     """Return a list of ingredients in inventory"""
 
     return await inventory_model.IngredientInInventoryListView.get(
-        transaction=transaction, request_url=str(request.url), params=params
+        transaction=transaction,
+        request_url=str(request.url),
+        params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
 @router.get("/inventory/{id}")
 async def ingredient_in_inventory_detail_view(
     id: int,
+    request: Request,
+    response: Response,
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
 ) -> inventory_model.IngredientInInventoryDetailResource:
     """Return an ingredient in inventory detail."""
-    return await inventory_model.IngredientInInventoryDetailResource.detail(
+    obj = await inventory_model.IngredientInInventoryDetailResource.detail(
         transaction, obj_id=id
     )
+    conditional.check(request, response, obj.etag(), obj.updated_on)
+    return obj
 
 
 @router.post("/inventory", status_code=201)
@@ -99,6 +115,21 @@ async def ingredient_in_inventory_create_view(
     )
 
 
+@router.post("/inventory/bulk", status_code=201)
+async def ingredient_in_inventory_bulk_create_view(
+    forms: List[inventory_model.IngredientInInventoryCreateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> List[inventory_model.IngredientInInventoryResource]:
+    """Return many ingredients in inventory created in one statement."""
+
+    return await inventory_model.IngredientInInventoryResource.create_many(
+        transaction, forms=forms
+    )
+
+
 @router.put("/inventory/{id}")
 async def ingredient_in_inventory_update_view(
     id: int,
@@ -111,3 +142,18 @@ async def ingredient_in_inventory_update_view(
     return await inventory_model.IngredientInInventoryResource.update(
         transaction, obj_id=id, form=form
     )
+
+
+@router.patch("/inventory/bulk")
+async def ingredient_in_inventory_bulk_update_view(
+    forms: List[inventory_model.IngredientInInventoryBulkUpdateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> inventory_model.IngredientInInventoryBulkUpdateView:
+    """Return many ingredients in inventory updated at once."""
+
+    return await inventory_model.IngredientInInventoryBulkUpdateView.update(
+        transaction, forms=forms
+    )
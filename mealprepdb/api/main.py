@@ -4,11 +4,14 @@ from .. import config
 import orjson
 from .base import orjson_serializer, HyperModel
 from .deps import db
+from . import pool
+from . import telemetry
+from . import slow_query
+from . import snapshot
 
 # from .auth import auth0
 
 from sqlalchemy.ext.asyncio import create_async_engine
-import sqlalchemy as sa
 
 from aiodal.oqm.views import AiodalHTTPException
 
@@ -20,6 +23,7 @@ from fastapi.utils import is_body_allowed_for_status_code
 from fastapi.encoders import jsonable_encoder
 
 import sys
+import asyncio
 
 
 description = """ 
@@ -51,9 +55,7 @@ app.add_middleware(
     ],
     max_age=60 * 30,
 )
-
-# initiate HATEOAS helper model
-HyperModel.init_app(app)
+app.add_middleware(telemetry.TelemetryMiddleware)
 
 
 @app.exception_handler(AiodalHTTPException)
@@ -97,14 +99,27 @@ async def unhandled_exception_error(req: Request, exc: Exception) -> ORJSONRespo
 async def startup() -> None:  # configure and load postgres
     engine = create_async_engine(
         config.POSTGRES_URI,
-        max_overflow=int(config.MAX_OVERFLOW),
-        pool_size=int(config.POOL_SIZE),
+        **pool.engine_kwargs(),
         json_serializer=orjson_serializer,
         json_deserializer=orjson.loads,
     )
-    metadata = sa.MetaData()
+    telemetry.instrument(engine)
+    slow_query.log.instrument(engine)
     # auth0.initialize_jwks()
-    await db.reflect(engine, metadata)  # reflect the tables and initialize a session
+    # the tables come from the metadata snapshot when it matches the database's alembic
+    # revision, otherwise they are reflected
+    source = await snapshot.reflect(db, engine)
+    logger.info(f"schema loaded from {source}")
+
+    # keep a reference; the event loop only holds a weak one to tasks
+    app.state.analytics_refresh_task = asyncio.create_task(analytics_refresher.run(db))
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    task = getattr(app.state, "analytics_refresh_task", None)
+    if task is not None:
+        task.cancel()
 
 
 router = APIRouter(prefix="")
@@ -118,10 +133,26 @@ async def health() -> dict[str, str]:
 from .ingredient.route import router as ingredient_router
 from .dish.route import router as dish_router
 from .meal.route import router as meal_router
+from .export.route import router as export_router
+from .search.route import router as search_router
+from .analytics.route import router as analytics_router
+from .analytics.refresh import refresher as analytics_refresher
+from .metrics import router as metrics_router
+from .debug import router as debug_router
 
 
 app.include_router(ingredient_router)
 app.include_router(dish_router)
 app.include_router(meal_router)
+app.include_router(export_router)
+app.include_router(search_router)
+app.include_router(analytics_router)
+app.include_router(metrics_router)
+if config.ENVIRONMENT != "production":
+    app.include_router(debug_router)
 
 app.include_router(router)
+
+# initiate HATEOAS helper model. NOTE this must come after all routers are included
+# so that every named route gets compiled into a link template.
+HyperModel.init_app(app)
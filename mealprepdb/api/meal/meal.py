@@ -1,10 +1,9 @@
 from typing import Dict, Optional, Any, List
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query, HTTPException
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
 
@@ -18,6 +17,8 @@ class MealQueryParams(base.BaseListViewQueryParamsModel):
         consumed_on__ge: datetime.date = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.type = type
         self.consumed_on = consumed_on
@@ -25,6 +26,8 @@ class MealQueryParams(base.BaseListViewQueryParamsModel):
         self.consumed_on__le = consumed_on__le
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 class MealBaseForm(base.BaseFormModel):
@@ -48,14 +51,9 @@ class MealResource(base.ParentResourceModel):
     description: str = ""
     consumed_on: datetime.date
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "self": self._fastapi.url_path_for("meal_detail_view", id=self.id),
-            }
-        return None
+    link_routes = {
+        "self": ("meal_detail_view", "id"),
+    }
 
     @classmethod
     async def detail(
@@ -65,7 +63,9 @@ class MealResource(base.ParentResourceModel):
     ) -> "MealResource":
         t = transaction.get_table("meal")
         stmt = (
-            sa.select(t.c.id, t.c.type, t.c.description, t.c.consumed_on)
+            sa.select(
+                t.c.id, t.c.type, t.c.description, t.c.consumed_on, t.c.updated_on
+            )
             .order_by(t.c.id)
             .where(t.c.id == obj_id)
         )
@@ -107,20 +107,16 @@ class MealListView(base.ListViewModel[MealResource]):
         transaction: dal.TransactionManager,
         request_url: str,
         params: MealQueryParams,
-    ) -> "MealListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         t = transaction.get_table("meal")
-        stmt = (
-            sa.select(
-                t.c.id,
-                t.c.type,
-                t.c.description,
-                t.c.consumed_on,
-                sa_total_count(t.c.id),
-            )
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
-        )
+        order_by = (t.c.id,)
+        stmt = sa.select(
+            t.c.id,
+            t.c.type,
+            t.c.description,
+            t.c.consumed_on,
+        ).order_by(*order_by)
 
         if params.type:
             stmt = stmt.where(t.c.type == params.type)
@@ -131,13 +127,20 @@ class MealListView(base.ListViewModel[MealResource]):
         if params.consumed_on__ge:
             stmt = stmt.where(t.c.consumed_on >= params.consumed_on__ge)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(t.c.updated_on,),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
@@ -0,0 +1,115 @@
+from typing import Any, List
+from .. import base
+from aiodal import dal
+import pydantic
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from fastapi import Query, HTTPException
+import datetime
+
+# a year view, leap years included
+MAX_CALENDAR_DAYS = 366
+
+
+class MealCalendarQueryParams:
+    def __init__(
+        self,
+        from_: datetime.date = Query(..., alias="from"),
+        to: datetime.date = Query(...),
+        type: base.MealTypeEnum = Query(None),
+    ):
+        if to < from_:
+            raise HTTPException(status_code=422, detail="`to` is before `from`.")
+        if (to - from_).days >= MAX_CALENDAR_DAYS:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Range is longer than {MAX_CALENDAR_DAYS} days.",
+            )
+        self.from_ = from_
+        self.to = to
+        self.type = type
+
+
+class MealCalendarMeal(pydantic.BaseModel):
+    id: int
+    type: base.MealTypeEnum | None = None
+    description: str = ""
+    dish_count: int
+    ingredient_count: int
+
+
+class MealCalendarDay(pydantic.BaseModel):
+    day: datetime.date
+    meal_count: int
+    dish_count: int
+    ingredient_count: int
+    meals: List[MealCalendarMeal]
+
+
+class MealCalendarView(pydantic.BaseModel):
+    results: List[MealCalendarDay]
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    @classmethod
+    async def get(
+        cls, transaction: dal.TransactionManager, params: MealCalendarQueryParams
+    ) -> "MealCalendarView":
+        """Meals between `from` and `to` (inclusive) grouped per day, in one query.
+
+        The range is an index scan on `idx__meal__consumed_on`, the per meal counts
+        are index lookups on meal_dish / meal_ingredient by meal_id and the days are
+        built with GROUP BY and json_agg. Days without meals are left out.
+        """
+        t = transaction.get_table("meal")
+        meal_dish = transaction.get_table("meal_dish")
+        meal_ingredient = transaction.get_table("meal_ingredient")
+
+        def _count(child: sa.Table) -> sa.ScalarSelect[Any]:
+            return (
+                sa.select(sa.func.count())
+                .select_from(child)
+                .where(child.c.meal_id == t.c.id)
+                .scalar_subquery()
+            )
+
+        meals = sa.select(
+            t.c.id,
+            t.c.type,
+            t.c.description,
+            t.c.consumed_on,
+            _count(meal_dish).label("dish_count"),
+            _count(meal_ingredient).label("ingredient_count"),
+        ).where(t.c.consumed_on.between(params.from_, params.to))
+        if params.type:
+            meals = meals.where(t.c.type == params.type)
+        m = meals.subquery()
+
+        row = sa.func.json_build_object(
+            "id",
+            m.c.id,
+            "type",
+            m.c.type,
+            "description",
+            m.c.description,
+            "dish_count",
+            m.c.dish_count,
+            "ingredient_count",
+            m.c.ingredient_count,
+        )
+        stmt = (
+            sa.select(
+                m.c.consumed_on.label("day"),
+                sa.func.count().label("meal_count"),
+                sa.func.sum(m.c.dish_count).label("dish_count"),
+                sa.func.sum(m.c.ingredient_count).label("ingredient_count"),
+                sa.func.json_agg(
+                    postgresql.aggregate_order_by(row, m.c.id),
+                    type_=postgresql.JSON,
+                ).label("meals"),
+            )
+            .group_by(m.c.consumed_on)
+            .order_by(m.c.consumed_on)
+        )
+        res = await transaction.execute(stmt)
+        return cls.model_validate({"results": res.all()})
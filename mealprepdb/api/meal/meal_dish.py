@@ -1,10 +1,9 @@
 from typing import Dict, Optional, List
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
 
@@ -19,6 +18,8 @@ class MealDishQueryParams(base.BaseListViewQueryParamsModel):
         consumed_on__ge: datetime.date = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.dish_name = dish_name
         self.dish_name__contains = dish_name__contains
@@ -27,6 +28,8 @@ class MealDishQueryParams(base.BaseListViewQueryParamsModel):
         self.consumed_on__le = consumed_on__le
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 class MealDishBaseForm(base.BaseFormModel):
@@ -47,20 +50,19 @@ class MealDishUpdateForm(MealDishBaseForm):
     ...
 
 
+class MealDishBulkUpdateForm(MealDishUpdateForm):
+    id: int
+
+
 class MealDishResource(base.ParentResourceModel):
     id: int
     meal_id: int
     dish_id: int
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "dish": self._fastapi.url_path_for("dish_detail_view", id=self.dish_id),
-                "meal": self._fastapi.url_path_for("meal_detail_view", id=self.meal_id),
-            }
-        return None
+    link_routes = {
+        "dish": ("dish_detail_view", "dish_id"),
+        "meal": ("meal_detail_view", "meal_id"),
+    }
 
     @classmethod
     async def create(
@@ -71,6 +73,17 @@ class MealDishResource(base.ParentResourceModel):
         )
         return cls.model_validate(result)
 
+    @classmethod
+    async def create_many(
+        cls, transaction: dal.TransactionManager, forms: List[MealDishCreateForm]
+    ) -> List["MealDishResource"]:
+        results = await base.create_many(
+            transaction,
+            tablename="meal_dish",
+            form_data=[form.model_dump() for form in forms],
+        )
+        return [cls.model_validate(r) for r in results]
+
     @classmethod
     async def update(
         cls, transaction: dal.TransactionManager, obj_id: int, form: MealDishUpdateForm
@@ -84,6 +97,23 @@ class MealDishResource(base.ParentResourceModel):
         return cls.model_validate(result)
 
 
+class MealDishBulkUpdateView(base.BulkUpdateViewModel[MealDishResource]):
+    results: List[MealDishResource]
+
+    @classmethod
+    async def update(
+        cls,
+        transaction: dal.TransactionManager,
+        forms: List[MealDishBulkUpdateForm],
+    ) -> "MealDishBulkUpdateView":
+        results, missing_ids = await base.update_many(
+            transaction,
+            tablename="meal_dish",
+            form_data=[form.model_dump(exclude_unset=True) for form in forms],
+        )
+        return cls.model_validate({"results": results, "missing_ids": missing_ids})
+
+
 class MealDishDetailResource(MealDishResource):
     meal_type: str
     dish_name: str
@@ -103,10 +133,12 @@ class MealDishListView(base.ListViewModel[MealDishDetailResource]):
         dish_id: int,
         request_url: str,
         params: MealDishQueryParams,
-    ) -> "MealDishListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         meal = transaction.get_table("meal")
         dish = transaction.get_table("dish")
         t = transaction.get_table("meal_dish")
+        order_by = (t.c.id,)
         stmt = (
             sa.select(
                 t.c.id,
@@ -118,7 +150,6 @@ class MealDishListView(base.ListViewModel[MealDishDetailResource]):
                 t.c.unit,
                 meal.c.consumed_on,
                 dish.c.created_on.label("dish_created_on"),
-                sa_total_count(t.c.id),
             )
             .select_from(
                 t.join(dish, t.c.dish_id == dish.c.id).join(
@@ -126,14 +157,12 @@ class MealDishListView(base.ListViewModel[MealDishDetailResource]):
                 )
             )
             .where(t.c.dish_id == dish_id)
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
+            .order_by(*order_by)
         )
         if params.dish_name:
             stmt = stmt.where(dish.c.name == params.dish_name)
         if params.dish_name__contains:
-            stmt = stmt.where(dish.c.name.contains(params.dish_name__contains))
+            stmt = stmt.where(base.icontains(dish.c.name, params.dish_name__contains))
         if params.consumed_on:
             stmt = stmt.where(t.c.consumed_on == params.consumed_on)
         if params.consumed_on__le:
@@ -141,13 +170,20 @@ class MealDishListView(base.ListViewModel[MealDishDetailResource]):
         if params.consumed_on__ge:
             stmt = stmt.where(t.c.consumed_on >= params.consumed_on__ge)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(t.c.updated_on, dish.c.updated_on, meal.c.updated_on),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
@@ -0,0 +1,163 @@
+from typing import Any, List, Tuple
+from .. import base
+from aiodal import dal
+import pydantic
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from fastapi import HTTPException
+import datetime
+
+
+class MealFullDish(pydantic.BaseModel):
+    id: int
+    dish_id: int
+    dish_name: str
+    quantity: float | None = None
+    unit: str | None = None
+
+
+class MealFullIngredient(pydantic.BaseModel):
+    id: int
+    ingredient_id: int
+    ingredient_name: str
+    quantity: float | None = None
+    unit: str | None = None
+
+
+class MealFullResource(base.ParentResourceModel):
+    id: int
+    type: base.MealTypeEnum | None = None
+    description: str = ""
+    consumed_on: datetime.date
+    dishes: List[MealFullDish]
+    ingredients: List[MealFullIngredient]
+
+    link_routes = {
+        "self": ("meal_detail_view", "id"),
+    }
+
+    @classmethod
+    async def detail(
+        cls,
+        transaction: dal.TransactionManager,
+        obj_id: int,
+    ) -> "MealFullResource":
+        """The meal with its meal_dish and meal_ingredient rows nested in, built with
+        correlated json_agg subqueries so it is one round trip however many rows the
+        meal has.
+
+        updated_on is the latest change to the meal, its rows or the dishes and
+        ingredients they name, so the etag moves when any of them does.
+        """
+        t = transaction.get_table("meal")
+        dishes, dishes_updated_on = _dishes_stmt(transaction, t.c.id)
+        ingredients, ingredients_updated_on = _ingredients_stmt(transaction, t.c.id)
+        stmt = sa.select(
+            t.c.id,
+            t.c.type,
+            t.c.description,
+            t.c.consumed_on,
+            dishes.label("dishes"),
+            ingredients.label("ingredients"),
+            sa.func.greatest(
+                t.c.updated_on, dishes_updated_on, ingredients_updated_on
+            ).label("updated_on"),
+        ).where(t.c.id == obj_id)
+        res = await transaction.execute(stmt)
+        result = res.one_or_none()
+        if not result:
+            raise HTTPException(status_code=404, detail="Not Found.")
+
+        return cls.model_validate(result)
+
+
+def _json_agg(
+    row: sa.ColumnElement[Any], order_by: sa.ColumnElement[Any]
+) -> sa.ColumnElement[Any]:
+    # an empty list rather than null when the meal has no rows
+    return sa.func.coalesce(
+        sa.func.json_agg(postgresql.aggregate_order_by(row, order_by)),
+        sa.literal_column("'[]'::json"),
+        type_=postgresql.JSON,
+    )
+
+
+def _dishes_stmt(
+    transaction: dal.TransactionManager, meal_id: sa.ColumnElement[Any]
+) -> Tuple[sa.ScalarSelect[Any], sa.ScalarSelect[Any]]:
+    """json_agg of the meal_dish rows of `meal_id` and when they last changed, both
+    correlated to the outer query.
+    """
+    t = transaction.get_table("meal_dish")
+    dish = transaction.get_table("dish")
+    row = sa.func.json_build_object(
+        "id",
+        t.c.id,
+        "dish_id",
+        t.c.dish_id,
+        "dish_name",
+        dish.c.name,
+        "quantity",
+        t.c.quantity,
+        "unit",
+        t.c.unit,
+    )
+    rows = (
+        sa.select(t)
+        .select_from(t.join(dish, t.c.dish_id == dish.c.id))
+        .where(t.c.meal_id == meal_id)
+    )
+    return (
+        rows.with_only_columns(_json_agg(row, t.c.id)).scalar_subquery(),
+        rows.with_only_columns(
+            sa.func.max(sa.func.greatest(t.c.updated_on, dish.c.updated_on))
+        ).scalar_subquery(),
+    )
+
+
+def _ingredients_stmt(
+    transaction: dal.TransactionManager, meal_id: sa.ColumnElement[Any]
+) -> Tuple[sa.ScalarSelect[Any], sa.ScalarSelect[Any]]:
+    """json_agg of the meal_ingredient rows of `meal_id` and when they last changed,
+    both correlated to the outer query.
+    """
+    t = transaction.get_table("meal_ingredient")
+    ingredient = transaction.get_table("ingredient")
+    ingredient_in_inventory = transaction.get_table("ingredient_in_inventory")
+    row = sa.func.json_build_object(
+        "id",
+        t.c.id,
+        "ingredient_id",
+        t.c.ingredient_id,
+        "ingredient_name",
+        ingredient.c.name,
+        "quantity",
+        t.c.quantity,
+        "unit",
+        t.c.unit,
+    )
+    rows = (
+        sa.select(t)
+        .select_from(
+            t.join(
+                ingredient_in_inventory,
+                t.c.ingredient_id == ingredient_in_inventory.c.id,
+            ).join(
+                ingredient,
+                ingredient.c.id == ingredient_in_inventory.c.ingredient_id,
+            )
+        )
+        .where(t.c.meal_id == meal_id)
+    )
+    return (
+        rows.with_only_columns(_json_agg(row, t.c.id)).scalar_subquery(),
+        rows.with_only_columns(
+            sa.func.max(
+                sa.func.greatest(
+                    t.c.updated_on,
+                    ingredient_in_inventory.c.updated_on,
+                    ingredient.c.updated_on,
+                )
+            )
+        ).scalar_subquery(),
+    )
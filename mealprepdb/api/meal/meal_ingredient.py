@@ -1,12 +1,16 @@
 from typing import Dict, Optional, List
 from .. import base
 from aiodal import dal
-from aiodal.helpers import sa_total_count
 import sqlalchemy as sa
 from fastapi import Query
-import pydantic
+from fastapi.responses import ORJSONResponse
 import datetime
 from .. import paginator
+from ..ingredient.ingredient_in_inventory import (
+    LEDGER_FIELDS,
+    refresh_remaining,
+    referenced_inventory,
+)
 
 
 class MealIngredientQueryParams(base.BaseListViewQueryParamsModel):
@@ -19,6 +23,8 @@ class MealIngredientQueryParams(base.BaseListViewQueryParamsModel):
         consumed_on__ge: datetime.date = Query(None),
         offset: int = Query(0, ge=0),
         limit: int = Query(1000, ge=0, le=2000),
+        cursor: str = Query(None),
+        count: base.CountModeEnum = Query(base.CountModeEnum.exact),
     ):
         self.ingredient_name = ingredient_name
         self.ingredient_name__contains = ingredient_name__contains
@@ -27,6 +33,8 @@ class MealIngredientQueryParams(base.BaseListViewQueryParamsModel):
         self.consumed_on__le = consumed_on__le
         self.offset = offset
         self.limit = limit
+        self.cursor = cursor
+        self.count = count
 
 
 class MealIngredientBaseForm(base.BaseFormModel):
@@ -47,6 +55,10 @@ class MealIngredientUpdateForm(MealIngredientBaseForm):
     ...
 
 
+class MealIngredientBulkUpdateForm(MealIngredientUpdateForm):
+    id: int
+
+
 class MealIngredientResource(base.ParentResourceModel):
     id: int
     meal_id: int
@@ -54,17 +66,10 @@ class MealIngredientResource(base.ParentResourceModel):
     quantity: float
     unit: str
 
-    @pydantic.computed_field  # type: ignore[misc]
-    @property
-    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
-        if self._fastapi:
-            return {
-                "ingredient": self._fastapi.url_path_for(
-                    "ingredient_detail_view", id=self.ingredient_id
-                ),
-                "meal": self._fastapi.url_path_for("meal_detail_view", id=self.meal_id),
-            }
-        return None
+    link_routes = {
+        "ingredient": ("ingredient_detail_view", "ingredient_id"),
+        "meal": ("meal_detail_view", "meal_id"),
+    }
 
     @classmethod
     async def create(
@@ -73,8 +78,21 @@ class MealIngredientResource(base.ParentResourceModel):
         result = await base.create(
             transaction, tablename="meal_ingredient", form_data=form.model_dump()
         )
+        await refresh_remaining(transaction, [result.ingredient_id])
         return cls.model_validate(result)
 
+    @classmethod
+    async def create_many(
+        cls, transaction: dal.TransactionManager, forms: List[MealIngredientCreateForm]
+    ) -> List["MealIngredientResource"]:
+        results = await base.create_many(
+            transaction,
+            tablename="meal_ingredient",
+            form_data=[form.model_dump() for form in forms],
+        )
+        await refresh_remaining(transaction, [r.ingredient_id for r in results])
+        return [cls.model_validate(r) for r in results]
+
     @classmethod
     async def update(
         cls,
@@ -82,15 +100,49 @@ class MealIngredientResource(base.ParentResourceModel):
         obj_id: int,
         form: MealIngredientUpdateForm,
     ) -> "MealIngredientResource":
+        form_data = form.model_dump(exclude_unset=True)
+        # moving to another inventory item gives quantity back to the old one
+        before = (
+            await referenced_inventory(transaction, "meal_ingredient", [obj_id])
+            if "ingredient_id" in form_data
+            else set()
+        )
         result = await base.update(
             transaction,
             tablename="meal_ingredient",
             obj_id=obj_id,
-            form_data=form.model_dump(exclude_unset=True),
+            form_data=form_data,
         )
+        if form_data.keys() & LEDGER_FIELDS:
+            await refresh_remaining(transaction, before | {result.ingredient_id})
         return cls.model_validate(result)
 
 
+class MealIngredientBulkUpdateView(base.BulkUpdateViewModel[MealIngredientResource]):
+    results: List[MealIngredientResource]
+
+    @classmethod
+    async def update(
+        cls,
+        transaction: dal.TransactionManager,
+        forms: List[MealIngredientBulkUpdateForm],
+    ) -> "MealIngredientBulkUpdateView":
+        form_data = [form.model_dump(exclude_unset=True) for form in forms]
+        before = await referenced_inventory(
+            transaction,
+            "meal_ingredient",
+            [data["id"] for data in form_data if "ingredient_id" in data],
+        )
+        results, missing_ids = await base.update_many(
+            transaction, tablename="meal_ingredient", form_data=form_data
+        )
+        moved = {data["id"] for data in form_data if data.keys() & LEDGER_FIELDS}
+        await refresh_remaining(
+            transaction, before | {r.ingredient_id for r in results if r.id in moved}
+        )
+        return cls.model_validate({"results": results, "missing_ids": missing_ids})
+
+
 class MealIngredientDetailResource(MealIngredientResource):
     meal_type: str
     ingredient_name: str
@@ -107,12 +159,14 @@ class MealIngredientListView(base.ListViewModel[MealIngredientDetailResource]):
         ingredient_id: int,
         request_url: str,
         params: MealIngredientQueryParams,
-    ) -> "MealIngredientListView":
+        if_none_match: Optional[str] = None,
+    ) -> ORJSONResponse:
         meal = transaction.get_table("meal")
         ingredient = transaction.get_table("ingredient")
         ingredient_in_inventory = transaction.get_table("ingredient_in_inventory")
         t = transaction.get_table("meal_ingredient")
 
+        order_by = (t.c.id,)
         stmt = (
             sa.select(
                 t.c.id,
@@ -123,7 +177,6 @@ class MealIngredientListView(base.ListViewModel[MealIngredientDetailResource]):
                 t.c.quantity,
                 t.c.unit,
                 meal.c.consumed_on,
-                sa_total_count(t.c.id),
             )
             .select_from(
                 t.join(
@@ -134,16 +187,14 @@ class MealIngredientListView(base.ListViewModel[MealIngredientDetailResource]):
                 .join(meal, t.c.meal_id == meal.c.id)
             )
             .where(t.c.ingredient_id == ingredient_id)
-            .order_by(t.c.id)
-            .offset(params.offset)
-            .limit(params.limit)
+            .order_by(*order_by)
         )
 
         if params.ingredient_name:
             stmt = stmt.where(ingredient.c.name == params.ingredient_name)
         if params.ingredient_name__contains:
             stmt = stmt.where(
-                ingredient.c.name.contains(params.ingredient_name__contains)
+                base.icontains(ingredient.c.name, params.ingredient_name__contains)
             )
         if params.consumed_on:
             stmt = stmt.where(meal.c.consumed_on == params.consumed_on)
@@ -152,13 +203,25 @@ class MealIngredientListView(base.ListViewModel[MealIngredientDetailResource]):
         if params.consumed_on__ge:
             stmt = stmt.where(meal.c.consumed_on >= params.consumed_on__ge)
 
-        res = await transaction.execute(stmt)
-        results = [dict(r) for r in res.mappings()]
-        page = paginator.get(results, request_url, params.offset, params.limit)
-        return cls.model_validate(
-            {
-                "total_count": page.total_count,
-                "next_url": page.next_url,
-                "results": results,
-            }
+        results, page = await paginator.fetch(
+            transaction,
+            stmt,
+            request_url,
+            params,
+            order_by,
+            count_on=t.c.id,
+            updated_on=(
+                t.c.updated_on,
+                meal.c.updated_on,
+                ingredient.c.updated_on,
+                ingredient_in_inventory.c.updated_on,
+            ),
+            if_none_match=if_none_match,
+        )
+        return cls.render(
+            results,
+            next_url=page.next_url,
+            total_count=page.total_count,
+            total_count_approximate=page.approximate,
+            etag=page.etag,
         )
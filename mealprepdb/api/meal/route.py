@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Body, Depends, Request, Response
 
 # from ..auth import auth0
 from ..deps import get_transaction
@@ -6,7 +6,11 @@ from . import (
     meal as model,
     meal_ingredient as meal_ing_model,
     meal_dish as meal_dish_model,
+    meal_full as full_model,
+    meal_calendar as calendar_model,
 )
+from .. import base
+from .. import conditional
 from aiodal import dal
 from typing import List, Any
 
@@ -23,29 +27,63 @@ ingredient_router = APIRouter(
 )
 
 
-@meal_router.get("/")
+@meal_router.get("/", response_model=model.MealListView)
 async def meal_list_view(
     request: Request,
     params: model.MealQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> model.MealListView:
+) -> Response:
     """Return a list of meals"""
 
     return await model.MealListView.get(
-        transaction=transaction, request_url=str(request.url), params=params
+        transaction=transaction,
+        request_url=str(request.url),
+        params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
+# NOTE registered before /{id} so "calendar" is not taken for an id
+@meal_router.get("/calendar")
+async def meal_calendar_view(
+    params: calendar_model.MealCalendarQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> calendar_model.MealCalendarView:
+    """Return meals grouped per day over a date range."""
+
+    return await calendar_model.MealCalendarView.get(transaction, params=params)
+
+
 @meal_router.get("/{id}")
 async def meal_detail_view(
     id: int,
+    request: Request,
+    response: Response,
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
 ) -> model.MealResource:
     """Return an meal detail."""
 
-    return await model.MealResource.detail(transaction, obj_id=id)
+    obj = await model.MealResource.detail(transaction, obj_id=id)
+    conditional.check(request, response, obj.etag(), obj.updated_on)
+    return obj
+
+
+@meal_router.get("/{id}/full")
+async def meal_full_view(
+    id: int,
+    request: Request,
+    response: Response,
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> full_model.MealFullResource:
+    """Return a meal with its dishes and ingredients."""
+
+    obj = await full_model.MealFullResource.detail(transaction, obj_id=id)
+    conditional.check(request, response, obj.etag(), obj.updated_on)
+    return obj
 
 
 @meal_router.post("/", status_code=201)
@@ -71,14 +109,16 @@ async def meal_update_view(
     return await model.MealResource.update(transaction, obj_id=id, form=form)
 
 
-@ingredient_router.get("/{id}/meal/")
+@ingredient_router.get(
+    "/{id}/meal/", response_model=meal_ing_model.MealIngredientListView
+)
 async def ingredient_meal_list_view(
     id: int,
     request: Request,
     params: meal_ing_model.MealIngredientQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> meal_ing_model.MealIngredientListView:
+) -> Response:
     """Return a list of meal for an ingredient in inventory."""
 
     return await meal_ing_model.MealIngredientListView.from_ingredient(
@@ -86,6 +126,7 @@ async def ingredient_meal_list_view(
         ingredient_id=id,
         request_url=str(request.url),
         params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
@@ -100,6 +141,21 @@ async def meal_ingredient_create_view(
     return await meal_ing_model.MealIngredientResource.create(transaction, form=form)
 
 
+@router.post("/meal_ingredient/bulk", status_code=201, tags=["meal_ingredient"])
+async def meal_ingredient_bulk_create_view(
+    forms: List[meal_ing_model.MealIngredientCreateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> List[meal_ing_model.MealIngredientResource]:
+    """Return many meal ingredients created in one statement."""
+
+    return await meal_ing_model.MealIngredientResource.create_many(
+        transaction, forms=forms
+    )
+
+
 @router.put("/meal_ingredient/{id}", tags=["meal_ingredient"])
 async def meal_ingredient_update_view(
     id: int,
@@ -114,14 +170,29 @@ async def meal_ingredient_update_view(
     )
 
 
-@dish_router.get("/{id}/meal/")
+@router.patch("/meal_ingredient/bulk", tags=["meal_ingredient"])
+async def meal_ingredient_bulk_update_view(
+    forms: List[meal_ing_model.MealIngredientBulkUpdateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> meal_ing_model.MealIngredientBulkUpdateView:
+    """Return many meal ingredients updated at once."""
+
+    return await meal_ing_model.MealIngredientBulkUpdateView.update(
+        transaction, forms=forms
+    )
+
+
+@dish_router.get("/{id}/meal/", response_model=meal_dish_model.MealDishListView)
 async def dish_meal_list_view(
     id: int,
     request: Request,
     params: meal_dish_model.MealDishQueryParams = Depends(),
     transaction: dal.TransactionManager = Depends(get_transaction),
     # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
-) -> meal_dish_model.MealDishListView:
+) -> Response:
     """Return a list of meals consumed for a dish."""
 
     return await meal_dish_model.MealDishListView.from_dish(
@@ -129,6 +200,7 @@ async def dish_meal_list_view(
         dish_id=id,
         request_url=str(request.url),
         params=params,
+        if_none_match=request.headers.get("if-none-match"),
     )
 
 
@@ -143,6 +215,19 @@ async def meal_dish_create_view(
     return await meal_dish_model.MealDishResource.create(transaction, form=form)
 
 
+@router.post("/meal_dish/bulk", status_code=201, tags=["meal_dish"])
+async def meal_dish_bulk_create_view(
+    forms: List[meal_dish_model.MealDishCreateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> List[meal_dish_model.MealDishResource]:
+    """Return many meal dishes created in one statement."""
+
+    return await meal_dish_model.MealDishResource.create_many(transaction, forms=forms)
+
+
 @router.put("/meal_dish/{id}", tags=["meal_dish"])
 async def meal_dish_update_view(
     id: int,
@@ -157,6 +242,19 @@ async def meal_dish_update_view(
     )
 
 
+@router.patch("/meal_dish/bulk", tags=["meal_dish"])
+async def meal_dish_bulk_update_view(
+    forms: List[meal_dish_model.MealDishBulkUpdateForm] = Body(
+        ..., max_length=base.MAX_BULK_SIZE
+    ),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> meal_dish_model.MealDishBulkUpdateView:
+    """Return many meal dishes updated at once."""
+
+    return await meal_dish_model.MealDishBulkUpdateView.update(transaction, forms=forms)
+
+
 router.include_router(meal_router)
 router.include_router(dish_router)
 router.include_router(ingredient_router)
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from . import cache
+from . import pool
+from . import telemetry
+from .deps import get_engine
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+async def prometheus_metrics_view() -> PlainTextResponse:
+    """request, query and serialization metrics in prometheus text format"""
+    return PlainTextResponse(
+        telemetry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@router.get("/cache/")
+async def cache_metrics_view() -> Dict[str, Dict[str, Any]]:
+    """hit/miss/eviction counters for each in-process cache"""
+    return cache.info()
+
+
+@router.get("/pool/")
+async def pool_metrics_view(
+    engine: AsyncEngine = Depends(get_engine),
+) -> Dict[str, Dict[str, Any]]:
+    """connection pool state, checkout wait times and connection budget"""
+    return pool.info(engine)
@@ -1,37 +1,213 @@
 from aiodal.oqm.views import _default_paginator, PaginateableT
+from aiodal import dal
+from aiodal.helpers import sa_total_count
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence, Tuple
+import base64
+import binascii
+import datetime
 
 from typing import Any, Dict, Mapping
 
+import orjson
+import sqlalchemy as sa
+from sqlalchemy.ext.compiler import compiles
+from fastapi import HTTPException
 from sqlalchemy.engine.result import _KeyType
+from starlette.datastructures import URL
+
+from . import base
+from . import conditional
 
 _T = Any
 _DictT = Dict[str, Any]
 _MappingT = Mapping[_KeyType, _T]
+_OrderByT = Sequence[sa.ColumnElement[Any]]
 
 
 @dataclass
 class NextPageInfo:
-    total_count: int
+    total_count: int | None
     next_url: str | None
+    approximate: bool = False
+    etag: str | None = None
 
 
 def _get_total_count(results: List[_DictT]) -> int:
     return results[0]["total_count"]  # type: ignore # key error means boo boo
 
 
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page into an opaque url safe token."""
+    return base64.urlsafe_b64encode(orjson.dumps(list(values))).decode()
+
+
+def decode_cursor(cursor: str, order_by: _OrderByT) -> List[Any]:
+    """Decode a cursor back into bind values for each column in `order_by`.
+
+    Raises:
+        HTTPException: 400 if the cursor was tampered with or does not match the sort key.
+    """
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, orjson.JSONDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    if not isinstance(values, list) or len(values) != len(order_by):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    # orjson hands dates back as iso strings; asyncpg wants the real thing
+    try:
+        return [
+            datetime.date.fromisoformat(v)
+            if isinstance(c.type, sa.Date) and isinstance(v, str)
+            else v
+            for v, c in zip(values, order_by)
+        ]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def keyset(
+    stmt: sa.Select[Any], order_by: _OrderByT, cursor: str | None, offset: int
+) -> sa.Select[Any]:
+    """Apply either offset or keyset pagination to a list view statement.
+
+    If `cursor` is None we fall back to regular offset pagination. An empty cursor
+    starts keyset pagination from the first page, otherwise we seek directly past
+    the last sort key of the previous page so page N costs the same as page 1.
+    `order_by` must be the (unique) ordering of the statement.
+    """
+    if cursor is None:
+        return stmt.offset(offset)
+    if cursor == "":
+        return stmt
+
+    values = decode_cursor(cursor, order_by)
+    return stmt.where(_after(order_by, values))
+
+
+def _nullable(column: sa.ColumnElement[Any]) -> bool:
+    # anything that isn't a plain NOT NULL column may be null
+    return bool(getattr(column, "nullable", True))
+
+
+def _after(order_by: _OrderByT, values: Sequence[Any]) -> sa.ColumnElement[bool]:
+    """Rows that sort after `values` in `ORDER BY *order_by` (ascending, so NULLS LAST).
+
+    A row comparison is NULL as soon as either side has a NULL, which would silently
+    drop rows. So unless every key is NOT NULL it is spelled out as
+    `c1 > v1 OR (c1 = v1 AND c2 > v2) OR ...` where NULL sorts after every value.
+    """
+    if not any(_nullable(c) for c in order_by):
+        return sa.tuple_(*order_by) > sa.tuple_(
+            *[sa.literal(v, c.type) for v, c in zip(values, order_by)]
+        )
+
+    terms = []
+    equal: List[sa.ColumnElement[bool]] = []
+    for c, v in zip(order_by, values):
+        if v is None:
+            # nothing sorts after NULL; ties carry on to the next key
+            equal.append(c.is_(None))
+            continue
+        value = sa.literal(v, c.type)
+        after = sa.or_(c > value, c.is_(None)) if _nullable(c) else c > value
+        terms.append(sa.and_(*equal, after))
+        equal.append(c == value)
+    return sa.or_(*terms) if terms else sa.false()
+
+
+def get_keyset(
+    results: List[_DictT],
+    request_url: str,
+    limit: int,
+    order_by: _OrderByT,
+    total_count: int | None = None,
+) -> NextPageInfo:
+    """Cursor based variant of `get`. The next_url carries the sort key of the last row
+    of this page instead of an offset.
+
+    NOTE since the cursor is applied as a where clause, `total_count` is the number of
+    rows remaining from the start of this page rather than the size of the whole set.
+    """
+    current_len = len(results)
+    if current_len == 0:
+        return NextPageInfo(total_count=0, next_url=None)
+
+    if total_count is None:
+        total_count = _get_total_count(results)
+    if total_count <= current_len:
+        return NextPageInfo(total_count=total_count, next_url=None)
+
+    return NextPageInfo(
+        total_count=total_count,
+        next_url=_cursor_url(results, request_url, limit, order_by),
+    )
+
+
+def _cursor_url(
+    results: List[_DictT], request_url: str, limit: int, order_by: _OrderByT
+) -> str:
+    last = results[-1]
+    cursor = encode_cursor([last[c.key] for c in order_by])  # type: ignore[index]
+    return str(
+        URL(request_url)
+        .remove_query_params("offset")
+        .include_query_params(cursor=cursor, limit=limit)
+    )
+
+
+def _offset_url(request_url: str, offset: int, limit: int) -> str:
+    return str(
+        URL(request_url).include_query_params(offset=offset + limit, limit=limit)
+    )
+
+
+class Explain(sa.sql.expression.Executable, sa.sql.expression.ClauseElement):
+    """`EXPLAIN (FORMAT JSON) <statement>` that keeps the statement's bound parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: sa.Select[Any]):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + str(compiler.process(element.statement, **kw))
+
+
+async def estimate_count(
+    transaction: dal.TransactionManager, stmt: sa.Select[Any]
+) -> int:
+    """Ask the planner how many rows the filtered (unpaginated) statement would return.
+    This reads table statistics only and never touches the rows themselves.
+    """
+    res = await transaction.execute(
+        Explain(stmt.order_by(None).limit(None).offset(None))
+    )
+    plan = res.scalar_one()
+    if isinstance(plan, (str, bytes)):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
 def get(
     results: List[_DictT],
     request_url: str,
     offset: int,
     limit: int,
     url_start_index: str = "/v1",
+    cursor: str | None = None,
+    order_by: _OrderByT = (),
+    total_count: int | None = None,
 ) -> NextPageInfo:
     """Hacked from the innerds of aiodal.oqm. We get the same pagination calculation but its more
     loosely coupled
 
     Our list views should create RowMappings using `list(result.mappings())` to pass here.
+    If a `cursor` was given we hand off to `get_keyset` and emit cursor based next urls.
 
     Args:
         results (List[RowMapping]): _description_
@@ -39,18 +215,158 @@ def get(
         offset (int): _description_
         limit (int): _description_
         url_start_index (str, optional): _description_. Defaults to "/v1".
+        cursor (str | None, optional): the incoming cursor if in keyset mode. Defaults to None.
+        order_by (Sequence[ColumnElement], optional): the sort key of the statement. Defaults to ().
+        total_count (int | None, optional): use this instead of reading it off of row 0. Defaults to None.
 
     Returns:
         Page: _description_
     """
+    if cursor is not None:
+        return get_keyset(results, request_url, limit, order_by, total_count)
+
     current_len = len(results)
     if current_len == 0:
         return NextPageInfo(total_count=0, next_url=None)
 
     # NOTE if this throws a KeyError we made a boo in sql stmt and forgot sa_total_count!
-    total_count = _get_total_count(results)
+    if total_count is None:
+        total_count = _get_total_count(results)
 
     next_url = _default_paginator(
         request_url, offset, limit, current_len, total_count, url_start_index
     )
     return NextPageInfo(total_count=total_count, next_url=next_url)
+
+
+async def _fetch_conditional(
+    transaction: dal.TransactionManager,
+    stmt: sa.Select[Any],
+    page_stmt: sa.Select[Any],
+    request_url: str,
+    params: base.BaseListViewQueryParamsModel,
+    order_by: _OrderByT,
+    count_on: sa.ColumnElement[Any],
+    updated_on: _OrderByT,
+    if_none_match: str | None,
+) -> Tuple[List[_DictT], NextPageInfo]:
+    # same set the window count would see: keyset filter applied, offset not
+    filtered = keyset(stmt, order_by, params.cursor, 0).order_by(None).offset(None)
+    last_modified = (
+        sa.func.greatest(*updated_on) if len(updated_on) > 1 else updated_on[0]
+    )
+    agg = filtered.with_only_columns(
+        sa.func.count(count_on),
+        sa.func.max(last_modified),
+        maintain_column_froms=True,
+    )
+    res = await transaction.execute(agg)
+    total_count, max_updated_on = res.one()
+
+    etag = conditional.make_etag(request_url, total_count, max_updated_on)
+    if conditional.etag_matches(etag, if_none_match):
+        raise conditional.not_modified(etag)
+
+    res = await transaction.execute(page_stmt.limit(params.limit))
+    results = [dict(r) for r in res.mappings()]
+    page = get(
+        results,
+        request_url,
+        params.offset,
+        params.limit,
+        cursor=params.cursor,
+        order_by=order_by,
+        total_count=total_count,
+    )
+    page.etag = etag
+    return results, page
+
+
+async def fetch(
+    transaction: dal.TransactionManager,
+    stmt: sa.Select[Any],
+    request_url: str,
+    params: base.BaseListViewQueryParamsModel,
+    order_by: _OrderByT,
+    count_on: sa.ColumnElement[Any],
+    updated_on: _OrderByT = (),
+    if_none_match: str | None = None,
+) -> Tuple[List[_DictT], NextPageInfo]:
+    """Paginate and run a filtered list view statement.
+
+    Handles offset vs. keyset pagination as well as the `count` mode:
+
+        * exact: add a `COUNT(*) OVER ()` window on `count_on` and read it back from row 0.
+        * estimate: skip the window and ask the planner for a row estimate of the filtered set.
+        * none: skip counting. We fetch `limit + 1` rows to tell if there is a next page.
+
+    In exact mode, if the `updated_on` columns of the tables behind the view are given,
+    the count comes from one aggregate that also reads `max(updated_on)` of the filtered
+    set. Both go into a strong etag for the page which is checked against
+    `if_none_match` before any rows are fetched.
+
+    Args:
+        transaction (dal.TransactionManager): the transaction
+        stmt (sa.Select[Any]): the filtered and ordered statement without offset or limit
+        request_url (str): the incoming request url
+        params (base.BaseListViewQueryParamsModel): the list view query params
+        order_by (Sequence[ColumnElement]): the unique ordering of `stmt`
+        count_on (ColumnElement): the column to count on in exact mode
+        updated_on (Sequence[ColumnElement], optional): `updated_on` of every table in the view. Defaults to ().
+        if_none_match (str | None, optional): the incoming If-None-Match header. Defaults to None.
+
+    Raises:
+        HTTPException: 304 if `if_none_match` matches the etag of the page
+
+    Returns:
+        Tuple[List[Dict[str, Any]], NextPageInfo]: the rows and the page info
+    """
+    page_stmt = keyset(stmt, order_by, params.cursor, params.offset)
+
+    if params.count == base.CountModeEnum.exact and updated_on:
+        return await _fetch_conditional(
+            transaction,
+            stmt,
+            page_stmt,
+            request_url,
+            params,
+            order_by,
+            count_on,
+            updated_on,
+            if_none_match,
+        )
+
+    if params.count == base.CountModeEnum.exact:
+        page_stmt = page_stmt.add_columns(sa_total_count(count_on))
+        page_stmt = page_stmt.limit(params.limit)
+        res = await transaction.execute(page_stmt)
+        results = [dict(r) for r in res.mappings()]
+        page = get(
+            results,
+            request_url,
+            params.offset,
+            params.limit,
+            cursor=params.cursor,
+            order_by=order_by,
+        )
+        return results, page
+
+    res = await transaction.execute(page_stmt.limit(params.limit + 1))
+    results = [dict(r) for r in res.mappings()]
+    has_next = len(results) > params.limit
+    results = results[: params.limit]
+
+    next_url = None
+    if has_next and results:
+        if params.cursor is not None:
+            next_url = _cursor_url(results, request_url, params.limit, order_by)
+        else:
+            next_url = _offset_url(request_url, params.offset, params.limit)
+
+    if params.count == base.CountModeEnum.estimate:
+        total_count = await estimate_count(transaction, stmt)
+        return results, NextPageInfo(
+            total_count=total_count, next_url=next_url, approximate=True
+        )
+
+    return results, NextPageInfo(total_count=None, next_url=next_url)
@@ -0,0 +1,124 @@
+"""Connection pool wiring and metrics.
+
+`engine_kwargs` is everything the app passes to `create_async_engine` for the pool,
+`connect` is `engine.connect()` that records how long the checkout took and `info`
+is what /metrics/pool/ reports. Like the caches, the numbers are per worker.
+"""
+from typing import Any, AsyncIterator, Deque, Dict
+import collections
+import contextlib
+import dataclasses
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from .. import config
+
+# checkouts kept for the percentiles
+_RECENT = 1024
+
+
+def engine_kwargs() -> Dict[str, Any]:
+    return {
+        "pool_size": config.POOL_SIZE,
+        "max_overflow": config.MAX_OVERFLOW,
+        "pool_timeout": config.POOL_TIMEOUT,
+        "pool_recycle": config.POOL_RECYCLE,
+        "pool_pre_ping": config.POOL_PRE_PING,
+        # read by sqlalchemy's asyncpg adaptor, not asyncpg itself
+        "connect_args": {"prepared_statement_cache_size": config.STATEMENT_CACHE_SIZE},
+    }
+
+
+@dataclasses.dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0  # gave up after pool_timeout seconds
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+    recent: Deque[float] = dataclasses.field(
+        default_factory=lambda: collections.deque(maxlen=_RECENT)
+    )
+
+    def record(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self.recent.append(seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def reset(self) -> None:
+        self.checkouts = self.timeouts = 0
+        self.wait_seconds_total = self.wait_seconds_max = 0.0
+        self.recent.clear()
+
+
+stats = PoolStats()
+
+
+@contextlib.asynccontextmanager
+async def connect(engine: AsyncEngine) -> AsyncIterator[AsyncConnection]:
+    """`async with engine.connect()` that times the checkout. The wait includes
+    opening a new connection and the pre ping when those happen.
+    """
+    conn = engine.connect()
+    start = time.perf_counter()
+    try:
+        await conn.start()
+    except sa.exc.TimeoutError:
+        stats.timeouts += 1
+        raise
+    stats.record(time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+def info(engine: AsyncEngine) -> Dict[str, Any]:
+    pool = engine.sync_engine.pool
+
+    def _call(name: str) -> Any:
+        # NullPool and friends don't keep counts
+        fn = getattr(pool, name, None)
+        return fn() if callable(fn) else None
+
+    return {
+        "pool": {
+            "class": type(pool).__name__,
+            "size": _call("size"),
+            "checked_out": _call("checkedout"),
+            "checked_in": _call("checkedin"),
+            "overflow": _call("overflow"),
+            "max_overflow": config.MAX_OVERFLOW,
+            "timeout": config.POOL_TIMEOUT,
+            "recycle": config.POOL_RECYCLE,
+            "pre_ping": config.POOL_PRE_PING,
+            "statement_cache_size": config.STATEMENT_CACHE_SIZE,
+        },
+        "wait": {
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "seconds_total": stats.wait_seconds_total,
+            "seconds_max": stats.wait_seconds_max,
+            "seconds_mean": (
+                stats.wait_seconds_total / stats.checkouts if stats.checkouts else 0.0
+            ),
+            "seconds_p50": stats.percentile(50),
+            "seconds_p95": stats.percentile(95),
+            "seconds_p99": stats.percentile(99),
+        },
+        # all workers together against postgres
+        "capacity": {
+            "workers": config.WEB_CONCURRENCY,
+            "connections_per_worker": config.POOL_SIZE + config.MAX_OVERFLOW,
+            "connections_total": config.POOL_CONNECTION_BUDGET,
+            "postgres_max_connections": config.POSTGRES_MAX_CONNECTIONS,
+        },
+    }
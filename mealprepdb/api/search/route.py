@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+# from ..auth import auth0
+from ..deps import get_transaction
+from . import search as model
+from aiodal import dal
+from typing import List, Any
+
+deps: List[Any] = [
+    # Depends(auth0.implicit_scheme),
+]
+router = APIRouter(prefix="/search", tags=["search"], dependencies=deps)
+
+
+@router.get("/")
+async def search_view(
+    params: model.SearchQueryParams = Depends(),
+    transaction: dal.TransactionManager = Depends(get_transaction),
+    # _: Auth0User = Security(auth0.get_user, scopes=[READ_INGREDIENT]),
+) -> model.SearchView:
+    """Return the best matches for `q` across ingredients, dishes and meals."""
+
+    return await model.SearchView.get(transaction, params=params)
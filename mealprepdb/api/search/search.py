@@ -0,0 +1,111 @@
+from typing import Any, Dict, List, Optional
+from .. import base
+from aiodal import dal
+import pydantic
+import sqlalchemy as sa
+from fastapi import Query
+import enum
+
+
+class SearchTypeEnum(str, enum.Enum):
+    ingredient = "ingredient"
+    dish = "dish"
+    meal = "meal"
+
+
+# type -> (table, searched column). route names follow f"{type}_detail_view"
+_SEARCH_COLUMNS = {
+    SearchTypeEnum.ingredient: ("ingredient", "name"),
+    SearchTypeEnum.dish: ("dish", "name"),
+    SearchTypeEnum.meal: ("meal", "description"),
+}
+
+
+class SearchQueryParams:
+    def __init__(
+        self,
+        q: str = Query(..., min_length=1, max_length=255),
+        type: List[SearchTypeEnum] = Query(None),
+        limit: int = Query(10, ge=1, le=50),
+    ):
+        self.q = q
+        self.type = type or list(SearchTypeEnum)
+        self.limit = limit
+
+
+class SearchResultResource(base.ResourceModel):
+    type: SearchTypeEnum
+    id: int
+    label: str
+    score: float
+
+    @pydantic.computed_field  # type: ignore[misc]
+    @property
+    def links(self) -> Optional[Dict[str, base.ResourceUri]]:
+        if self._fastapi:
+            return {"self": self.url_for(f"{self.type.value}_detail_view", id=self.id)}
+        return None
+
+
+def _branch(
+    transaction: dal.TransactionManager,
+    type_: SearchTypeEnum,
+    q: str,
+    limit: int,
+) -> sa.Select[Any]:
+    """Top `limit` matches of one table. Prefix matches rank first and are served by
+    the `lower(col) text_pattern_ops` index, the rest come from the trigram index.
+    """
+    tablename, colname = _SEARCH_COLUMNS[type_]
+    t = transaction.get_table(tablename)
+    col = t.c[colname]
+    prefix = sa.func.lower(col).like(base.escape_like(q.lower()) + "%", escape="\\")
+    score = base.similarity(col, q)
+    inner = (
+        sa.select(
+            sa.literal(type_.value).label("type"),
+            t.c.id,
+            col.label("label"),
+            score.label("score"),
+            prefix.label("prefix"),
+        )
+        .where(sa.or_(prefix, base.similar(col, q)))
+        .order_by(prefix.desc(), score.desc(), t.c.id)
+        .limit(limit)
+        .subquery()
+    )
+    return sa.select(inner)
+
+
+class SearchView(pydantic.BaseModel):
+    results: List[SearchResultResource]
+
+    model_config = pydantic.ConfigDict(from_attributes=True)
+
+    @classmethod
+    async def get(
+        cls, transaction: dal.TransactionManager, params: SearchQueryParams
+    ) -> "SearchView":
+        """Typeahead across ingredient, dish and meal.
+
+        Every table contributes its own top `limit` in a UNION ALL branch so each
+        branch is planned against its own indexes, and the whole thing is one round
+        trip. The branches are merged by relevance: prefix matches first, then
+        trigram similarity.
+        """
+        branches = [
+            _branch(transaction, type_, params.q, params.limit) for type_ in params.type
+        ]
+        merged = sa.union_all(*branches).subquery()
+        stmt = (
+            sa.select(merged.c.type, merged.c.id, merged.c.label, merged.c.score)
+            .order_by(
+                merged.c.prefix.desc(),
+                merged.c.score.desc(),
+                merged.c.type,
+                merged.c.id,
+            )
+            .limit(params.limit)
+        )
+        res = await transaction.execute(stmt)
+        return cls.model_validate({"results": res.all()})
@@ -0,0 +1,157 @@
+"""Slow query log.
+
+Statements that take longer than `threshold` seconds are logged with their sql, bound
+parameters and the route that ran them, and kept in a ring buffer that
+/debug/slow-queries/ serves outside production. A `sample` fraction of the slow
+SELECTs is run again through EXPLAIN (ANALYZE, BUFFERS) in the background, on a
+separate READ ONLY connection that is rolled back, and the plan is attached to the
+entry once it arrives. The request that was slow never waits on it.
+"""
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+import asyncio
+import collections
+import dataclasses
+import datetime
+import logging
+import random
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .. import config
+from . import telemetry
+
+logger = logging.getLogger(__name__)
+
+# longest repr of the parameters we keep; bulk inserts can be huge
+_MAX_PARAMETERS_REPR = 2000
+# statements (by their first word) that are sampled for EXPLAIN ANALYZE
+_EXPLAINABLE = ("SELECT", "WITH")
+
+
+@dataclasses.dataclass
+class SlowQuery:
+    at: datetime.datetime
+    seconds: float
+    route: str
+    statement: str
+    parameters: str
+    plan: Optional[str] = None
+
+
+class SlowQueryLog:
+    def __init__(self, threshold: float, sample: float, size: int):
+        self.threshold = threshold
+        self.sample = sample
+        self.entries: Deque[SlowQuery] = collections.deque(maxlen=size)
+        self._engine: Optional[AsyncEngine] = None
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def _hooks(self) -> Tuple[Tuple[str, Callable[..., None]], ...]:
+        return (
+            ("before_cursor_execute", self._before),
+            ("after_cursor_execute", self._after),
+        )
+
+    def instrument(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        for name, fn in self._hooks():
+            if not sa.event.contains(engine.sync_engine, name, fn):
+                sa.event.listen(engine.sync_engine, name, fn)
+
+    def uninstrument(self, engine: AsyncEngine) -> None:
+        for name, fn in self._hooks():
+            if sa.event.contains(engine.sync_engine, name, fn):
+                sa.event.remove(engine.sync_engine, name, fn)
+        if self._engine is engine:
+            self._engine = None
+
+    def _before(
+        self,
+        conn: sa.Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        if context is not None and not context.execution_options.get("slow_query_skip"):
+            context._slow_query_start = time.perf_counter()
+
+    def _after(
+        self,
+        conn: sa.Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Any,
+        executemany: bool,
+    ) -> None:
+        start = getattr(context, "_slow_query_start", None)
+        if start is None or not self.threshold:
+            return
+        seconds = time.perf_counter() - start
+        if seconds < self.threshold:
+            return
+
+        entry = SlowQuery(
+            at=datetime.datetime.now(datetime.timezone.utc),
+            seconds=seconds,
+            route=telemetry.current_route.get() or "background",
+            statement=statement,
+            parameters=repr(parameters)[:_MAX_PARAMETERS_REPR],
+        )
+        self.entries.append(entry)
+        logger.warning(
+            "slow query %.3fs on %s\n%s\nparameters: %s",
+            seconds,
+            entry.route,
+            statement,
+            entry.parameters,
+        )
+
+        # ANALYZE executes the statement so only ever explain reads. WITH covers the
+        # recursive lineage and calendar queries; a data modifying CTE fails in the
+        # READ ONLY transaction instead of writing.
+        if (
+            self.sample
+            and not executemany
+            and (statement.split(None, 1) or [""])[0].upper() in _EXPLAINABLE
+            and random.random() < self.sample
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self._explain(entry, statement, parameters)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, entry: SlowQuery, statement: str, parameters: Any) -> None:
+        if self._engine is None:
+            return
+        try:
+            async with self._engine.connect() as conn:
+                await conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+                # NOTE the explain is as slow as the query; don't log it again
+                conn = await conn.execution_options(slow_query_skip=True)
+                res = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters
+                )
+                entry.plan = "\n".join(r[0] for r in res)
+                await conn.rollback()
+        except Exception as err:  # a plan is nice to have; never fail over it
+            logger.warning("could not explain slow query: %s", err)
+
+    def info(self) -> List[Dict[str, Any]]:
+        """Newest first."""
+        return [dataclasses.asdict(e) for e in reversed(self.entries)]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+log = SlowQueryLog(
+    threshold=config.SLOW_QUERY_THRESHOLD,
+    sample=config.SLOW_QUERY_EXPLAIN_SAMPLE,
+    size=config.SLOW_QUERY_LOG_SIZE,
+)
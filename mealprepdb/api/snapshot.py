@@ -0,0 +1,147 @@
+"""Reflected schema snapshot so workers don't reflect the database on every boot.
+
+Build it against a database migrated to the alembic head, once per release:
+
+    python -m mealprepdb.api.snapshot
+
+That reflects the schema exactly as startup would and pickles the `sa.MetaData`
+together with the alembic revision and sqlalchemy version it was built for. On
+startup `reflect` reads one row from alembic_version; when it matches the snapshot
+the pickled metadata is handed to `db.reflect`. sqlalchemy skips the tables that are
+already in it, so only the table names are listed and the per table catalog queries
+are skipped. A missing or stale snapshot falls back to live reflection, so it is
+always safe to boot without one.
+
+NOTE the snapshot is a pickle and is trusted. It is built by us and shipped with the
+code, never read from anywhere else.
+"""
+from typing import Any, Dict, Optional
+import logging
+import os
+import pathlib
+import pickle
+import tempfile
+
+import sqlalchemy as sa
+from aiodal import dal
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .. import config
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = pathlib.Path(__file__).parent.parent.parent
+
+
+async def database_revision(engine: AsyncEngine) -> Optional[str]:
+    try:
+        async with engine.connect() as conn:
+            res = await conn.execute(sa.text("SELECT version_num FROM alembic_version"))
+            return res.scalar_one_or_none()
+    except sa.exc.DBAPIError:  # not migrated at all
+        return None
+
+
+def head_revision() -> str:
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    cfg = Config(str(ROOT_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(ROOT_DIR / "migrations"))
+    head = ScriptDirectory.from_config(cfg).get_current_head()
+    if head is None:
+        raise RuntimeError("no alembic head revision")
+    return head
+
+
+def load(path: pathlib.Path) -> Optional[Dict[str, Any]]:
+    try:
+        with path.open("rb") as f:
+            snapshot: Dict[str, Any] = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as err:  # unreadable means rebuild, not a failed boot
+        logger.warning("ignoring metadata snapshot %s: %s", path, err)
+        return None
+    if snapshot.get("sqlalchemy") != sa.__version__:
+        logger.warning(
+            "metadata snapshot was built with sqlalchemy %s, running %s",
+            snapshot.get("sqlalchemy"),
+            sa.__version__,
+        )
+        return None
+    return snapshot
+
+
+async def install(
+    db: dal.DataAccessLayer, engine: AsyncEngine, metadata: sa.MetaData
+) -> None:
+    """Initialize `db` through its own `reflect` with the already populated `metadata`.
+    Tables added since the snapshot was built would still be reflected.
+    """
+    await db.reflect(engine, metadata)
+
+
+async def reflect(db: dal.DataAccessLayer, engine: AsyncEngine) -> str:
+    """Initialize `db` from the snapshot when it matches the database, else reflect.
+
+    Returns:
+        str: "snapshot" or "live", for the startup log
+    """
+    path = pathlib.Path(config.METADATA_SNAPSHOT)
+    snapshot = load(path)
+    if snapshot is not None:
+        revision = await database_revision(engine)
+        if revision == snapshot["revision"]:
+            await install(db, engine, snapshot["metadata"])
+            return "snapshot"
+        logger.warning(
+            "metadata snapshot is for revision %s, database is at %s",
+            snapshot["revision"],
+            revision,
+        )
+
+    await db.reflect(engine, sa.MetaData())
+    return "live"
+
+
+async def build(path: pathlib.Path) -> str:
+    """Reflect the database and write the snapshot to `path`. The database has to be
+    at the alembic head so the snapshot matches the code it ships with.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(config.POSTGRES_URI)
+    try:
+        revision = await database_revision(engine)
+        head = head_revision()
+        if revision != head:
+            raise RuntimeError(
+                f"database is at revision {revision}, not head {head}. "
+                "run alembic upgrade head first"
+            )
+        fresh = dal.DataAccessLayer()
+        metadata = sa.MetaData()
+        await fresh.reflect(engine, metadata)
+    finally:
+        await engine.dispose()
+
+    snapshot = {
+        "revision": revision,
+        "sqlalchemy": sa.__version__,
+        "metadata": metadata,
+    }
+    # write then rename so a worker booting meanwhile never reads half a file
+    with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # NamedTemporaryFile is 0600; workers may run as another user than the build
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, path)
+    return head
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    target = pathlib.Path(config.METADATA_SNAPSHOT)
+    print(f"wrote {target} for revision {asyncio.run(build(target))}")
@@ -0,0 +1,266 @@
+"""In-process request, query and serialization metrics in Prometheus text format.
+
+Nothing is pushed anywhere; GET /metrics renders the current values and a scraper
+pulls them. Every uvicorn worker has its own registry, like the caches.
+
+- `TelemetryMiddleware` times every request, labelled with the route template (not
+  the raw path, so ids don't blow up the label space).
+- `instrument(engine)` hooks before/after_cursor_execute to time every statement and
+  count the rows it returned, labelled with the route that ran it.
+- `base.ListViewModel.render` times serialization per list view class.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+import contextvars
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LabelsT = Tuple[str, ...]
+
+# seconds
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+ROW_BUCKETS = (0, 1, 10, 50, 100, 500, 1000, 2000, 5000, 10000, 50000)
+
+# route template of the request being served, set by the middleware
+current_route: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_route", default=""
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Iterable[str], **extra: str) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelsT, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, k)} {_number(v)}"
+            for k, v in sorted(self._values.items())
+        ]
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # labels -> (per bucket counts (not cumulative), sum)
+        self._values: Dict[LabelsT, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        item = self._values.get(labels)
+        if item is None:
+            item = self._values[labels] = ([0] * len(self.buckets), [0.0])
+        counts, total = item
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        total[0] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for k, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets, counts):
+                cumulative += c
+                labels = _labels(self.labelnames, k, le=_number(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, k)
+            lines.append(f"{self.name}_sum{labels} {_number(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+    def clear(self) -> None:
+        self._values.clear()
+
+
+http_requests = Counter(
+    "mealprepdb_http_requests_total",
+    "Requests served.",
+    ("method", "route", "status"),
+)
+http_request_duration = Histogram(
+    "mealprepdb_http_request_duration_seconds",
+    "Time from receiving a request to sending the end of its response.",
+    ("method", "route"),
+)
+db_query_duration = Histogram(
+    "mealprepdb_db_query_duration_seconds",
+    "Time spent executing a statement, by the route that ran it.",
+    ("route", "operation"),
+)
+db_rows = Histogram(
+    "mealprepdb_db_rows",
+    "Rows a statement returned or changed.",
+    ("route", "operation"),
+    buckets=ROW_BUCKETS,
+)
+serialization_duration = Histogram(
+    "mealprepdb_serialization_duration_seconds",
+    "Time to render a list view into a response body.",
+    ("view",),
+)
+
+REGISTRY: List[Any] = [
+    http_requests,
+    http_request_duration,
+    db_query_duration,
+    db_rows,
+    serialization_duration,
+]
+
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+def clear() -> None:
+    for metric in REGISTRY:
+        metric.clear()
+
+
+def _route_of(scope: Scope) -> str:
+    """The path template of the route that will serve `scope`. This is the same
+    match the router is about to do; it is cheap next to everything else.
+    """
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return str(getattr(route, "path", ""))
+    return "unmatched"
+
+
+class TelemetryMiddleware:
+    """Pure asgi so it doesn't buffer responses the way BaseHTTPMiddleware does."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = _route_of(scope)
+        token = current_route.set(route)
+        status = 500
+        start = time.perf_counter()
+
+        async def _send(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            method = scope["method"]
+            http_request_duration.observe(time.perf_counter() - start, method, route)
+            http_requests.inc(method, route, str(status))
+            current_route.reset(token)
+
+
+def _before_cursor_execute(
+    conn: sa.Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    # NOTE on the execution context so a statement that fails leaves nothing behind
+    if context is not None:
+        context._telemetry_start = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: sa.Connection,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    start = getattr(context, "_telemetry_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    route = current_route.get() or "background"
+    # SELECT / INSERT / UPDATE / WITH ... keeps the label space small
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    db_query_duration.observe(elapsed, route, operation)
+    rowcount = getattr(cursor, "rowcount", -1)
+    if rowcount is not None and rowcount >= 0:
+        db_rows.observe(rowcount, route, operation)
+
+
+_HOOKS: Tuple[Tuple[str, Callable[..., None]], ...] = (
+    ("before_cursor_execute", _before_cursor_execute),
+    ("after_cursor_execute", _after_cursor_execute),
+)
+
+
+def instrument(engine: AsyncEngine) -> None:
+    for name, fn in _HOOKS:
+        if not sa.event.contains(engine.sync_engine, name, fn):
+            sa.event.listen(engine.sync_engine, name, fn)
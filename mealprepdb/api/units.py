@@ -0,0 +1,219 @@
+"""Unit registry and vectorized quantity conversion.
+
+`unit` is free text everywhere, so before quantities can be summed they have to be put
+in the same unit. Every known unit belongs to a dimension (mass, volume or count) and
+has a factor to that dimension's canonical unit (gram, milliliter, each). Mass and
+volume convert into each other with a per ingredient density.
+
+Conversion works on whole columns: the distinct units (and ingredients) are looked up
+once with `np.unique` and the factors are broadcast back over the rows, so the cost
+does not depend on how many rows go through python.
+
+NOTE numpy is imported where it is used so importing the api doesn't pay for it.
+"""
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Sequence, Tuple, Union
+import enum
+import math
+
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+
+    FloatArray = npt.NDArray[np.float64]
+
+
+class Dimension(enum.IntEnum):
+    unknown = 0
+    mass = 1  # gram
+    volume = 2  # milliliter
+    count = 3  # each
+
+
+DEFAULT_UNITS: Dict[str, Tuple[Dimension, float]] = {
+    # mass
+    "mg": (Dimension.mass, 0.001),
+    "g": (Dimension.mass, 1.0),
+    "gram": (Dimension.mass, 1.0),
+    "kg": (Dimension.mass, 1000.0),
+    "oz": (Dimension.mass, 28.349523125),
+    "ounce": (Dimension.mass, 28.349523125),
+    "lb": (Dimension.mass, 453.59237),
+    "pound": (Dimension.mass, 453.59237),
+    # volume
+    "ml": (Dimension.volume, 1.0),
+    "milliliter": (Dimension.volume, 1.0),
+    "l": (Dimension.volume, 1000.0),
+    "liter": (Dimension.volume, 1000.0),
+    "tsp": (Dimension.volume, 4.92892159375),
+    "teaspoon": (Dimension.volume, 4.92892159375),
+    "tbsp": (Dimension.volume, 14.78676478125),
+    "tablespoon": (Dimension.volume, 14.78676478125),
+    "fl oz": (Dimension.volume, 29.5735295625),
+    "cup": (Dimension.volume, 236.5882365),
+    "pint": (Dimension.volume, 473.176473),
+    "quart": (Dimension.volume, 946.352946),
+    "gallon": (Dimension.volume, 3785.411784),
+    # count
+    "each": (Dimension.count, 1.0),
+    "ea": (Dimension.count, 1.0),
+    "piece": (Dimension.count, 1.0),
+    "dozen": (Dimension.count, 12.0),
+}
+
+# grams per milliliter keyed by ingredient.name
+DEFAULT_DENSITIES: Dict[str, float] = {
+    "water": 1.0,
+    "milk": 1.03,
+    "rice": 0.85,
+    "flour": 0.53,
+    "sugar": 0.85,
+    "salt": 1.2,
+    "oil": 0.92,
+    "butter": 0.96,
+    "honey": 1.42,
+}
+
+ArrayLike = Union[Sequence[Optional[float]], "FloatArray"]
+
+
+def normalize(unit: Optional[str]) -> str:
+    """Canonical spelling of a unit: lower case, single spaces, no trailing `.` or
+    plural `s`. Anything falsy is the empty string.
+    """
+    if not unit:
+        return ""
+    key = " ".join(unit.lower().replace(".", " ").split())
+    if len(key) > 2 and key.endswith("s") and not key.endswith("ss"):
+        key = key[:-1]
+    return key
+
+
+def _unique(
+    values: Sequence[Optional[str]],
+) -> Tuple["npt.NDArray[np.str_]", "npt.NDArray[np.intp]"]:
+    import numpy as np
+
+    # np.unique can't order None against str
+    arr = np.asarray(["" if v is None else v for v in values], dtype=np.str_)
+    return np.unique(arr, return_inverse=True)
+
+
+class UnitRegistry:
+    def __init__(
+        self,
+        units: Mapping[str, Tuple[Dimension, float]] = DEFAULT_UNITS,
+        densities: Mapping[str, float] = DEFAULT_DENSITIES,
+    ):
+        self._units: Dict[str, Tuple[Dimension, float]] = dict(units)
+        self._densities: Dict[str, float] = dict(densities)
+
+    def define(self, unit: str, dimension: Dimension, factor: float) -> None:
+        """Register `unit` as `factor` canonical units of `dimension`."""
+        self._units[normalize(unit)] = (dimension, factor)
+
+    def set_density(self, ingredient: str, g_per_ml: float) -> None:
+        self._densities[ingredient.lower()] = g_per_ml
+
+    def lookup(self, unit: Optional[str]) -> Tuple[Dimension, float]:
+        return self._units.get(normalize(unit), (Dimension.unknown, math.nan))
+
+    def _factors(
+        self, units: Sequence[Optional[str]]
+    ) -> Tuple["npt.NDArray[np.int_]", "FloatArray", "npt.NDArray[np.str_]"]:
+        """Per row dimension, factor to canonical and normalized unit."""
+        import numpy as np
+
+        uniq, inverse = _unique(units)
+        keys = np.array([normalize(u) for u in uniq], dtype=np.str_)
+        looked_up = [self.lookup(u) for u in uniq]
+        dims = np.array([d for d, _ in looked_up], dtype=np.int_)
+        factors = np.array([f for _, f in looked_up], dtype=np.float64)
+        return dims[inverse], factors[inverse], keys[inverse]
+
+    def _density(self, ingredients: Sequence[Optional[str]]) -> "FloatArray":
+        import numpy as np
+
+        uniq, inverse = _unique(ingredients)
+        per = np.array(
+            [self._densities.get(i.lower(), np.nan) for i in uniq], dtype=np.float64
+        )
+        return per[inverse]
+
+    def convert(
+        self,
+        quantities: ArrayLike,
+        units: Sequence[Optional[str]],
+        to: Union[str, Sequence[Optional[str]]],
+        ingredients: Optional[Sequence[Optional[str]]] = None,
+    ) -> "FloatArray":
+        """Convert a column of quantities into `to`, either one unit for every row or
+        a target unit per row.
+
+        Rows whose unit and target are the same string convert 1:1 even if the unit is
+        not registered. Mass <-> volume needs `ingredients` (names) with a known
+        density. Anything else that can't be converted comes back as nan.
+
+        Returns:
+            np.ndarray: float64 array the length of `quantities`
+        """
+        import numpy as np
+
+        q = np.asarray(quantities, dtype=np.float64)
+        n = len(q)
+        targets = [to] * n if isinstance(to, str) else to
+
+        src_dim, src_factor, src_key = self._factors(units)
+        dst_dim, dst_factor, dst_key = self._factors(targets)
+
+        out = np.full(n, np.nan, dtype=np.float64)
+
+        same = (src_dim == dst_dim) & (src_dim != Dimension.unknown)
+        out[same] = q[same] * src_factor[same] / dst_factor[same]
+
+        # unregistered units that match the target verbatim
+        verbatim = ~same & (src_key == dst_key)
+        out[verbatim] = q[verbatim]
+
+        if ingredients is not None:
+            density = self._density(ingredients)
+            v2m = (src_dim == Dimension.volume) & (dst_dim == Dimension.mass)
+            out[v2m] = q[v2m] * src_factor[v2m] * density[v2m] / dst_factor[v2m]
+            m2v = (src_dim == Dimension.mass) & (dst_dim == Dimension.volume)
+            out[m2v] = q[m2v] * src_factor[m2v] / density[m2v] / dst_factor[m2v]
+
+        return out
+
+    def canonical(
+        self, quantities: ArrayLike, units: Sequence[Optional[str]]
+    ) -> Tuple["FloatArray", "npt.NDArray[np.int_]"]:
+        """Quantities in the canonical unit of their own dimension, and the dimension.
+        Rows with an unknown unit are nan.
+        """
+        import numpy as np
+
+        q = np.asarray(quantities, dtype=np.float64)
+        dims, factors, _ = self._factors(units)
+        return q * factors, dims
+
+
+def sum_by(
+    positions: "npt.NDArray[np.intp]", converted: "FloatArray", n: int
+) -> Tuple["FloatArray", "npt.NDArray[np.intp]"]:
+    """Sum `converted` per position in `range(n)`, the way `np.bincount` does.
+
+    Rows that could not be converted (nan) are left out of the sum and counted instead,
+    so callers can tell a real total from one that is missing usage.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: float64 sums and unconverted counts, both of length n
+    """
+    import numpy as np
+
+    missing = np.isnan(converted)
+    sums = np.bincount(
+        positions, weights=np.where(missing, 0.0, converted), minlength=n
+    ).astype(np.float64)
+    return sums, np.bincount(positions[missing], minlength=n).astype(np.intp)
+
+
+registry = UnitRegistry()
@@ -13,14 +13,104 @@ AUTH0_AUDIENCE = os.environ.get("MEALPREPDB_AUTH0_AUDIENCE", "")
 AUTH0_ORG_ID = os.environ.get("MEALPREPDB_AUTH0_ORG_ID", "")
 BASE_BACKEND_URL = "http://api:8080"
 
-# docker-compose will set these to strings if not set.
-MAX_OVERFLOW = os.environ.get("MEALPREPDB_DB_ENGINE_MAX_OVERFLOW", 5)
-if MAX_OVERFLOW == "":
-    MAX_OVERFLOW = 5
-
-POOL_SIZE = os.environ.get("MEALPREPDB_DB_ENGINE_POOL_SIZE", 5)
-if POOL_SIZE == "":
-    POOL_SIZE = 5
+
+def _env_int(name: str, default: int, minimum: int = 0) -> int:
+    """docker-compose sets unset variables to "" so those mean the default too."""
+    raw = os.environ.get(name, "")
+    try:
+        value = int(raw) if raw != "" else default
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {raw!r}")
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {value}")
+    return value
+
+
+def _env_float(name: str, default: float, minimum: float = 0) -> float:
+    raw = os.environ.get(name, "")
+    try:
+        value = float(raw) if raw != "" else default
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {raw!r}")
+    if value < minimum:
+        raise ValueError(f"{name} must be >= {minimum}, got {value}")
+    return value
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if raw == "":
+        return default
+    if raw in ("1", "true", "yes", "on"):
+        return True
+    if raw in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be a boolean, got {raw!r}")
+
+
+# connection pool, per uvicorn worker. see api/pool.py and /metrics/pool/
+POOL_SIZE = _env_int("MEALPREPDB_DB_ENGINE_POOL_SIZE", 5, minimum=1)
+MAX_OVERFLOW = _env_int("MEALPREPDB_DB_ENGINE_MAX_OVERFLOW", 5)
+# seconds to wait for a connection before giving up with a TimeoutError
+POOL_TIMEOUT = _env_float("MEALPREPDB_DB_ENGINE_POOL_TIMEOUT", 30)
+# seconds a connection lives before it is replaced; -1 keeps them forever
+POOL_RECYCLE = _env_int("MEALPREPDB_DB_ENGINE_POOL_RECYCLE", 1800, minimum=-1)
+# test connections on checkout so one dropped by postgres or a proxy is replaced
+POOL_PRE_PING = _env_bool("MEALPREPDB_DB_ENGINE_POOL_PRE_PING", True)
+# asyncpg prepared statements kept per connection; 0 turns the cache off (pgbouncer)
+STATEMENT_CACHE_SIZE = _env_int("MEALPREPDB_DB_STATEMENT_CACHE_SIZE", 100)
+
+# every worker has its own pool so all of them together have to fit in postgres'
+# max_connections (100 in docker-compose.yaml) less the superuser reserved ones
+WEB_CONCURRENCY = _env_int("WEB_CONCURRENCY", 1, minimum=1)
+POSTGRES_MAX_CONNECTIONS = _env_int("MEALPREPDB_POSTGRES_MAX_CONNECTIONS", 100)
+POSTGRES_RESERVED_CONNECTIONS = 3
+POOL_CONNECTION_BUDGET = WEB_CONCURRENCY * (POOL_SIZE + MAX_OVERFLOW)
+if POOL_CONNECTION_BUDGET > POSTGRES_MAX_CONNECTIONS - POSTGRES_RESERVED_CONNECTIONS:
+    raise ValueError(
+        f"{WEB_CONCURRENCY} workers x (pool size {POOL_SIZE} + max overflow "
+        f"{MAX_OVERFLOW}) = {POOL_CONNECTION_BUDGET} connections is more than "
+        f"postgres allows ({POSTGRES_MAX_CONNECTIONS} less "
+        f"{POSTGRES_RESERVED_CONNECTIONS} reserved)"
+    )
+
+# statements slower than SLOW_QUERY_THRESHOLD seconds are logged with their sql and
+# parameters (0 turns it off). SLOW_QUERY_EXPLAIN_SAMPLE of those, between 0 and 1,
+# are also run through EXPLAIN (ANALYZE, BUFFERS). see api/slow_query.py
+SLOW_QUERY_THRESHOLD = _env_float("MEALPREPDB_SLOW_QUERY_THRESHOLD", 0.5)
+SLOW_QUERY_EXPLAIN_SAMPLE = _env_float("MEALPREPDB_SLOW_QUERY_EXPLAIN_SAMPLE", 0)
+if SLOW_QUERY_EXPLAIN_SAMPLE > 1:
+    raise ValueError("MEALPREPDB_SLOW_QUERY_EXPLAIN_SAMPLE must be between 0 and 1")
+SLOW_QUERY_LOG_SIZE = _env_int("MEALPREPDB_SLOW_QUERY_LOG_SIZE", 100, minimum=1)
+
+# pickled reflected schema loaded at startup instead of reflecting the database.
+# build it with `python -m mealprepdb.api.snapshot`, see api/snapshot.py
+METADATA_SNAPSHOT = os.environ.get("MEALPREPDB_METADATA_SNAPSHOT", "") or os.path.join(
+    os.path.dirname(__file__), "api", "metadata.pickle"
+)
+
+# in-process cache for reference table reads. see api/cache.py
+CACHE_TTL = _env_float("MEALPREPDB_CACHE_TTL", 60)
+CACHE_MAXSIZE = _env_int("MEALPREPDB_CACHE_MAXSIZE", 1024, minimum=1)
+
+# analytics materialized views. they are refreshed REFRESH_INTERVAL seconds after a
+# write made them stale and never left older than MAX_AGE seconds.
+# the refresher sleeps REFRESH_INTERVAL between checks so it can't be 0
+ANALYTICS_REFRESH_INTERVAL = _env_float(
+    "MEALPREPDB_ANALYTICS_REFRESH_INTERVAL", 30, minimum=1
+)
+ANALYTICS_MAX_AGE = _env_float("MEALPREPDB_ANALYTICS_MAX_AGE", 3600, minimum=1)
+
+
+# frontend -> api http client, per gunicorn worker. see frontend/client.py
+# seconds; BACKEND_TIMEOUT is each of read, write and pool wait
+BACKEND_TIMEOUT = _env_float("MEALPREPDB_BACKEND_TIMEOUT", 10)
+BACKEND_CONNECT_TIMEOUT = _env_float("MEALPREPDB_BACKEND_CONNECT_TIMEOUT", 2)
+BACKEND_MAX_CONNECTIONS = _env_int("MEALPREPDB_BACKEND_MAX_CONNECTIONS", 20, minimum=1)
+BACKEND_MAX_KEEPALIVE = _env_int("MEALPREPDB_BACKEND_MAX_KEEPALIVE", 10)
+BACKEND_KEEPALIVE_EXPIRY = _env_float("MEALPREPDB_BACKEND_KEEPALIVE_EXPIRY", 30)
+# attempts again on connection errors only, so a POST is never sent twice
+BACKEND_RETRIES = _env_int("MEALPREPDB_BACKEND_RETRIES", 2)
 
 
 _POSTGRES_URI_BASE = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/"
@@ -1,5 +1,5 @@
 from .ingredient import (
-    ingredient_dropdown_cb,
+    ingredient_lists_cb,
     create_ingredient_cb,
     create_ingredient_in_inventory_cb,
 )
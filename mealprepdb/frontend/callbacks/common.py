@@ -1,10 +1,18 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, List
 from dash.exceptions import PreventUpdate
+from ..client import backend
 
 
-def create(url: str, data: Dict[str, Any]):
-    res = httpx.post(url, json=data)
+def create(path: str, data: Dict[str, Any]) -> httpx.Response:
+    res = backend.post(path, data)
     if res.status_code != 201:
         raise PreventUpdate
     return res
+
+
+def results(res: httpx.Response) -> List[Dict[str, Any]]:
+    """The `results` of a list view response."""
+    if res.status_code != 200:
+        raise PreventUpdate
+    return res.json()["results"]
@@ -1,32 +1,25 @@
 from dash import html, callback, Output, Input, ctx
 from typing import List, Dict, Any
-import httpx
-from dash.exceptions import PreventUpdate
-from mealprepdb.config import BASE_BACKEND_URL
 import datetime
 from . import common
+from ..client import backend
 
 
 def get_parent_dish() -> List[Dict[str, Any]]:
-    url = f"{BASE_BACKEND_URL}/dish/"
-
     # only show things that has been created within 10 days window
     # otherwise you know food poisioning and what not haha
     date_le = datetime.datetime.now()
     date_ge = date_le - datetime.timedelta(days=10)
-    res = httpx.get(
-        url,
+    res = backend.get(
+        "/dish/",
         params={
             "created_on__le": date_le.strftime("%Y-%m-%d"),
             "created_on__ge": date_ge.strftime("%Y-%m-%d"),
         },
     )
-    if res.status_code != 200:
-        raise PreventUpdate
-    res = res.json()
     result = [
         {"label": f"{i['name']} - {i['created_on']}", "value": i["id"]}
-        for i in res["results"]
+        for i in common.results(res)
     ]
     return result
 
@@ -53,9 +46,8 @@ def create_dish_cb(dish_name, parent_dish_id, dish_created_on, create_button):
     if parent_dish_id:
         data["parent_dish_id"] = parent_dish_id
     msg = ""
-    url = f"{BASE_BACKEND_URL}/dish/"
     if "create-dish-btn" == ctx.triggered_id:
-        common.create(url, data)
+        common.create("/dish/", data)
         msg = f"A dish: {dish_name} has been created"
 
     return html.Div(msg)
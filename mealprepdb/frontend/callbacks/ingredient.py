@@ -1,40 +1,41 @@
-from dash import html, callback, Output, Input, ctx
+from dash import html, callback, no_update, Output, Input, ctx
 import httpx
 from typing import Dict, Any, List
-from dash.exceptions import PreventUpdate
-from mealprepdb.config import BASE_BACKEND_URL
 from . import common
+from ..client import backend, backend_async
 import datetime
 
 
+def _options(res: httpx.Response) -> List[Dict[str, Any]]:
+    return [{"label": i["name"], "value": i["id"]} for i in common.results(res)]
+
+
 # XXX need error handling for this..PreventUpdate aint no good
 def get_ingredients() -> List[Dict[str, Any]]:
-    url = f"{BASE_BACKEND_URL}/ingredient/"
-    res = httpx.get(url)
-    if res.status_code != 200:
-        raise PreventUpdate
-    res = res.json()
-    result = [{"label": i["name"], "value": i["id"]} for i in res["results"]]
-    return result
+    return _options(backend.get("/ingredient/"))
 
 
 def get_ingredients_in_inventory() -> List[Dict[str, Any]]:
-    url = f"{BASE_BACKEND_URL}/ingredient/inventory/"
-    res = httpx.get(url)
-    if res.status_code != 200:
-        raise PreventUpdate
-    res = res.json()
-    return res["results"]
+    return common.results(backend.get("/ingredient/inventory/"))
 
 
 @callback(
     Output("ingredient_ls", "options"),
+    Output("ing_in_inv_ls", "data"),
     Input("refresh-ingredient", "n_clicks"),
+    Input("refresh-ing-in-inv", "n_clicks"),
 )
-def ingredient_dropdown_cb(refresh_bttn):
+def ingredient_lists_cb(refresh_ingredient_bttn, refresh_ing_in_inv_bttn):
+    # a refresh button reloads its own list; the first load fetches both at once
     if "refresh-ingredient" == ctx.triggered_id:
-        return get_ingredients()
-    return get_ingredients()
+        return get_ingredients(), no_update
+    if "refresh-ing-in-inv" == ctx.triggered_id:
+        return no_update, get_ingredients_in_inventory()
+    ingredients, inventory = backend_async.gather(
+        backend_async.get("/ingredient/"),
+        backend_async.get("/ingredient/inventory/"),
+    )
+    return _options(ingredients), common.results(inventory)
 
 
 @callback(
@@ -48,9 +49,8 @@ def create_ingredient_cb(ingredient_name, ingredient_type, create_button):
     if ingredient_type:
         data["type"] = ingredient_type
     msg = ""
-    url = f"{BASE_BACKEND_URL}/ingredient/"
     if "create-ingredient-btn" == ctx.triggered_id:
-        common.create(url, data)
+        common.create("/ingredient/", data)
         msg = f"{ingredient_name} has been created"
 
     return html.Div(msg)
@@ -90,22 +90,11 @@ def create_ingredient_in_inventory_cb(
         "finished_on": finished_on,
     }
     msg = ""
-    url = f"{BASE_BACKEND_URL}/ingredient/inventory"
     print(data)
     if "create-ingredient-in-inventory-btn" == ctx.triggered_id:
-        res = _create(url, data)
+        res = common.create("/ingredient/inventory", data)
         res = res.json()
         print(res)
         msg = f"ingredient has been added to inventory"
 
     return html.Div(msg)
-
-
-@callback(
-    Output("ing_in_inv_ls", "data"),
-    Input("refresh-ing-in-inv", "n_clicks"),
-)
-def get_list_of_ingredient_in_inventory_cb(refresh_bttn):
-    if "refresh-ing-in-inv" == ctx.triggered_id:
-        return get_ingredients_in_inventory()
-    return get_ingredients_in_inventory()
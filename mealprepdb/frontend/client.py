@@ -0,0 +1,163 @@
+"""Shared http client the dash callbacks use to talk to the api.
+
+`backend` is a blocking `httpx.Client` and `backend_async` an `httpx.AsyncClient`.
+Both keep connections alive between callbacks and bound their pool, timeouts and
+connect retries with the MEALPREPDB_BACKEND_* settings in config.py.
+
+NOTE this is HTTP/1.1 on purpose. uvicorn does not serve HTTP/2 and httpx only
+negotiates it over TLS, so against http://api:8080 it would never be used.
+
+Dash callbacks are synchronous, so `backend_async` runs on an event loop of its own
+in a daemon thread. `backend_async.gather(...)` sends several requests at once and
+blocks the callback until all of them are back:
+
+    ingredients, inventory = backend_async.gather(
+        backend_async.get("/ingredient/"),
+        backend_async.get("/ingredient/inventory/"),
+    )
+
+Clients, loop and thread are created on first use and again after a fork, so
+gunicorn workers never share sockets they inherited from the master.
+"""
+from typing import Any, Awaitable, Dict, List, Optional, TypeVar
+import asyncio
+import os
+import threading
+
+import httpx
+
+from .. import config
+
+T = TypeVar("T")
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.BACKEND_MAX_CONNECTIONS,
+        max_keepalive_connections=config.BACKEND_MAX_KEEPALIVE,
+        keepalive_expiry=config.BACKEND_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(config.BACKEND_TIMEOUT, connect=config.BACKEND_CONNECT_TIMEOUT)
+
+
+class BackendClient:
+    """Blocking client with one keep-alive pool per process.
+
+    NOTE `retries` only covers failing to connect, so a request that reached the api
+    is never sent again.
+    """
+
+    def __init__(
+        self,
+        base_url: str = config.BASE_BACKEND_URL,
+        retries: int = config.BACKEND_RETRIES,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self._client: Optional[httpx.Client] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._pid != os.getpid():
+            with self._lock:
+                if self._client is None or self._pid != os.getpid():
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        timeout=_timeout(),
+                        transport=httpx.HTTPTransport(
+                            limits=_limits(), retries=self.retries
+                        ),
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+        return self.client.get(path, params=params)
+
+    def post(self, path: str, data: Dict[str, Any]) -> httpx.Response:
+        return self.client.post(path, json=data)
+
+    def close(self) -> None:
+        if self._client is not None and self._pid == os.getpid():
+            self._client.close()
+        self._client = None
+
+
+class AsyncBackendClient:
+    """`httpx.AsyncClient` on a private event loop thread. `get` and `post` are
+    coroutines for that loop; hand them to `gather` from a callback.
+    """
+
+    def __init__(
+        self,
+        base_url: str = config.BASE_BACKEND_URL,
+        retries: int = config.BACKEND_RETRIES,
+    ):
+        self.base_url = base_url
+        self.retries = retries
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _running_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=loop.run_forever, name="backend-client", daemon=True
+                    ).start()
+                    # the client binds to the loop it is first used on
+                    self._client = None
+                    self._loop = loop
+                    self._pid = os.getpid()
+        return self._loop
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # only ever touched from the loop thread
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=_timeout(),
+                transport=httpx.AsyncHTTPTransport(
+                    limits=_limits(), retries=self.retries
+                ),
+            )
+        return self._client
+
+    async def get(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> httpx.Response:
+        return await self.client.get(path, params=params)
+
+    async def post(self, path: str, data: Dict[str, Any]) -> httpx.Response:
+        return await self.client.post(path, json=data)
+
+    def gather(self, *aws: Awaitable[T]) -> List[T]:
+        """Run `aws` concurrently on the client's loop and wait for all of them."""
+
+        async def _gather() -> List[T]:
+            return list(await asyncio.gather(*aws))
+
+        loop = self._running_loop()
+        return asyncio.run_coroutine_threadsafe(_gather(), loop).result()
+
+    def close(self) -> None:
+        if self._loop is None or self._pid != os.getpid():
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+
+backend = BackendClient()
+backend_async = AsyncBackendClient()
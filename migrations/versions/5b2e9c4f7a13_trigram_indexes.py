@@ -0,0 +1,48 @@
+"""trigram indexes
+
+Revision ID: 5b2e9c4f7a13
+Revises: 15df77bde24b
+Create Date: 2026-10-18 09:12:41.220314
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e9c4f7a13"
+down_revision: Union[str, None] = "15df77bde24b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> columns searched with ILIKE '%x%' or the pg_trgm `%` operator
+_trigram_columns = {
+    "ingredient": ["name"],
+    "dish": ["name"],
+    "ingredient_in_inventory": ["from_where", "brand"],
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for table, columns in _trigram_columns.items():
+        for column in columns:
+            op.create_index(
+                f"idx__{table}__{column}_trgm",
+                table,
+                columns=[column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+
+def downgrade() -> None:
+    for table, columns in _trigram_columns.items():
+        for column in columns:
+            op.drop_index(f"idx__{table}__{column}_trgm", table_name=table)
+
+    # NOTE the extension is left in place; it is database wide and may be used elsewhere
@@ -0,0 +1,52 @@
+"""prefix search indexes
+
+Revision ID: 8d4a1f6c2e90
+Revises: 5b2e9c4f7a13
+Create Date: 2026-10-18 10:02:17.904455
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4a1f6c2e90"
+down_revision: Union[str, None] = "5b2e9c4f7a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# table -> column behind the typeahead search
+_search_columns = {
+    "ingredient": "name",
+    "dish": "name",
+    "meal": "description",
+}
+
+
+def upgrade() -> None:
+    # `lower(col) LIKE 'abc%'` can only use a btree with text_pattern_ops under a
+    # non C collation
+    for table, column in _search_columns.items():
+        op.create_index(
+            f"idx__{table}__{column}_lower_prefix",
+            table,
+            columns=[sa.text(f"lower({column}) text_pattern_ops")],
+        )
+
+    # ingredient.name and dish.name already have one from 5b2e9c4f7a13
+    op.create_index(
+        "idx__meal__description_trgm",
+        "meal",
+        columns=["description"],
+        postgresql_using="gin",
+        postgresql_ops={"description": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx__meal__description_trgm", table_name="meal")
+    for table, column in _search_columns.items():
+        op.drop_index(f"idx__{table}__{column}_lower_prefix", table_name=table)
@@ -0,0 +1,97 @@
+"""analytics materialized views
+
+Revision ID: a7c3e5d91b24
+Revises: 8d4a1f6c2e90
+Create Date: 2026-10-18 11:20:53.618042
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c3e5d91b24"
+down_revision: Union[str, None] = "8d4a1f6c2e90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # NOTE ingredient.type is nullable. it is coalesced so the unique index that
+    # REFRESH ... CONCURRENTLY needs actually holds
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_spend_monthly AS
+        SELECT
+            date_trunc('month', i.purchased_on)::date AS month,
+            coalesce(ing.type, '') AS ingredient_type,
+            coalesce(sum(i.price), 0) AS total_spend,
+            count(*) AS purchases
+        FROM ingredient_in_inventory i
+        JOIN ingredient ing ON ing.id = i.ingredient_id
+        WHERE i.purchased_on IS NOT NULL
+        GROUP BY 1, 2
+        """
+    )
+    op.create_index(
+        "uq__mv_spend_monthly__month_ingredient_type",
+        "mv_spend_monthly",
+        columns=["month", "ingredient_type"],
+        unique=True,
+    )
+
+    # meal_ingredient and dish_ingredient both point at ingredient_in_inventory
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_inventory_consumption AS
+        SELECT
+            i.id AS ingredient_in_inventory_id,
+            i.ingredient_id,
+            ing.name AS ingredient_name,
+            coalesce(ing.type, '') AS ingredient_type,
+            i.quantity AS purchased_quantity,
+            i.unit,
+            i.purchased_on,
+            i.finished_on,
+            coalesce(mi.quantity, 0) + coalesce(di.quantity, 0) AS consumed_quantity,
+            greatest(mi.last_used_on, di.last_used_on) AS last_used_on
+        FROM ingredient_in_inventory i
+        JOIN ingredient ing ON ing.id = i.ingredient_id
+        LEFT JOIN (
+            SELECT
+                meal_ingredient.ingredient_id,
+                sum(meal_ingredient.quantity) AS quantity,
+                max(meal.consumed_on) AS last_used_on
+            FROM meal_ingredient
+            JOIN meal ON meal.id = meal_ingredient.meal_id
+            GROUP BY meal_ingredient.ingredient_id
+        ) mi ON mi.ingredient_id = i.id
+        LEFT JOIN (
+            SELECT
+                dish_ingredient.ingredient_id,
+                sum(dish_ingredient.quantity) AS quantity,
+                max(dish.created_on) AS last_used_on
+            FROM dish_ingredient
+            JOIN dish ON dish.id = dish_ingredient.dish_id
+            GROUP BY dish_ingredient.ingredient_id
+        ) di ON di.ingredient_id = i.id
+        """
+    )
+    op.create_index(
+        "uq__mv_inventory_consumption__ingredient_in_inventory_id",
+        "mv_inventory_consumption",
+        columns=["ingredient_in_inventory_id"],
+        unique=True,
+    )
+    op.create_index(
+        "idx__mv_inventory_consumption__ingredient_type",
+        "mv_inventory_consumption",
+        columns=["ingredient_type"],
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_inventory_consumption")
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_spend_monthly")
@@ -0,0 +1,92 @@
+"""inventory remaining quantity converted
+
+Revision ID: b6d2f8e4a317
+Revises: f3a9c1d7e248
+Create Date: 2026-10-18 16:41:09.215833
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6d2f8e4a317"
+down_revision: Union[str, None] = "f3a9c1d7e248"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    # c4e8b2a6f153 backfilled remaining_quantity with raw sums across units. recompute
+    # every row with the same unit conversion the api uses since (api/units.py).
+    from mealprepdb.api.ingredient.ingredient_in_inventory import compute_remaining
+
+    bind = op.get_bind()
+    t = sa.table(
+        "ingredient_in_inventory",
+        sa.column("id", sa.Integer),
+        sa.column("ingredient_id", sa.Integer),
+        sa.column("quantity", sa.Float),
+        sa.column("unit", sa.String),
+        sa.column("remaining_quantity", sa.Float),
+        sa.column("updated_on", sa.DateTime),
+    )
+    ing = sa.table("ingredient", sa.column("id", sa.Integer), sa.column("name"))
+    ledger = [
+        sa.table(
+            name,
+            sa.column("ingredient_id", sa.Integer),
+            sa.column("quantity", sa.Float),
+            sa.column("unit", sa.String),
+        )
+        for name in ("dish_ingredient", "meal_ingredient")
+    ]
+
+    last_id = 0
+    while True:
+        items = bind.execute(
+            sa.select(t.c.id, t.c.quantity, t.c.unit, ing.c.name)
+            .join(ing, ing.c.id == t.c.ingredient_id)
+            .where(t.c.id > last_id)
+            .order_by(t.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not items:
+            break
+        last_id = items[-1].id
+
+        uses = bind.execute(
+            sa.union_all(
+                *[
+                    sa.select(u.c.ingredient_id, u.c.quantity, u.c.unit).where(
+                        u.c.ingredient_id.in_([r.id for r in items])
+                    )
+                    for u in ledger
+                ]
+            )
+        ).all()
+        remaining = compute_remaining(items, uses)
+
+        v = sa.values(
+            sa.column("id", sa.Integer),
+            sa.column("remaining_quantity", sa.Float),
+            name="v",
+        ).data(list(remaining.items()))
+        bind.execute(
+            sa.update(t)
+            .values(
+                remaining_quantity=v.c.remaining_quantity,
+                updated_on=sa.func.clock_timestamp(),
+            )
+            .where(t.c.id == v.c.id)
+            .where(t.c.remaining_quantity.is_distinct_from(v.c.remaining_quantity))
+        )
+
+
+def downgrade() -> None:
+    # the unconverted sums were wrong, nothing to go back to
+    pass
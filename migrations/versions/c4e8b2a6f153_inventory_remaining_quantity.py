@@ -0,0 +1,54 @@
+"""inventory remaining quantity
+
+Revision ID: c4e8b2a6f153
+Revises: a7c3e5d91b24
+Create Date: 2026-10-18 13:05:29.771860
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8b2a6f153"
+down_revision: Union[str, None] = "a7c3e5d91b24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # purchased quantity minus everything dishes and meals used of it. kept up to date
+    # by the api on every write to dish_ingredient / meal_ingredient.
+    op.add_column(
+        "ingredient_in_inventory",
+        sa.Column("remaining_quantity", sa.Float, nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE ingredient_in_inventory i
+        SET remaining_quantity = i.quantity
+            - coalesce(
+                (SELECT sum(quantity) FROM meal_ingredient WHERE ingredient_id = i.id),
+                0
+            )
+            - coalesce(
+                (SELECT sum(quantity) FROM dish_ingredient WHERE ingredient_id = i.id),
+                0
+            )
+        """
+    )
+    op.create_index(
+        "idx__ingredient_in_inventory__remaining_quantity",
+        "ingredient_in_inventory",
+        columns=["remaining_quantity"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "idx__ingredient_in_inventory__remaining_quantity",
+        table_name="ingredient_in_inventory",
+    )
+    op.drop_column("ingredient_in_inventory", "remaining_quantity")
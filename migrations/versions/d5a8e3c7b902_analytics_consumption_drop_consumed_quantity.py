@@ -0,0 +1,107 @@
+"""analytics consumption drop consumed_quantity
+
+Revision ID: d5a8e3c7b902
+Revises: b6d2f8e4a317
+Create Date: 2026-10-18 17:12:44.308157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d5a8e3c7b902"
+down_revision: Union[str, None] = "b6d2f8e4a317"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_view(select: str) -> None:
+    op.execute(f"CREATE MATERIALIZED VIEW mv_inventory_consumption AS {select}")
+    op.create_index(
+        "uq__mv_inventory_consumption__ingredient_in_inventory_id",
+        "mv_inventory_consumption",
+        columns=["ingredient_in_inventory_id"],
+        unique=True,
+    )
+    op.create_index(
+        "idx__mv_inventory_consumption__ingredient_type",
+        "mv_inventory_consumption",
+        columns=["ingredient_type"],
+    )
+
+
+def upgrade() -> None:
+    # consumed_quantity summed quantities across units. the api computes it from
+    # mv_inventory_usage with unit conversion (api/units.py) instead.
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_inventory_consumption")
+    _create_view(
+        """
+        SELECT
+            i.id AS ingredient_in_inventory_id,
+            i.ingredient_id,
+            ing.name AS ingredient_name,
+            coalesce(ing.type, '') AS ingredient_type,
+            i.quantity AS purchased_quantity,
+            i.unit,
+            i.purchased_on,
+            i.finished_on,
+            greatest(mi.last_used_on, di.last_used_on) AS last_used_on
+        FROM ingredient_in_inventory i
+        JOIN ingredient ing ON ing.id = i.ingredient_id
+        LEFT JOIN (
+            SELECT meal_ingredient.ingredient_id, max(meal.consumed_on) AS last_used_on
+            FROM meal_ingredient
+            JOIN meal ON meal.id = meal_ingredient.meal_id
+            GROUP BY meal_ingredient.ingredient_id
+        ) mi ON mi.ingredient_id = i.id
+        LEFT JOIN (
+            SELECT dish_ingredient.ingredient_id, max(dish.created_on) AS last_used_on
+            FROM dish_ingredient
+            JOIN dish ON dish.id = dish_ingredient.dish_id
+            GROUP BY dish_ingredient.ingredient_id
+        ) di ON di.ingredient_id = i.id
+        """
+    )
+
+
+def downgrade() -> None:
+    # as created by a7c3e5d91b24
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_inventory_consumption")
+    _create_view(
+        """
+        SELECT
+            i.id AS ingredient_in_inventory_id,
+            i.ingredient_id,
+            ing.name AS ingredient_name,
+            coalesce(ing.type, '') AS ingredient_type,
+            i.quantity AS purchased_quantity,
+            i.unit,
+            i.purchased_on,
+            i.finished_on,
+            coalesce(mi.quantity, 0) + coalesce(di.quantity, 0) AS consumed_quantity,
+            greatest(mi.last_used_on, di.last_used_on) AS last_used_on
+        FROM ingredient_in_inventory i
+        JOIN ingredient ing ON ing.id = i.ingredient_id
+        LEFT JOIN (
+            SELECT
+                meal_ingredient.ingredient_id,
+                sum(meal_ingredient.quantity) AS quantity,
+                max(meal.consumed_on) AS last_used_on
+            FROM meal_ingredient
+            JOIN meal ON meal.id = meal_ingredient.meal_id
+            GROUP BY meal_ingredient.ingredient_id
+        ) mi ON mi.ingredient_id = i.id
+        LEFT JOIN (
+            SELECT
+                dish_ingredient.ingredient_id,
+                sum(dish_ingredient.quantity) AS quantity,
+                max(dish.created_on) AS last_used_on
+            FROM dish_ingredient
+            JOIN dish ON dish.id = dish_ingredient.dish_id
+            GROUP BY dish_ingredient.ingredient_id
+        ) di ON di.ingredient_id = i.id
+        """
+    )
@@ -0,0 +1,51 @@
+"""analytics usage by unit
+
+Revision ID: e91b7d3c5a06
+Revises: c4e8b2a6f153
+Create Date: 2026-10-18 14:02:17.403995
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e91b7d3c5a06"
+down_revision: Union[str, None] = "c4e8b2a6f153"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # what meals and dishes used of each inventory item, per unit they recorded it in.
+    # the api converts these into the item's unit before summing (api/units.py).
+    # NOTE unit is coalesced so the unique index REFRESH ... CONCURRENTLY needs holds
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_inventory_usage AS
+        SELECT
+            u.ingredient_in_inventory_id,
+            coalesce(u.unit, '') AS unit,
+            sum(u.quantity) AS quantity
+        FROM (
+            SELECT ingredient_id AS ingredient_in_inventory_id, quantity, unit
+            FROM meal_ingredient
+            UNION ALL
+            SELECT ingredient_id AS ingredient_in_inventory_id, quantity, unit
+            FROM dish_ingredient
+        ) u
+        GROUP BY 1, 2
+        """
+    )
+    op.create_index(
+        "uq__mv_inventory_usage__ingredient_in_inventory_id_unit",
+        "mv_inventory_usage",
+        columns=["ingredient_in_inventory_id", "unit"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_inventory_usage")
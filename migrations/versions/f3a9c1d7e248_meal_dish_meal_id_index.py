@@ -0,0 +1,32 @@
+"""meal_dish meal_id index
+
+Revision ID: f3a9c1d7e248
+Revises: e91b7d3c5a06
+Create Date: 2026-10-18 14:48:05.127730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3a9c1d7e248"
+down_revision: Union[str, None] = "e91b7d3c5a06"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # meal_ingredient has had this from the start. the meal calendar and meal full
+    # views look meal_dish rows up by meal.
+    op.create_index(
+        "idx__meal_dish__meal_id",
+        "meal_dish",
+        columns=["meal_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx__meal_dish__meal_id", table_name="meal_dish")
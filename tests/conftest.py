@@ -9,7 +9,7 @@ this_dir = pathlib.Path(__file__).parent
 root_dir = this_dir.parent
 
 from mealprepdb import config
-from mealprepdb.api import main, deps
+from mealprepdb.api import main, deps, cache, base
 
 import orjson
 from mealprepdb.api.base import orjson_serializer
@@ -77,14 +77,23 @@ def module_get_transaction(module_transaction):
     """override dep injector"""
 
     async def _get_test_transaction():
-        return module_transaction
+        # the module transaction never commits; run the post commit hooks as if
+        # every request that went through had
+        try:
+            yield module_transaction
+        except Exception:
+            base.run_after_commit(module_transaction, committed=False)
+            raise
+        base.run_after_commit(module_transaction, committed=True)
 
     return _get_test_transaction
 
 
 @pytest.fixture(scope="module")
-def module_test_app(module_get_transaction):
+def module_test_app(module_get_transaction, db):
     main.app.dependency_overrides[deps.get_transaction] = module_get_transaction
+    main.app.dependency_overrides[deps.get_engine] = lambda: db.engine
+    cache.clear_all()  # each module's data is rolled back so cached reads are stale
     yield main.app
     main.app.dependency_overrides = {}
 
@@ -81,6 +81,7 @@ async def load(trans: dal.TransactionManager) -> sa.engine.CursorResult:
         .returning(tab)
     )
     result = await trans.execute(stmt)
+    await trans.execute(sa.update(tab).values(remaining_quantity=tab.c.quantity))
     await trans.execute(sa.text("select setval('ingredient_in_inventory_id_seq', 6)"))
     return result
 
@@ -0,0 +1,85 @@
+import datetime
+
+import httpx
+import pytest
+import sqlalchemy as sa
+
+from mealprepdb.api import base
+from mealprepdb.api.analytics.refresh import refresher
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_analytics_refresh_view(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("analytics_refresh_view")
+        response = await client.post(path)
+        assert response.status_code == 204
+        assert refresher.dirty_since is None
+
+
+async def test_spend_list_view(module_test_app, module_transaction, module_meal_data):
+    app = module_test_app
+    transaction = module_transaction
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("spend_list_view")
+        response = await client.get(path)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) > 0
+        assert all(r["month"].endswith("-01") for r in results)
+
+        t = transaction.get_table("ingredient_in_inventory")
+        stmt = sa.select(sa.func.sum(t.c.price)).where(t.c.purchased_on.is_not(None))
+        total = (await transaction.execute(stmt)).scalar_one()
+        assert sum(r["total_spend"] for r in results) == pytest.approx(total)
+
+        params = {"type": "legumes", "month__ge": "2017-07-15"}
+        response = await client.get(path, params=params)
+        assert response.status_code == 200
+        for r in response.json()["results"]:
+            assert r["ingredient_type"] == "legumes"
+            assert r["month"] >= "2017-07-01"
+
+
+async def test_consumption_list_view(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("consumption_list_view")
+        response = await client.get(path)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 6
+
+        by_id = {r["ingredient_in_inventory_id"]: r for r in results}
+        # three meals took a third each
+        assert by_id[5]["consumed_quantity"] >= pytest.approx(0.99)
+
+        response = await client.get(path, params={"type": "meat"})
+        assert {r["ingredient_type"] for r in response.json()["results"]} == {"meat"}
+
+
+async def test_analytics_marked_dirty_on_write(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        refresher.dirty_since = None
+        path = app.url_path_for("ingredient_in_inventory_update_view", id=1)
+        response = await client.put(path, json={"price": 4.5})
+        assert response.status_code == 200
+        assert refresher.dirty_since is not None
+
+
+async def test_analytics_not_marked_dirty_on_rollback(
+    module_transaction, module_meal_data
+):
+    transaction = module_transaction
+    refresher.dirty_since = None
+    data = {"description": "never eaten", "consumed_on": datetime.date(2017, 7, 4)}
+    obj = await base.create(transaction, "meal", data)
+    try:
+        base.run_after_commit(transaction, committed=False)
+        assert refresher.dirty_since is None
+    finally:
+        t = transaction.get_table("meal")
+        await transaction.execute(sa.delete(t).where(t.c.id == obj.id))
@@ -144,6 +144,70 @@ async def test_dish_ingredient_create_view(
         assert obj_.id == result["id"]
 
 
+async def test_dish_lineage_view(module_test_app, module_dish_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("dish_create_view")
+        data = {
+            "name": "leftover rice",
+            "parent_dish_id": 2,
+            "created_on": "2017-07-04",
+        }
+        response = await client.post(path, json=data)
+        assert response.status_code == 201
+        leftover_id = response.json()["id"]
+
+        data = {
+            "name": "fried rice",
+            "parent_dish_id": leftover_id,
+            "created_on": "2017-07-05",
+        }
+        response = await client.post(path, json=data)
+        assert response.status_code == 201
+        fried_id = response.json()["id"]
+
+        path = app.url_path_for("dish_lineage_view", id=fried_id)
+        response = await client.get(path)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["id"] for r in results] == [fried_id, leftover_id, 2]
+        assert [r["depth"] for r in results] == [0, 1, 2]
+        assert results[0]["ingredients"] is None
+
+        response = await client.get(path, params={"ingredients": True})
+        results = response.json()["results"]
+        assert results[0]["ingredients"] == []
+        assert [i["ingredient_id"] for i in results[-1]["ingredients"]] == [3]
+
+        response = await client.get(path, params={"max_depth": 1})
+        results = response.json()["results"]
+        assert [r["id"] for r in results] == [fried_id, leftover_id]
+
+        path = app.url_path_for("dish_descendants_view", id=2)
+        response = await client.get(path)
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["id"] for r in results] == [2, leftover_id, fried_id]
+
+        # close the loop. the walk must still stop
+        path = app.url_path_for("dish_update_view", id=2)
+        response = await client.put(path, json={"parent_dish_id": fried_id})
+        assert response.status_code == 200
+
+        path = app.url_path_for("dish_lineage_view", id=fried_id)
+        response = await client.get(path, params={"max_depth": 100})
+        assert response.status_code == 200
+        assert len(response.json()["results"]) == 3
+
+        path = app.url_path_for("dish_update_view", id=2)
+        response = await client.put(path, json={"parent_dish_id": None})
+        assert response.status_code == 200
+
+        path = app.url_path_for("dish_lineage_view", id=42)
+        response = await client.get(path)
+        assert response.status_code == 404
+
+
 async def test_dish_create_view_409(
     module_test_app, module_transaction, module_dish_data
 ):
@@ -0,0 +1,41 @@
+import httpx
+import orjson
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_export_view_ndjson(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("export_view", table="ingredient_in_inventory")
+        response = await client.get(path)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        rows = [orjson.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 6
+        assert rows[0]["ingredient_name"] == "onion"
+
+        path = app.url_path_for("export_view", table="meal_ingredient")
+        response = await client.get(path)
+        assert response.status_code == 200
+        rows = [orjson.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 4
+
+        path = app.url_path_for("export_view", table="meal")
+        response = await client.get(path)
+        assert response.status_code == 422
+
+
+async def test_export_view_csv(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("export_view", table="dish_ingredient")
+        response = await client.get(path, params={"format": "csv"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        lines = response.text.splitlines()
+        assert lines[0].split(",")[:3] == ["id", "dish_id", "dish_name"]
+        assert len(lines) == 5  # header + 4 rows
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+# cumulative microseconds `import mealprepdb.api.main` may take in a fresh
+# interpreter. Generous on purpose: this catches a heavy import landing at module
+# level, not noise. Override with MEALPREPDB_IMPORT_BUDGET_US on slow machines.
+IMPORT_BUDGET_US = int(os.environ.get("MEALPREPDB_IMPORT_BUDGET_US", 1_500_000))
+
+# must only be imported when something actually uses them
+DEFERRED = ("numpy", "pandas", "dash", "fastapi_auth0")
+
+
+def _python(code: str, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=os.environ.copy(),
+    )
+
+
+def test_api_import_time_budget():
+    proc = _python("import mealprepdb.api.main", "-X", "importtime")
+    # import time: self [us] | cumulative | imported package
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = line.split("|")
+        if total.strip().isdigit():
+            cumulative[name.strip()] = int(total)
+    assert "mealprepdb.api.main" in cumulative
+    assert cumulative["mealprepdb.api.main"] < IMPORT_BUDGET_US, sorted(
+        cumulative.items(), key=lambda kv: -kv[1]
+    )[:20]
+
+
+def test_api_import_defers_heavy_modules():
+    proc = _python(
+        "import sys, mealprepdb.api.main; "
+        f"print(','.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    )
+    assert proc.stdout.strip() == ""
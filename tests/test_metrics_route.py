@@ -0,0 +1,71 @@
+import httpx
+import pytest
+
+from mealprepdb.api import pool, slow_query
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_pool_metrics_view(module_test_app, db):
+    app = module_test_app
+    async with pool.connect(db.engine):
+        pass
+
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("pool_metrics_view")
+        response = await client.get(path)
+        assert response.status_code == 200
+
+        result = response.json()
+        assert result["wait"]["checkouts"] >= 1
+        assert result["capacity"]["connections_total"] <= (
+            result["capacity"]["postgres_max_connections"]
+        )
+        assert set(result["pool"]) >= {"size", "checked_out", "overflow"}
+
+
+async def test_prometheus_metrics_view(module_test_app, module_ingredient_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        response = await client.get(app.url_path_for("ingredient_list_view"))
+        assert response.status_code == 200
+        response = await client.get(app.url_path_for("ingredient_detail_view", id=1))
+        assert response.status_code == 200
+
+        response = await client.get(app.url_path_for("prometheus_metrics_view"))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        body = response.text
+        assert "# TYPE mealprepdb_http_request_duration_seconds histogram" in body
+        # labelled with the route template rather than the path
+        assert 'route="/ingredient/{id}",le="+Inf"' in body
+        assert 'route="/ingredient/1"' not in body
+        assert 'mealprepdb_serialization_duration_seconds_count{view="' in body
+
+
+async def test_slow_query_list_view(module_test_app, module_ingredient_data, db):
+    app = module_test_app
+    slow_query.log.instrument(db.engine)
+    threshold, slow_query.log.threshold = slow_query.log.threshold, 1e-9
+    try:
+        async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+            path = app.url_path_for("slow_query_clear_view")
+            response = await client.delete(path)
+            assert response.status_code == 204
+
+            path = app.url_path_for("ingredient_list_view")
+            response = await client.get(path, params={"name__contains": "on"})
+            assert response.status_code == 200
+
+            path = app.url_path_for("slow_query_list_view")
+            response = await client.get(path)
+            assert response.status_code == 200
+            entries = response.json()
+            assert any(
+                e["route"] == "/ingredient/" and "ingredient" in e["statement"]
+                for e in entries
+            )
+    finally:
+        slow_query.log.threshold = threshold
+        slow_query.log.uninstrument(db.engine)
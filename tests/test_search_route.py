@@ -0,0 +1,34 @@
+import httpx
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_view(module_test_app, module_meal_data):
+    app = module_test_app
+    async with httpx.AsyncClient(app=app, base_url="https://fake.com") as client:
+        path = app.url_path_for("search_view")
+        response = await client.get(path, params={"q": "ric"})
+        assert response.status_code == 200
+
+        results = response.json()["results"]
+        # prefix matches come first
+        top = {(r["type"], r["id"]) for r in results[:2]}
+        assert top == {("ingredient", 2), ("meal", 3)}
+        assert results[0]["links"]["self"].startswith(f"/{results[0]['type']}/")
+
+        response = await client.get(path, params={"q": "rice", "type": "dish"})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert "plain rice" in {r["label"] for r in results}
+        assert {r["type"] for r in results} == {"dish"}
+
+        response = await client.get(path, params={"q": "ric", "limit": 1})
+        assert len(response.json()["results"]) == 1
+
+        response = await client.get(path, params={"q": "%"})
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+        response = await client.get(path)
+        assert response.status_code == 422
@@ -0,0 +1,74 @@
+import datetime
+
+from mealprepdb.api.ingredient.ingredient_in_inventory import (
+    IngredientInInventoryListView,
+)
+from mealprepdb.api.dish.dish_ingredient import DishIngredientListView
+from mealprepdb.api.base import HyperModel
+
+
+def _inventory_rows(n):
+    return [
+        {
+            "id": i,
+            "name": "onion",
+            "ingredient_id": 1,
+            "from_where": "onion ville",
+            "brand": "",
+            "price": 3.5,
+            "quantity": 1.5,
+            "unit": "pound",
+            "purchased_on": datetime.date(2017, 7, 1),
+            "finished_on": None,
+            "total_count": n,
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def test_list_view_render_matches_model_validate(module_test_app):
+    rows = _inventory_rows(3)
+    fast = IngredientInInventoryListView.render(
+        rows, next_url="https://fake.com/ingredient/inventory/?offset=3", total_count=6
+    )
+    slow = IngredientInInventoryListView.model_validate(
+        {
+            "next_url": "https://fake.com/ingredient/inventory/?offset=3",
+            "total_count": 6,
+            "results": rows,
+        }
+    )
+    assert fast.body == type(fast)(slow.model_dump(mode="json")).body
+
+    # defaults get filled in for columns the statement did not select
+    rows = [
+        {
+            "id": 1,
+            "dish_id": 1,
+            "dish_name": "mong bean and rice",
+            "ingredient_id": 1,
+            "ingredient_name": "onion",
+            "quantity": None,
+            "unit": None,
+        }
+    ]
+    fast = DishIngredientListView.render(rows, next_url=None, total_count=None)
+    slow = DishIngredientListView.model_validate(
+        {"next_url": None, "total_count": None, "results": rows}
+    )
+    assert fast.body == type(fast)(slow.model_dump(mode="json")).body
+
+
+def test_link_templates_match_url_path_for(module_test_app):
+    app = module_test_app
+    names = [
+        "ingredient_detail_view",
+        "ingredient_in_inventory_detail_view",
+        "ingredient_meal_list_view",
+        "dish_detail_view",
+        "dish_ingredient_list_view",
+        "dish_meal_list_view",
+        "meal_detail_view",
+    ]
+    for name in names:
+        assert HyperModel.url_for(name, id=42) == app.url_path_for(name, id=42)
@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+import sqlalchemy as sa
+from aiodal import dal
+
+from mealprepdb import config
+from mealprepdb.api import snapshot
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_reflect_from_snapshot(db, tmp_path, monkeypatch):
+    path = tmp_path / "metadata.pickle"
+    monkeypatch.setattr(config, "METADATA_SNAPSHOT", str(path))
+
+    # no snapshot -> live
+    fresh = dal.DataAccessLayer()
+    assert await snapshot.reflect(fresh, db.engine) == "live"
+
+    revision = await snapshot.database_revision(db.engine)
+    assert revision == snapshot.head_revision()
+    with path.open("wb") as f:
+        pickle.dump(
+            {
+                "revision": revision,
+                "sqlalchemy": sa.__version__,
+                "metadata": fresh.metadata,
+            },
+            f,
+        )
+
+    fresh = dal.DataAccessLayer()
+    assert await snapshot.reflect(fresh, db.engine) == "snapshot"
+    t = fresh.get_table("meal")
+    assert "consumed_on" in t.c
+
+    # a snapshot for another revision is ignored
+    with path.open("wb") as f:
+        pickle.dump(
+            {"revision": "0", "sqlalchemy": sa.__version__, "metadata": fresh.metadata},
+            f,
+        )
+    fresh = dal.DataAccessLayer()
+    assert await snapshot.reflect(fresh, db.engine) == "live"
@@ -0,0 +1,48 @@
+import math
+
+import numpy as np
+
+from mealprepdb.api.units import Dimension, UnitRegistry, normalize, registry, sum_by
+
+
+def test_normalize():
+    assert normalize("Cups") == "cup"
+    assert normalize(" Fl.  Oz ") == "fl oz"
+    assert normalize("lbs") == "lb"
+    assert normalize(None) == ""
+
+
+def test_convert_column():
+    out = registry.convert(
+        [1, 16, 2, 3, None],
+        ["pound", "oz", "cups", "can", "g"],
+        "g",
+        ingredients=["onion", "onion", "rice", "chickpeas", "rice"],
+    )
+    assert math.isclose(out[0], 453.59237)
+    assert math.isclose(out[1], 453.59237)
+    assert math.isclose(out[2], 2 * 236.5882365 * 0.85)  # volume -> mass by density
+    assert math.isnan(out[3])  # no way from a can to grams
+    assert math.isnan(out[4])
+
+
+def test_convert_per_row_target():
+    out = registry.convert([1, 3, 2], ["cup", "tsp", "can"], ["tbsp", "tbsp", "can"])
+    assert math.isclose(out[0], 16)
+    assert math.isclose(out[1], 1)
+    assert out[2] == 2  # unregistered but the same unit
+
+
+def test_registry_overrides():
+    r = UnitRegistry()
+    r.define("can", Dimension.count, 1)
+    r.set_density("Chickpeas", 0.7)
+    out = r.convert([1, 100], ["cans", "ml"], ["each", "g"], ["chickpeas"] * 2)
+    assert list(out) == [1, 70]
+
+
+def test_sum_by_counts_unconverted():
+    converted = registry.convert([1, 2, 1, 3], ["cup", "can", "tbsp", "cup"], "cup")
+    sums, skipped = sum_by(np.array([0, 0, 1, 2]), converted, 4)
+    assert list(sums) == [1, 1 / 16, 3, 0]
+    assert list(skipped) == [1, 0, 0, 0]